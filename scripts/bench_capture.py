@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# scripts/bench_capture.py
+"""
+Compare screenshot capture formats for the HTML render pipeline: CPU time to
+encode the capture (browser side) and to decode + dither it into a 1-bit BMP
+(server side), for PNG (the old path) vs JPEG decoded straight to grayscale.
+
+Runs offline on a synthetic poem-like frame. With --browser it also times real
+Chromium screenshots through the BrowserPool (requires `playwright install chromium`).
+
+Usage:
+    uv run python scripts/bench_capture.py [--iterations 50] [--browser]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+from trmnl.dither import save_bmp
+from trmnl.generate import CAPTURE_QUALITY, decode_screenshot
+from trmnl.text_render import get_font
+
+POEM = (
+    "I met a traveller from an antique land,\n"
+    "Who said—“Two vast and trunkless legs of stone\n"
+    "Stand in the desert. . . . Near them, on the sand,\n"
+    "Half sunk a shattered visage lies, whose frown,\n"
+    "And wrinkled lip, and sneer of cold command,\n"
+    "Tell that its sculptor well those passions read\n"
+)
+
+
+def synthetic_frame() -> Image.Image:
+    """Anti-aliased black-on-white text, like a Chromium screenshot of a poem."""
+    image = Image.new("RGB", (800, 480), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    heading, body = get_font(18, bold=True), get_font(16)
+    draw.text((220, 90), "OZYMANDIAS by Percy Bysshe Shelley", font=heading.font, fill=(0, 0, 0))
+    y = 140
+    for line in POEM.splitlines() * 2:
+        draw.text((180, y), line, font=body.font, fill=(0, 0, 0))
+        y += body.line_height
+    return image
+
+
+def encode(image: Image.Image, fmt: str) -> bytes:
+    buf = io.BytesIO()
+    if fmt == "jpeg":
+        image.save(buf, format="JPEG", quality=CAPTURE_QUALITY)
+    else:
+        image.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def decode_dither(data: bytes, fmt: str, out: Path) -> Path:
+    """The server side of a capture, for either format."""
+    if fmt == "png":
+        # the old path: full-colour decode, then convert("1")
+        return save_bmp(Image.open(io.BytesIO(data)), out)
+    return save_bmp(decode_screenshot(data), out)
+
+
+def cpu_ms(fn, iterations: int) -> float:
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) / iterations * 1000
+
+
+def bench_offline(iterations: int) -> None:
+    frame = synthetic_frame()
+    out = Path(tempfile.mkdtemp()) / "bench.bmp"
+    print(f"Offline capture benchmark ({iterations} iterations, CPU ms per frame)")
+    print(f"{'format':<8}{'bytes':>10}{'encode':>10}{'decode+dither':>16}{'total':>10}")
+    for fmt in ("png", "jpeg"):
+        data = encode(frame, fmt)
+        enc = cpu_ms(lambda: encode(frame, fmt), iterations)
+        dec = cpu_ms(lambda: decode_dither(data, fmt, out), iterations)
+        print(f"{fmt:<8}{len(data):>10}{enc:>10.2f}{dec:>16.2f}{enc + dec:>10.2f}")
+
+
+async def bench_browser(iterations: int) -> None:
+    from trmnl.browser import BrowserPool
+
+    pool = BrowserPool(size=1)
+    html = "<div style='padding: 80px'>" + POEM.replace("\n", "<br>") * 2 + "</div>"
+    clip = {"x": 0, "y": 0, "width": 800, "height": 480}
+    print(f"\nChromium screenshot benchmark ({iterations} iterations, wall ms per capture)")
+    try:
+        async with pool.page() as page:
+            await page.set_content(html)
+            for fmt, extra in (("png", {}), ("jpeg", {"quality": CAPTURE_QUALITY})):
+                await page.screenshot(type=fmt, clip=clip, **extra)  # warm up
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    await page.screenshot(type=fmt, clip=clip, **extra)
+                elapsed = (time.perf_counter() - start) / iterations * 1000
+                print(f"{fmt:<8}{elapsed:>10.2f}")
+    finally:
+        await pool.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark screenshot capture formats")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--browser", action="store_true", help="Also time real Chromium captures")
+    args = parser.parse_args()
+
+    bench_offline(args.iterations)
+    if args.browser:
+        asyncio.run(bench_browser(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
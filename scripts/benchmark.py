@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# scripts/benchmark.py
+"""
+Offline benchmark suite for the render/serve hot paths. No API keys or network.
+
+Stages:
+  html_render   generate_bmp_from_html, cold (fresh browser) and warm (pooled page)
+                -- skipped if Chromium isn't installed
+  conversion    Pillow convert("1") vs every trmnl.dither method, per 800x480 frame
+  capture       PNG vs JPEG screenshot decode + dither (frame and decode shared
+                with scripts/bench_capture.py)
+  carousel      Carousel.next() end to end with a stub engine, split into
+                engine / staging (copy) / pruning
+  engines       FantasyEngine / IllustrationEngine.next() against synthetic
+                caches of 100, 10k and 100k BMPs
+
+Usage:
+    uv run python scripts/benchmark.py [--output bench_report.json] [--sizes 100 10000 100000]
+        [--only conversion carousel ...] [--iterations 20]
+        [--baseline previous_report.json] [--tolerance 0.25]
+
+With --baseline, any timing whose mean got slower than the baseline by more than
+--tolerance (fractional) is listed and the script exits 1, e.g. before deploying.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+from unittest.mock import patch
+
+from PIL import Image
+
+from bench_capture import decode_dither, encode, synthetic_frame
+from trmnl.dither import DITHER_METHODS, dither, save_bmp, to_grayscale
+
+STAGES = ("html_render", "conversion", "capture", "carousel", "engines")
+POEM_HTML = (
+    "<div style='display: flex; justify-content: center; align-items: center; height: 80%;"
+    " flex-direction: column;'><b><p>OZYMANDIAS by Percy Bysshe Shelley</p></b>"
+    "<p>I met a traveller from an antique land,<br>Who said—“Two vast and trunkless legs"
+    " of stone<br>Stand in the desert. . . . Near them, on the sand,<br>Half sunk a"
+    " shattered visage lies</p></div>"
+)
+
+
+def summarize(samples_s: list[float]) -> dict[str, float | int]:
+    ms = sorted(s * 1000 for s in samples_s)
+    return {
+        "n": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(ms[len(ms) // 2], 3),
+        "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+        "min_ms": round(ms[0], 3),
+        "max_ms": round(ms[-1], 3),
+    }
+
+
+def time_sync(fn: Callable[[], Any], iterations: int) -> dict[str, float | int]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+async def time_async(fn: Callable[[], Awaitable[Any]], iterations: int) -> dict[str, float | int]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+async def bench_html_render(iterations: int, workdir: Path) -> dict[str, Any]:
+    from trmnl.browser import BrowserPool
+    from trmnl.generate import generate_bmp_from_html
+
+    out = workdir / "render.bmp"
+    pool = BrowserPool(size=1)
+    try:
+        start = time.perf_counter()
+        await generate_bmp_from_html(POEM_HTML, out, pool=pool)
+        cold = time.perf_counter() - start
+        warm = await time_async(lambda: generate_bmp_from_html(POEM_HTML, out, pool=pool), iterations)
+    except Exception as e:
+        return {"skipped": f"Chromium unavailable: {e.__class__.__name__}: {str(e).splitlines()[0]}"}
+    finally:
+        try:
+            await pool.close()
+        except Exception:
+            pass
+    return {"cold": summarize([cold]), "warm": warm}
+
+
+def bench_conversion(iterations: int, workdir: Path) -> dict[str, Any]:
+    frame = synthetic_frame()
+    gray = to_grayscale(frame)
+    out = workdir / "conv.bmp"
+    results: dict[str, Any] = {
+        "pillow_convert_save": time_sync(lambda: frame.convert("1").save(out), iterations),
+        "to_grayscale": time_sync(lambda: to_grayscale(frame), iterations),
+    }
+    for method in DITHER_METHODS:
+        results[f"dither_{method}"] = time_sync(lambda m=method: dither(gray, m), iterations)
+    results["save_bmp_floyd_steinberg"] = time_sync(lambda: save_bmp(frame, out), iterations)
+    return results
+
+
+def bench_capture(iterations: int, workdir: Path) -> dict[str, Any]:
+    frame = synthetic_frame()
+    out = workdir / "capture.bmp"
+    results: dict[str, Any] = {}
+    for fmt in ("png", "jpeg"):
+        data = encode(frame, fmt)
+        results[f"{fmt}_decode_dither"] = time_sync(lambda: decode_dither(data, fmt, out), iterations)
+    return results
+
+
+class StubEngine:
+    """Cycles through pre-made BMPs with no work of its own."""
+
+    def __init__(self, paths: list[Path]):
+        self.paths = paths
+        self.i = 0
+
+    async def next(self) -> Path:
+        path = self.paths[self.i % len(self.paths)]
+        self.i += 1
+        return path
+
+
+def _write_bmps(directory: Path, count: int, real: bool = True) -> list[Path]:
+    """Real 800x480 BMPs, or tiny stand-ins when only the directory size matters."""
+    directory.mkdir(parents=True, exist_ok=True)
+    payload = b"BM"
+    if real:
+        buf = io.BytesIO()
+        Image.new("1", (800, 480), 1).save(buf, format="BMP")
+        payload = buf.getvalue()
+    paths = []
+    for i in range(count):
+        path = directory / f"img_{i:06d}.bmp"
+        path.write_bytes(payload)
+        paths.append(path)
+    return paths
+
+
+async def bench_carousel(iterations: int, workdir: Path) -> dict[str, Any]:
+    from trmnl.carousel import Carousel
+
+    sources = _write_bmps(workdir / "carousel_src", 8)
+    working = workdir / "carousel_working"
+    working.mkdir()
+    carousel = Carousel(StubEngine(sources), working_dir=working, prefetch_depth=0)
+
+    # wrap internals to attribute time to each stage of next()
+    stage_samples: dict[str, list[float]] = {}
+
+    def timed(name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        if asyncio.iscoroutinefunction(fn):
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    stage_samples.setdefault(name, []).append(time.perf_counter() - start)
+        else:
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    stage_samples.setdefault(name, []).append(time.perf_counter() - start)
+        return wrapper
+
+    for attr, name in (("_take", "engine"), ("_stage", "staging"), ("_retire", "pruning")):
+        if hasattr(carousel, attr):
+            setattr(carousel, attr, timed(name, getattr(carousel, attr)))
+
+    total = await time_async(carousel.next, iterations)
+    return {"next_total": total, **{k: summarize(v) for k, v in stage_samples.items()}}
+
+
+async def bench_engines(iterations: int, workdir: Path, sizes: list[int]) -> dict[str, Any]:
+    import trmnl.engines.fantasy.engine as fantasy_mod
+    import trmnl.engines.illustration.engine as illustration_mod
+
+    results: dict[str, Any] = {}
+    for size in sizes:
+        cache = workdir / f"engine_cache_{size}"
+        _write_bmps(cache, size, real=False)
+        with patch.object(fantasy_mod, "FANTASY_DIR", cache):
+            start = time.perf_counter()
+            fantasy = fantasy_mod.FantasyEngine()
+            init = time.perf_counter() - start
+            results[f"fantasy_{size}"] = {
+                "init": summarize([init]),
+                "next": await time_async(fantasy.next, iterations),
+            }
+        with patch.object(illustration_mod, "ILLUSTRATION_DIR", cache):
+            start = time.perf_counter()
+            illustration = illustration_mod.IllustrationEngine()
+            init = time.perf_counter() - start
+            results[f"illustration_{size}"] = {
+                "init": summarize([init]),
+                "next": await time_async(illustration.next, iterations),
+            }
+    return results
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    stages = args.only or list(STAGES)
+    report: dict[str, Any] = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "cache_sizes": args.sizes,
+        },
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="trmnl-bench-") as tmp:
+        workdir = Path(tmp)
+        for stage in stages:
+            print(f"Running {stage}...", flush=True)
+            if stage == "html_render":
+                result = await bench_html_render(args.iterations, workdir)
+            elif stage == "conversion":
+                result = bench_conversion(args.iterations, workdir)
+            elif stage == "capture":
+                result = bench_capture(args.iterations, workdir)
+            elif stage == "carousel":
+                result = await bench_carousel(args.iterations, workdir)
+            else:
+                result = await bench_engines(args.iterations, workdir, args.sizes)
+            report["results"][stage] = result
+    return report
+
+
+def print_report(report: dict[str, Any]) -> None:
+    for stage, results in report["results"].items():
+        print(f"\n{stage}")
+        if "skipped" in results:
+            print(f"  skipped: {results['skipped']}")
+            continue
+        for name, value in results.items():
+            rows = value.items() if "n" not in value else [("", value)]
+            for sub, stats in rows:
+                label = f"{name} {sub}".strip()
+                print(f"  {label:<36} mean {stats['mean_ms']:>9.3f} ms   p95 {stats['p95_ms']:>9.3f} ms")
+
+
+def _flatten(results: dict[str, Any], prefix: str = "") -> dict[str, float]:
+    flat: dict[str, float] = {}
+    for name, value in results.items():
+        if not isinstance(value, dict):
+            continue
+        key = f"{prefix}{name}"
+        if "mean_ms" in value:
+            flat[key] = value["mean_ms"]
+        else:
+            flat.update(_flatten(value, f"{key}."))
+    return flat
+
+
+def compare(report: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """Timings slower than baseline * (1 + tolerance)."""
+    current, previous = _flatten(report["results"]), _flatten(baseline["results"])
+    regressions = []
+    for key, mean in current.items():
+        before = previous.get(key)
+        if before and mean > before * (1 + tolerance):
+            regressions.append(f"{key}: {before:.3f} ms -> {mean:.3f} ms (+{(mean / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline benchmark suite for TRMNL hot paths")
+    parser.add_argument("--output", default="bench_report.json", help="JSON report path")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--only", nargs="+", choices=STAGES, help="Run only these stages")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print_report(report)
+    print(f"\nReport written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(report, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
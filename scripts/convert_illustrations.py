@@ -1,6 +1,6 @@
 # scripts/convert_illustrations.py
 # Convert source images to 800x480 1-bit BMP for the IllustrationEngine.
-# Usage: uv run --with pillow python scripts/convert_illustrations.py <source_dir> [--artist <name>]
+# Usage: uv run python scripts/convert_illustrations.py <source_dir> [--artist <name>] [--dither <method>]
 #
 # Without --artist: outputs to ~/.cache/trmnl/illustration/ (flat, backward compat)
 # With --artist:    outputs to ~/.cache/trmnl/illustration/<artist>/
@@ -13,6 +13,8 @@ from pathlib import Path
 
 from PIL import Image, ImageOps
 
+from trmnl.dither import DITHER_METHODS, DitherMethod, save_bmp
+
 TARGET = (800, 480)
 EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".webp", ".gif"}
 BASE_DIR = Path.home() / ".cache" / "trmnl" / "illustration"
@@ -24,7 +26,7 @@ def slugify(name: str) -> str:
     return name.strip("_")[:80]
 
 
-def convert(src: Path, out_dir: Path) -> None:
+def convert(src: Path, out_dir: Path, method: DitherMethod = "floyd-steinberg") -> None:
     slug = slugify(src.stem)
     dest = out_dir / f"{slug}.bmp"
     n = 1
@@ -34,8 +36,7 @@ def convert(src: Path, out_dir: Path) -> None:
     with Image.open(src) as img:
         img = img.convert("RGB")
         padded = ImageOps.pad(img, TARGET, color=0, method=Image.LANCZOS)
-        bmp = padded.convert("1")
-        bmp.save(dest, format="BMP")
+        save_bmp(padded, dest, method)
     print(f"  {src.name} -> {dest.name}")
 
 
@@ -45,6 +46,12 @@ def main() -> None:
     )
     parser.add_argument("source_dir", help="Directory of source images")
     parser.add_argument("--artist", help="Artist name — images go in illustration/<artist>/")
+    parser.add_argument(
+        "--dither",
+        choices=DITHER_METHODS,
+        default="floyd-steinberg",
+        help="Dithering algorithm (default: floyd-steinberg)",
+    )
     args = parser.parse_args()
 
     src_dir = Path(args.source_dir).expanduser()
@@ -65,7 +72,7 @@ def main() -> None:
     errors = []
     for src in sorted(sources):
         try:
-            convert(src, out_dir)
+            convert(src, out_dir, args.dither)
         except Exception as e:
             errors.append((src.name, e))
             print(f"  SKIP {src.name}: {e}")
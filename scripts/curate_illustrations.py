@@ -7,7 +7,7 @@ Reads /tmp/trmnl_illustrations/manifest.json, presents each image in a browser
 UI, and saves accepted images as 800x480 1-bit BMPs to ~/.cache/trmnl/illustration/
 
 Usage:
-    uv run --with fastapi --with uvicorn --with pillow python scripts/curate_illustrations.py
+    uv run python scripts/curate_illustrations.py
 """
 from __future__ import annotations
 
@@ -52,6 +52,7 @@ def _load_manifest() -> None:
 def _convert_and_save(entry: dict) -> str:
     """Convert source image to 800x480 1-bit BMP. Returns output filename."""
     from PIL import Image, ImageOps
+    from trmnl.dither import save_bmp
 
     CACHE_DIR.mkdir(parents=True, exist_ok=True)
     source = Path(entry["local_path"])
@@ -63,8 +64,7 @@ def _convert_and_save(entry: dict) -> str:
 
     image = Image.open(source).convert("RGB")
     image = ImageOps.pad(image, (800, 480), color=(0, 0, 0))
-    bmp = image.convert("1")
-    bmp.save(output_path, format="BMP")
+    save_bmp(image, output_path)
 
     return filename
 
@@ -1,25 +1,47 @@
 # src/trmnl/app.py
 from __future__ import annotations
-from trmnl.config import settings, build_engine_from_config
+from trmnl.config import settings, build_engine_from_config, schedule_config
 from trmnl.logo import print_logo
 from trmnl.carousel import Carousel, TRMNLImage
 from trmnl.engines.router import EngineRouter
 from trmnl.control import router as control_router
-from fastapi import FastAPI, Header, Request
-from fastapi.responses import FileResponse, JSONResponse
+from trmnl.devices import DEFAULT_DEVICE, Device, DeviceLimitError, DeviceManager
+from trmnl.generate import get_browser_pool, get_render_cache
+from trmnl import metrics
+from trmnl.scheduler import Scheduler
+from trmnl.swap import EngineSwapper
+from trmnl.telemetry import TelemetryStore, parse_log_payload
+from trmnl.loop import LoopLagMonitor, shutdown_executor
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response
 from contextlib import asynccontextmanager
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    loop_monitor = LoopLagMonitor()
+    loop_monitor.start()
+    telemetry = TelemetryStore()
+    telemetry.start()
+
     engine, name, sequence = build_engine_from_config()
     logger.info(f"Loaded engine config: engine={name} sequence={sequence}")
 
+    browser_pool = get_browser_pool()
+    try:
+        await browser_pool.start()
+    except Exception as e:
+        logger.error(f"Error launching Chromium, will retry on first render: {e}")
+
     router = EngineRouter(engine, name, sequence)
     carousel = Carousel(engine=router)
+    carousel.start()  # background prefetch of upcoming images
 
     try:
         await carousel.next()  # pre-load first image
@@ -28,10 +50,29 @@ async def lifespan(app: FastAPI):
 
     app.state.router = router
     app.state.carousel = carousel
+    app.state.devices = DeviceManager(
+        Device(DEFAULT_DEVICE, router, carousel, settings.refresh_interval)
+    )
+    app.state.loop_monitor = loop_monitor
+    app.state.telemetry = telemetry
+    app.state.swaps = EngineSwapper()
+
+    scheduled, intervals = schedule_config()
+    app.state.scheduler = Scheduler(app.state.devices, intervals)
+    if scheduled:
+        app.state.scheduler.start()  # advance on the server's clock, not on polls
 
     print_logo()
     yield
 
+    await app.state.swaps.stop()
+    await app.state.scheduler.stop()
+    await app.state.devices.stop()
+    await browser_pool.close()
+    await loop_monitor.stop()
+    await telemetry.stop()
+    shutdown_executor()
+
 
 app = FastAPI(lifespan=lifespan)
 
@@ -39,15 +80,41 @@ app = FastAPI(lifespan=lifespan)
 app.include_router(control_router)
 
 
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # label by route template, not raw path, so image filenames don't explode cardinality
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        metrics.REQUEST_LATENCY.observe(
+            time.perf_counter() - start, method=request.method, route=route, status=str(status)
+        )
+
+
 @app.get("/ping")
 async def ping():
     return {"status": "ok"}
 
 
+async def _device(request: Request, device_id: str | None) -> Device:
+    """The caller's device; the default one if its ID is over the device limit."""
+    try:
+        return await request.app.state.devices.get(device_id)
+    except DeviceLimitError as e:
+        logger.warning(f"{e}; serving it the default device")
+        return request.app.state.devices.default
+
+
 @app.get("/api/setup")
 async def setup(request: Request, id: str = Header(None, alias="ID")):
     base_url = str(request.base_url).rstrip("/")
     logger.info(f"Setup request from device: {id}")
+    await _device(request, id)  # register the device on first contact
     return JSONResponse(
         content={
             "status": 200,
@@ -66,7 +133,8 @@ async def display_config(
     access_token: str = Header(None, alias="Access-Token"),
 ):
     logger.info(f"Display request from device: {id}, token: {access_token}")
-    next_image: TRMNLImage = await request.app.state.carousel.next()
+    device = await _device(request, id)
+    next_image: TRMNLImage = await device.poll()
     return JSONResponse(
         content={
             "status": 0,
@@ -74,28 +142,115 @@ async def display_config(
             "filename": next_image.filename,
             "update_firmware": False,
             "firmware_url": None,
-            "refresh_rate": settings.refresh_interval,
+            "refresh_rate": device.refresh_interval,
             "reset_firmware": False,
         }
     )
 
 
+def _not_modified(request: Request, image: TRMNLImage) -> bool:
+    """Conditional GET check; If-None-Match wins over If-Modified-Since (RFC 9110)."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or image.etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(image.last_modified) <= since
+    return False
+
+
 @app.get("/api/image/{filename}")
-async def serve_image(filename: str):
+async def serve_image(request: Request, filename: str):
     logger.info("Serving image to device.")
-    current_image = await app.state.carousel.current()
-    assert filename == current_image.filename + ".bmp", "Filename mismatch!"
-    return FileResponse(current_image.path, media_type="image/bmp")
+    devices = request.app.state.devices
+    current_image = devices.find_image(Path(filename).stem)
+    if current_image is None and devices.default.carousel.staged is None:
+        try:
+            await devices.default.carousel.current()  # adopt an image left by a previous run
+        except FileNotFoundError:
+            pass
+        current_image = devices.find_image(Path(filename).stem)
+    if current_image is None:
+        raise HTTPException(404, detail=f"Image {filename} is no longer available")
+    if current_image.data is None:
+        return FileResponse(current_image.path, media_type="image/bmp")
+
+    headers = {
+        "ETag": current_image.etag,
+        "Last-Modified": formatdate(current_image.last_modified, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+    if _not_modified(request, current_image):
+        return Response(status_code=304, headers=headers)
+    return Response(content=current_image.data, media_type="image/bmp", headers=headers)
 
 
 @app.post("/api/log")
-async def log_device_stats(request: Request):
+async def log_device_stats(request: Request, id: str = Header(None, alias="ID")):
     logger.info("Received device log.")
-    payload = await request.json()
-    logger.info(f"DEVICE LOG: {payload}")
+    try:
+        payload = await request.json()
+    except ValueError:
+        return JSONResponse(status_code=400, content={"status": "error", "error": "invalid JSON"})
+    samples = parse_log_payload(payload, id)
+    request.app.state.telemetry.submit(samples)
+    logger.debug(f"DEVICE LOG from {id}: {len(samples)} samples")
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+async def prometheus_metrics(request: Request):
+    state = request.app.state
+    cache = get_render_cache().stats()
+    devices = list(state.devices)
+    body = metrics.render(
+        [
+            metrics.sample_lines(
+                "trmnl_render_cache_lookups_total",
+                "Render cache lookups by result.",
+                "counter",
+                [({"result": "hit"}, cache["hits"]), ({"result": "miss"}, cache["misses"])],
+            ),
+            metrics.sample_lines(
+                "trmnl_render_cache_hit_ratio",
+                "Share of render cache lookups that hit.",
+                "gauge",
+                [({}, cache["hit_ratio"])],
+            ),
+            metrics.sample_lines(
+                "trmnl_prefetch_depth",
+                "Source images ready in each device's prefetch queue.",
+                "gauge",
+                [({"device": d.id}, d.carousel.prefetch_status()["depth"]) for d in devices],
+            ),
+            metrics.sample_lines(
+                "trmnl_prefetch_capacity",
+                "Prefetch queue capacity per device.",
+                "gauge",
+                [({"device": d.id}, d.carousel.prefetch_status()["capacity"]) for d in devices],
+            ),
+            metrics.sample_lines(
+                "trmnl_event_loop_stalls_total",
+                "Event loop stalls above the lag threshold.",
+                "counter",
+                [({}, state.loop_monitor.stalls)],
+            ),
+            metrics.sample_lines(
+                "trmnl_scheduled_advances_total",
+                "Carousel advances made by the scheduler.",
+                "counter",
+                [({}, state.scheduler.advanced)],
+            ),
+        ]
+    )
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
 @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
 async def catch_all(request: Request, path: str):
     logger.info(f"CATCH-ALL: {request.method} /{path}")
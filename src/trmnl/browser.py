@@ -0,0 +1,131 @@
+# src/trmnl/browser.py
+from __future__ import annotations
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator
+import asyncio
+import logging
+
+from playwright.async_api import async_playwright
+
+from trmnl.metrics import stage
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, Page, Playwright
+
+logger = logging.getLogger(__name__)
+
+VIEWPORT = {"width": 800, "height": 480}
+HEALTH_CHECK_TIMEOUT = 2.0
+
+
+class BrowserPool:
+    """
+    Long-lived Chromium process with a bounded pool of reusable pages.
+
+    - the browser is launched once (start() or first use) and kept warm
+    - at most `size` pages are checked out at any time
+    - idle pages are health-checked before reuse; broken ones are discarded
+    - if Chromium crashes or disconnects, the next borrower relaunches it
+    """
+
+    def __init__(self, size: int = 2, viewport: dict[str, int] | None = None):
+        if size < 1:
+            raise ValueError("BrowserPool size must be at least 1")
+        self.size = size
+        self.viewport = viewport or dict(VIEWPORT)
+        self.launches = 0
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self._playwright: Playwright | None = None
+        self._browser: Browser | None = None
+        self._idle: list[Page] = []
+        self._slots = asyncio.Semaphore(size)
+        self._launch_lock = asyncio.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    async def start(self) -> None:
+        """Launch Chromium eagerly so the first render doesn't pay the cold start."""
+        await self._ensure_browser()
+
+    async def close(self) -> None:
+        async with self._launch_lock:
+            await self._teardown()
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+        logger.info("Browser pool closed")
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """
+        Borrow a warm page. It goes back to the pool on success and is
+        discarded if the caller raised, since its state is unknown.
+        """
+        async with self._slots:
+            page = await self._acquire()
+            try:
+                yield page
+            except BaseException:
+                await self._discard(page)
+                raise
+            else:
+                if page.is_closed():
+                    return
+                self._idle.append(page)
+
+    async def _acquire(self) -> Page:
+        await self._ensure_browser()
+        while self._idle:
+            page = self._idle.pop()
+            if await self._healthy(page):
+                return page
+            logger.warning("Discarding unhealthy browser page")
+            await self._discard(page)
+        assert self._browser is not None
+        return await self._browser.new_page(viewport=self.viewport)
+
+    async def _healthy(self, page: Page) -> bool:
+        if page.is_closed() or not self.is_running:
+            return False
+        try:
+            await asyncio.wait_for(page.evaluate("1"), timeout=HEALTH_CHECK_TIMEOUT)
+        except Exception:
+            return False
+        return True
+
+    async def _discard(self, page: Page) -> None:
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+    async def _ensure_browser(self) -> None:
+        if self.is_running:
+            return
+        async with self._launch_lock:
+            if self.is_running:
+                return
+            if self._browser is not None:
+                logger.warning("Chromium is no longer connected, relaunching")
+            await self._teardown()
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            with stage("browser.launch"):
+                self._browser = await self._playwright.chromium.launch()
+            self.loop = asyncio.get_running_loop()
+            self.launches += 1
+            logger.info(f"Chromium launched (launch #{self.launches}, pool size {self.size})")
+
+    async def _teardown(self) -> None:
+        """Drop idle pages and the browser handle. Caller holds _launch_lock."""
+        idle, self._idle = self._idle, []
+        for page in idle:
+            await self._discard(page)
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
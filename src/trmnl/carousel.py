@@ -1,8 +1,25 @@
 from trmnl.config import settings
+from trmnl.loop import SingleFlight, run_blocking
+from trmnl.metrics import stage
+from collections import OrderedDict
 from typing import Protocol
 from pathlib import Path
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import time
 import uuid
 
+logger = logging.getLogger(__name__)
+
+# Seconds the prefetch task waits before retrying after the engine raised.
+PREFETCH_RETRY_DELAY = 5.0
+# Recently staged images kept servable, so a URL handed out just before an
+# advance still resolves.
+RECENT_IMAGES = 4
+
 
 class ImageEngine(Protocol):
     """
@@ -17,68 +34,220 @@ class ImageEngine(Protocol):
 
 class TRMNLImage:
     """
-    Represents an image for TRMNL with its URL and filename.
+    Represents an image for TRMNL with its URL and filename. When the carousel
+    stages an image it also keeps the bytes, so the image route can answer
+    straight from memory.
     """
 
-    def __init__(self, path: Path):
+    def __init__(self, path: Path, data: bytes | None = None, mtime: float | None = None):
         self.path = path
         self.filename = path.stem
         self.image_url = f"{settings.server_url}/api/image/{self.path.name}"
+        self.data = data
+        self.etag = f'"{hashlib.sha256(data).hexdigest()}"' if data is not None else None
+        self.last_modified = mtime if mtime is not None else time.time()
 
 
 class Carousel:
     """
-    Manages the TRMNL working directory:
+    Manages the image currently on display:
 
-    - ensures only one BMP in working_dir
-    - copies the next source image into working_dir
-    - uses a unique filename each time
+    - the current image is an in-memory record (path, bytes, ETag), swapped
+      atomically on next(), so current() never touches the filesystem
+    - keeps the last `history` staged images in a ring buffer keyed by
+      filename, so recently issued URLs stay servable in O(1)
+    - optionally mirrors them into working_dir under unique filenames, staged
+      as hardlinks to the source (or copies where linking isn't possible);
+      files are removed by name as they fall out of the ring, no glob-and-sort
+    - advances are single-flight: concurrent next() calls share one result
+    - once started, keeps up to prefetch_depth source images ready in a queue,
+      filled by a background task, so next() never waits on the engine
+      unless the queue has run dry
     """
 
     def __init__(
         self,
         engine: ImageEngine,
-        working_dir: Path = settings.paths["CURRENT_IMAGE_DIR"],
+        working_dir: Path | None = settings.paths["CURRENT_IMAGE_DIR"],
+        prefetch_depth: int = settings.prefetch_depth,
+        history: int = RECENT_IMAGES,
     ):
         self.engine: ImageEngine = engine
-        self.working_dir: Path = working_dir
+        self.working_dir: Path | None = working_dir
+        self.prefetch_depth: int = prefetch_depth
+        # Items are ready source paths, or the exception the engine raised,
+        # which next() re-raises so errors still reach the caller. An error is
+        # only queued when no image is, and at most one: each new failure
+        # replaces it, and a recovered engine drops it.
+        self._buffer: asyncio.Queue[Path | Exception] = asyncio.Queue(
+            maxsize=max(prefetch_depth, 1)
+        )
+        self._error_queued = False
+        self._filler: asyncio.Task | None = None
+        self._current: TRMNLImage | None = None
+        self.history: int = max(history, 1)
+        self._recent: OrderedDict[str, TRMNLImage] = OrderedDict()
+        self._advance: SingleFlight[TRMNLImage] = SingleFlight()
+        self._swept = False  # leftovers from a previous run cleared
+        if add_listener := getattr(engine, "add_switch_listener", None):
+            add_listener(self._on_engine_switch)
+
+    @property
+    def prefetching(self) -> bool:
+        return self._filler is not None and not self._filler.done()
+
+    def prefetch_status(self) -> dict[str, int | bool]:
+        return {
+            "enabled": self.prefetching,
+            "depth": self._buffer.qsize(),
+            "capacity": self.prefetch_depth,
+        }
+
+    def start(self) -> None:
+        """Start the background prefetch task (no-op when prefetch_depth is 0)."""
+        if self.prefetch_depth > 0 and not self.prefetching:
+            self._filler = asyncio.create_task(self._fill_loop())
+
+    async def stop(self) -> None:
+        if self._filler is not None:
+            self._filler.cancel()
+            try:
+                await self._filler
+            except asyncio.CancelledError:
+                pass
+            self._filler = None
 
     async def current(self) -> TRMNLImage:
         """Get the current available image to be displayed."""
-        await self._ensure_single_image()
-        bmp_files = list(self.working_dir.glob("*.bmp"))
-        if not bmp_files:
-            raise FileNotFoundError("No BMP file found in directory.")
-        return TRMNLImage(bmp_files[0])
+        if self._current is None:
+            # nothing staged by this process yet; adopt what a previous run left
+            self._remember(await run_blocking(self._recover))
+        return self._current
+
+    @property
+    def staged(self) -> TRMNLImage | None:
+        """The current image if one has been staged or recovered, without touching disk."""
+        return self._current
+
+    def lookup(self, filename: str) -> TRMNLImage | None:
+        """A recently staged image by filename (without .bmp), if still in the ring."""
+        return self._recent.get(filename)
 
     async def next(self) -> TRMNLImage:
         """
-        Advance to the next image to be displayed and return the Path to the app.
+        Advance to the next image to be displayed and return it to the app.
+        Callers arriving while an advance is in flight get that same image.
         """
-        await self._ensure_single_image()  # clean up any old images
+        return await self._advance.run(self._next)
 
-        # ask the injected generator for the next source image
-        src = await self.engine.next()
-        self._validate_image_path(src)
+    async def _next(self) -> TRMNLImage:
+        # take the next source image from the prefetch queue, or ask the
+        # injected generator directly when prefetching isn't running
+        with stage("carousel.take"):
+            src = await self._take()
 
-        # Create unique filename in working_dir
-        unique_filename = f"{uuid.uuid4()}.bmp"
-        dest = settings.paths["CURRENT_IMAGE_DIR"] / unique_filename
+        name = f"{uuid.uuid4()}.bmp"
+        if self.working_dir is None:
+            path = Path(name)
+            data = await run_blocking(src.read_bytes)
+        else:
+            path = self.working_dir / name
+            with stage("carousel.stage"):
+                data = await run_blocking(self._stage, src, path)
+
+        image = TRMNLImage(path, data=data, mtime=time.time())
+        evicted = self._remember(image)
+        await run_blocking(self._retire, evicted, set(self._recent))
+        return image
+
+    def _remember(self, image: TRMNLImage) -> list[TRMNLImage]:
+        """Make image current and push it into the ring; returns what fell out."""
+        self._current = image
+        self._recent[image.filename] = image
+        evicted = []
+        while len(self._recent) > self.history:
+            evicted.append(self._recent.popitem(last=False)[1])
+        return evicted
+
+    @staticmethod
+    def _stage(src: Path, dest: Path) -> bytes:
+        """
+        Hardlink src into the working dir; engines replace their files
+        atomically, so the link keeps pointing at the bytes we served.
+        Across filesystems, fall back to copyfile (copy_file_range, which
+        reflinks on CoW filesystems).
+        """
+        data = src.read_bytes()
+        try:
+            os.link(src, dest)
+        except OSError:
+            shutil.copyfile(src, dest)
+        return data
+
+    def _retire(self, evicted: list[TRMNLImage], keep: set[str]) -> None:
+        """Remove files that fell out of the ring, and on first use anything left from a previous run."""
+        if self.working_dir is None:
+            return
+        for image in evicted:
+            (self.working_dir / image.path.name).unlink(missing_ok=True)
+        if not self._swept:
+            self._swept = True
+            for stale in self.working_dir.glob("*.bmp"):
+                if stale.stem not in keep:
+                    stale.unlink(missing_ok=True)
+
+    def _recover(self) -> TRMNLImage:
+        bmp_files = list(self.working_dir.glob("*.bmp")) if self.working_dir else []
+        if not bmp_files:
+            raise FileNotFoundError("No BMP file found in directory.")
+        latest = max(bmp_files, key=lambda x: x.stat().st_mtime)
+        return TRMNLImage(latest, data=latest.read_bytes(), mtime=latest.stat().st_mtime)
 
-        with src.open("rb") as f_in, dest.open("wb") as f_out:
-            _ = f_out.write(f_in.read())
+    async def _take(self) -> Path:
+        if not self.prefetching and self._buffer.empty():
+            src = await self.engine.next()
+            self._validate_image_path(src)
+            return src
+        item = await self._buffer.get()
+        if isinstance(item, Exception):
+            raise item
+        return item
 
-        await self._ensure_single_image()  # clean up any old images
+    async def _fill_loop(self) -> None:
+        while True:
+            try:
+                src = await self.engine.next()
+                self._validate_image_path(src)
+            except Exception as e:
+                logger.error(f"Prefetch failed: {e}")
+                self._drop_queued_error()
+                if self._buffer.empty():
+                    self._buffer.put_nowait(e)
+                    self._error_queued = True
+                await asyncio.sleep(PREFETCH_RETRY_DELAY)
+                continue
+            self._drop_queued_error()
+            await self._buffer.put(src)
+            logger.debug(f"Prefetched {src.name} ({self._buffer.qsize()}/{self.prefetch_depth})")
 
-        assert dest.exists(), "Failed to copy image to working directory."
-        return TRMNLImage(dest)
+    def _drop_queued_error(self) -> None:
+        """Remove a queued error nobody has taken yet (it is the only item then)."""
+        if self._error_queued and not self._buffer.empty():
+            self._buffer.get_nowait()
+        self._error_queued = False
 
-    async def _ensure_single_image(self) -> None:
-        bmp_files = list(self.working_dir.glob("*.bmp"))
-        if len(bmp_files) > 1:
-            bmp_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-            for file in bmp_files[1:]:
-                file.unlink()
+    def _on_engine_switch(self) -> None:
+        """Drop images prefetched from the old engine and refill from the new one."""
+        was_running = self.prefetching
+        if self._filler is not None:
+            self._filler.cancel()
+            self._filler = None
+        while not self._buffer.empty():
+            self._buffer.get_nowait()
+        self._error_queued = False
+        if was_running:
+            self.start()
+        logger.info("Carousel prefetch buffer flushed after engine switch")
 
     def _validate_image_path(self, path: Path) -> None:
         """
@@ -86,7 +255,7 @@ class Carousel:
         """
         if path.suffix.lower() != ".bmp":
             raise ValueError("Image must be a BMP file.")
-        if path.parent == settings.paths["CURRENT_IMAGE_DIR"]:
+        if path.parent == self.working_dir:
             raise ValueError("Source image cannot be in the working directory.")
 
 
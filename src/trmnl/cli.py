@@ -7,6 +7,9 @@ import sys
 import httpx
 
 TRMNL_PORT = 8070
+# Seconds the server may spend on an engine swap before answering with a job;
+# kept under the client's own timeout.
+SWAP_WAIT = 4
 
 
 def _resolve_server_url() -> str:
@@ -51,6 +54,14 @@ def cmd_status(_args: argparse.Namespace) -> None:
     if data.get("sequence"):
         print(f"Sequence:    {' -> '.join(data['sequence'])}")
     print(f"Last served: {data['last_served'] or '(none)'}")
+    if prefetch := data.get("prefetch"):
+        print(f"Prefetched:  {prefetch['depth']}/{prefetch['capacity']}")
+    if loop := data.get("loop"):
+        print(f"Loop stalls: {loop['stalls']} (max {loop['max_lag_ms']} ms)")
+    if cache := data.get("render_cache"):
+        print(f"Render cache: {cache['hits']} hits, {cache['misses']} misses")
+    for device_id, device in data.get("devices", {}).items():
+        print(f"Device {device_id}: {device['engine']} every {device['refresh_interval']}s")
 
 
 def cmd_list(_args: argparse.Namespace) -> None:
@@ -70,30 +81,84 @@ def cmd_engine(args: argparse.Namespace) -> None:
             body["sequence"] = args.sequence
         else:
             body["sequence"] = _get("/api/control/engines")["engines"]
-    data = _post("/api/control/engine", body)
-    print(f"OK -- engine: {data['engine']}")
+        if args.weight:
+            body["weights"] = {k: int(v) for k, v in (item.split("=", 1) for item in args.weight)}
+    if args.device:
+        body["device"] = args.device
+    if args.refresh_interval:
+        body["refresh_interval"] = args.refresh_interval
+    data = _post(f"/api/control/engine?timeout={SWAP_WAIT}", body)
+    if _pending(data):
+        return
+    print(f"OK -- engine: {data['engine']}" + (f" (device {data['device']})" if data.get("device") else ""))
     if data.get("sequence"):
         print(f"Sequence: {' -> '.join(data['sequence'])}")
 
 
-def cmd_next(_args: argparse.Namespace) -> None:
-    data = _post("/api/control/next", {})
-    print(f"Advanced -- next image: {data['image']}")
+def cmd_next(args: argparse.Namespace) -> None:
+    path = f"/api/control/next?device={args.device}" if args.device else "/api/control/next"
+    data = _post(path, {})
+    for device, image in data.get("devices", {"": data["image"]}).items():
+        print(f"Advanced{f' {device}' if device else ''} -- next image: {image}")
+
 
+def cmd_schedule(args: argparse.Namespace) -> None:
+    body: dict = {}
+    if args.state:
+        body["enabled"] = args.state == "on"
+    if args.interval:
+        body["intervals"] = {k: int(v) for k, v in (item.split("=", 1) for item in args.interval)}
+    data = _post("/api/control/schedule", body) if body else _get("/api/control/schedule")
+    print(f"Scheduler: {'on' if data['enabled'] else 'off'} ({data['advanced']} advances)")
+    for engine, seconds in data["intervals"].items():
+        print(f"  {engine}: every {seconds}s")
 
-def cmd_reload(_args: argparse.Namespace) -> None:
-    data = _post("/api/control/reload", {})
+
+def cmd_reload(args: argparse.Namespace) -> None:
+    fresh = "&fresh=true" if args.fresh else ""
+    data = _post(f"/api/control/reload?timeout={SWAP_WAIT}{fresh}", {})
+    if _pending(data):
+        return
     print(f"Reloaded -- engine: {data['engine']}")
 
 
+def cmd_jobs(_args: argparse.Namespace) -> None:
+    for job in _get("/api/control/jobs")["jobs"]:
+        error = f" -- {job['error']}" if job["error"] else ""
+        print(f"{job['id']}  {job['kind']:<7} {job['state']}{error}")
+
+
+def _pending(data: dict) -> bool:
+    """True (after saying so) if the server is still building the new engine."""
+    if not data.get("pending"):
+        return False
+    job = data["job"]
+    print(f"Still {job['state']} -- the swap will apply when ready (job {job['id']}, see `trmnl-ctl jobs`)")
+    return True
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(prog="trmnl-ctl", description="TRMNL remote control")
     sub = parser.add_subparsers(dest="command", required=True)
 
     sub.add_parser("status", help="Show current engine and last served image")
     sub.add_parser("list", help="List available engines")
-    sub.add_parser("next", help="Force carousel to advance")
-    sub.add_parser("reload", help="Re-read config.yaml and apply without restart")
+    p_next = sub.add_parser("next", help="Force carousel to advance (all devices by default)")
+    p_next.add_argument("--device", help="Only advance this device ID")
+    p_reload = sub.add_parser("reload", help="Re-read config.yaml and apply without restart")
+    p_reload.add_argument(
+        "--fresh", action="store_true", help="Rebuild engines instead of reusing cached ones"
+    )
+    sub.add_parser("jobs", help="Show recent engine swap jobs")
+
+    p_schedule = sub.add_parser("schedule", help="Show or control server-side advancing")
+    p_schedule.add_argument("state", nargs="?", choices=["on", "off"], default=None)
+    p_schedule.add_argument(
+        "--interval",
+        nargs="+",
+        metavar="ENGINE=SECONDS",
+        help="Per-engine intervals, e.g. --interval poem=600 fantasy=120",
+    )
 
     p_engine = sub.add_parser("engine", help="Switch active engine (no arg = list engines)")
     p_engine.add_argument("name", nargs="?", default=None, help="Engine name: poem, fantasy, or mix")
@@ -103,6 +168,14 @@ def main() -> None:
         metavar="ENGINE",
         help="Ordered sequence for mix mode, e.g. --sequence poem poem fantasy",
     )
+    p_engine.add_argument(
+        "--weight",
+        nargs="+",
+        metavar="ENGINE=WEIGHT",
+        help="Mix weights, e.g. --weight poem=2 fantasy=1",
+    )
+    p_engine.add_argument("--device", help="Switch only this device ID")
+    p_engine.add_argument("--refresh-interval", type=int, help="Poll interval for --device, in seconds")
 
     if len(sys.argv) == 1:
         parser.print_help()
@@ -115,6 +188,8 @@ def main() -> None:
         "engine": cmd_engine,
         "next": cmd_next,
         "reload": cmd_reload,
+        "jobs": cmd_jobs,
+        "schedule": cmd_schedule,
     }[args.command](args)
 
 
@@ -7,7 +7,7 @@ from typing import TYPE_CHECKING
 import logging
 import yaml
 
-from trmnl.engines.registry import get_engine_registry
+from trmnl.engines.registry import get_engine_cache, get_engine_registry
 
 if TYPE_CHECKING:
     from trmnl.carousel import ImageEngine
@@ -30,59 +30,135 @@ class Settings:
     refresh_interval: int
     server_ip: str
     port: int
+    prefetch_depth: int
 
     @property
     def server_url(self) -> str:
         return f"http://{self.server_ip}:{self.port}"
 
 
-def build_engine_from_config() -> tuple[ImageEngine, str, list[str]]:
-    """
-    Reads ~/.config/trmnl/config.yaml and returns (engine, name, sequence).
-    Falls back to default mix on any error — never raises.
-    """
-    registry = get_engine_registry()
+_EXTRA_KEYS = ("artist", "artists", "backend", "dither", "layout", "weights")
+# The extra keys each engine's constructor accepts; the rest are not its concern.
+_ENGINE_OPTIONS: dict[str, tuple[str, ...]] = {
+    "poem": ("backend", "dither", "layout"),
+    "illustration": ("artist", "artists", "device"),
+}
 
-    name = _DEFAULT_ENGINE
-    sequence = list(_DEFAULT_SEQUENCE)
 
-    extra: dict = {}
+def read_config() -> dict:
+    """The parsed config.yaml, or {} if it is missing or unparseable."""
     try:
         if CONFIG_FILE.exists():
             with CONFIG_FILE.open() as f:
                 data = yaml.safe_load(f) or {}
-            name = data.get("engine", _DEFAULT_ENGINE)
-            sequence = data.get("sequence", list(_DEFAULT_SEQUENCE))
-            if data.get("artist"):
-                extra["artist"] = data["artist"]
-            if data.get("artists"):
-                extra["artists"] = data["artists"]
+            if isinstance(data, dict):
+                return data
+            logger.warning("config.yaml is not a mapping, ignoring it")
     except Exception as e:
-        logger.warning(f"config.yaml missing/unparseable ({e}), defaulting to mix")
-        name = _DEFAULT_ENGINE
-        sequence = list(_DEFAULT_SEQUENCE)
+        logger.warning(f"config.yaml unparseable ({e}), defaulting to mix")
+    return {}
+
+
+def device_config(device_id: str, data: dict | None = None) -> dict:
+    """The `devices: {<id>: ...}` section for one device, or {} if it has none."""
+    data = read_config() if data is None else data
+    section = (data.get("devices") or {}).get(device_id)
+    return section if isinstance(section, dict) else {}
+
+
+def device_refresh_interval(device_id: str | None, data: dict | None = None) -> int:
+    if device_id is None:
+        return settings.refresh_interval
+    section = device_config(device_id, data)
+    return int(section.get("refresh_interval", settings.refresh_interval))
+
+
+def schedule_config(data: dict | None = None) -> tuple[bool, dict[str, int]]:
+    """
+    The `schedule:` section as (enabled, per-engine intervals in seconds).
+    Engines without an interval advance every device refresh interval.
+    """
+    data = read_config() if data is None else data
+    section = data.get("schedule") or {}
+    if not isinstance(section, dict):
+        return False, {}
+    intervals = {str(k): int(v) for k, v in (section.get("intervals") or {}).items()}
+    return bool(section.get("enabled", False)), intervals
+
+
+def build_engine_from_config(device_id: str | None = None) -> tuple[ImageEngine, str, list[str]]:
+    """
+    Reads ~/.config/trmnl/config.yaml and returns (engine, name, sequence).
+    With a device_id, that device's `devices:` section is used when it names
+    an engine; otherwise the device follows the top-level engine.
+    Falls back to default mix on any error — never raises.
+    Engines come from the engine cache, scoped to the device.
+    """
+    registry = get_engine_registry()
+
+    data = read_config()
+    if device_id is not None and "engine" in device_config(device_id, data):
+        data = device_config(device_id, data)
+
+    name = data.get("engine", _DEFAULT_ENGINE)
+    sequence = data.get("sequence", list(_DEFAULT_SEQUENCE))
+    extra = {key: data[key] for key in _EXTRA_KEYS if data.get(key)}
 
     if name != "mix" and name not in registry:
         logger.warning(f"Unknown engine '{name}' in config, defaulting to mix")
         name = _DEFAULT_ENGINE
         sequence = list(_DEFAULT_SEQUENCE)
+        extra = {}
+
+    try:
+        return _instantiate_engine(name, sequence, registry, extra=extra, scope=device_id)
+    except Exception as e:
+        logger.error(f"Could not build engine '{name}' from config ({e}), defaulting to mix")
+        return _instantiate_engine(_DEFAULT_ENGINE, list(_DEFAULT_SEQUENCE), registry, scope=device_id)
 
-    return _instantiate_engine(name, sequence, registry, extra=extra)
+
+def _engine_options(name: str, extra: dict) -> dict:
+    return {key: extra[key] for key in _ENGINE_OPTIONS.get(name, ()) if key in extra}
 
 
 def _instantiate_engine(
-    name: str, sequence: list[str], registry: dict[str, type], extra: dict | None = None
+    name: str,
+    sequence: list[str],
+    registry: dict[str, type],
+    extra: dict | None = None,
+    scope: str | None = None,
 ) -> tuple[ImageEngine, str, list[str]]:
-    extra = extra or {}
+    """
+    Build (or reuse from the engine cache) an engine; scope is the device ID,
+    None for top-level. Each engine, mix members included, gets only the
+    extra options it accepts.
+    """
+    extra = dict(extra or {})
+    weights = extra.pop("weights", None)  # only meaningful for mix
+    if scope is not None:
+        extra["device"] = scope  # for engines that keep per-device state on disk
+    cache = get_engine_cache()
     if name == "mix":
         from trmnl.engines.router import MixEngine
-        valid = [s for s in sequence if s in registry]
-        if not valid:
-            valid = list(registry.keys())
-        engines = [registry[s]() for s in valid]
-        return MixEngine(engines), "mix", valid
+        valid = MixEngine.resolve_sequence(sequence, registry)
+        members = {member: registry[member] for member in valid}
+        engine = cache.get(
+            scope,
+            "mix",
+            MixEngine,
+            {"sequence": valid, "weights": weights, "members": members, "options": extra},
+            factory=lambda: MixEngine.from_sequence(
+                valid,
+                registry,
+                weights,
+                build=lambda member: cache.get(
+                    scope, member, registry[member], _engine_options(member, extra)
+                ),
+            )[0],
+        )
+        return engine, "mix", valid
     else:
-        return registry[name](**extra), name, []
+        return cache.get(scope, name, registry[name], _engine_options(name, extra)), name, []
 
 
 def load_settings() -> Settings:
@@ -94,6 +170,7 @@ def load_settings() -> Settings:
         refresh_interval=60,
         server_ip="10.0.0.82",
         port=8070,
+        prefetch_depth=2,
     )
 
 
@@ -1,24 +1,64 @@
 # src/trmnl/control.py
 from __future__ import annotations
+from functools import partial
 from pathlib import Path
 from pydantic import BaseModel
 from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import JSONResponse
 import yaml
 import logging
+import threading
+import time
 
-from trmnl.config import CONFIG_FILE
-from trmnl.engines.registry import get_engine_registry
+from trmnl.config import (
+    CONFIG_FILE,
+    device_config,
+    device_refresh_interval,
+    read_config,
+    schedule_config,
+    _instantiate_engine,
+)
+from trmnl.devices import DEFAULT_DEVICE, Device, DeviceLimitError, DeviceManager
+from trmnl.dither import DITHER_METHODS
+from trmnl.engines.registry import get_engine_cache, get_engine_registry
 from trmnl.engines.router import EngineRouter, MixEngine
+from trmnl.generate import get_render_cache
+from trmnl.loop import run_blocking
+from trmnl.scheduler import Scheduler
+from trmnl.swap import EngineSwapper, SwapJob, build_all
+from trmnl.telemetry import METRICS
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/control")
 
+# config.yaml sections that a top-level engine switch leaves alone
+_PRESERVED_SECTIONS = ("devices", "schedule")
+
+# config.yaml is read-modified-written in the executor; one writer at a time
+_config_lock = threading.Lock()
+
+# How long /engine and /reload wait for a swap before answering 202 with the job.
+SWAP_WAIT = 30.0
+
 
 class EngineRequest(BaseModel):
     engine: str
     sequence: list[str] | None = None
     artist: str | None = None
     artists: list[str] | None = None
+    backend: str | None = None
+    dither: str | None = None
+    layout: str | None = None
+    weights: dict[str, int] | None = None
+    # target one device (by its ID header) instead of the top-level engine
+    device: str | None = None
+    refresh_interval: int | None = None
+
+
+class ScheduleRequest(BaseModel):
+    enabled: bool | None = None
+    # seconds per engine name; replaces the current intervals when given
+    intervals: dict[str, int] | None = None
 
 
 @router.get("/status")
@@ -26,11 +66,20 @@ async def status(request: Request):
     eng_router: EngineRouter = request.app.state.router
     last = eng_router.last_served.name if eng_router.last_served else None
     logger.info("Control: GET /status")
-    return {
+    result = {
         "engine": eng_router.active_name,
         "sequence": eng_router.active_sequence,
         "last_served": last,
+        "render_cache": get_render_cache().stats(),
+        "prefetch": request.app.state.carousel.prefetch_status(),
+        "loop": request.app.state.loop_monitor.stats(),
+        "devices": {device.id: device.status() for device in request.app.state.devices},
+        "scheduler": request.app.state.scheduler.status(),
+        "engine_cache": get_engine_cache().stats(),
     }
+    if isinstance(eng_router.active_engine, MixEngine):
+        result["mix"] = eng_router.active_engine.status()
+    return result
 
 
 @router.get("/engines")
@@ -40,7 +89,14 @@ async def list_engines():
 
 
 @router.post("/engine")
-async def set_engine(request: Request, body: EngineRequest):
+async def set_engine(
+    request: Request, body: EngineRequest, wait: bool = True, timeout: float = SWAP_WAIT
+):
+    """
+    Build and warm the new engine off the request path, then swap it in.
+    Waits up to `timeout` for the swap; otherwise (or with wait=false)
+    answers 202 with a job to poll at /jobs/{id}.
+    """
     registry = get_engine_registry()
 
     if body.engine != "mix" and body.engine not in registry:
@@ -53,54 +109,258 @@ async def set_engine(request: Request, body: EngineRequest):
         extra["artist"] = body.artist
     if body.artists:
         extra["artists"] = body.artists
-    engine_obj, name, resolved_seq = _build(body.engine, sequence, registry, extra=extra)
+    if body.backend:
+        extra["backend"] = body.backend
+    if body.dither:
+        if body.dither not in DITHER_METHODS:
+            valid = ", ".join(DITHER_METHODS)
+            raise HTTPException(400, detail=f"Unknown dither method '{body.dither}'. Valid methods: {valid}")
+        extra["dither"] = body.dither
+    if body.layout:
+        extra["layout"] = body.layout
+    if body.weights:
+        if any(w < 1 for w in body.weights.values()):
+            raise HTTPException(400, detail="Mix weights must be positive integers")
+        extra["weights"] = body.weights
+    devices: DeviceManager = request.app.state.devices
 
-    eng_router: EngineRouter = request.app.state.router
-    eng_router.set_engine(engine_obj, name, resolved_seq)
+    def build_for(device: Device):
+        scope = None if device is devices.default else device.id
+        return partial(_build, body.engine, sequence, registry, extra=extra, scope=scope)
+
+    in_use = partial(_is_active, devices)
+
+    # the default device follows the top-level engine, so it is set there
+    if body.device and body.device != DEFAULT_DEVICE:
+
+        async def swap_device(job: SwapJob) -> dict:
+            # a first-seen device is created here too, off the request path
+            device = await devices.get(body.device)
+            [(engine_obj, name, resolved_seq, primed)] = await build_all(
+                job, [build_for(device)], in_use, [device.router.active_engine]
+            )
+            _swap(device, engine_obj, name, resolved_seq, primed)
+            device.follows_default = False
+            if body.refresh_interval:
+                device.refresh_interval = body.refresh_interval
+                extra["refresh_interval"] = body.refresh_interval
+            await run_blocking(_write_config, name, resolved_seq, extra=extra, device=device.id)
+            logger.info(f"Control: POST /engine [{device.id}] -> {name} {resolved_seq} {extra}")
+            return {"device": device.id, "engine": name, "sequence": resolved_seq, **extra}
+
+        job = request.app.state.swaps.submit("engine", swap_device)
+        return await _job_response(request.app.state.swaps, job, wait, timeout)
+
+    async def swap_default(job: SwapJob) -> dict:
+        # each device following the top-level config gets its own engine
+        # instance, since rotation state is per device
+        targets = [device for device in devices if device.follows_default]
+        built = await build_all(
+            job,
+            [build_for(device) for device in targets],
+            in_use,
+            [device.router.active_engine for device in targets],
+        )
+        for device, (engine_obj, name, resolved_seq, primed) in zip(targets, built):
+            _swap(device, engine_obj, name, resolved_seq, primed)
+        # the default device always follows the top-level engine
+        _, name, resolved_seq, _ = built[0]
+        await run_blocking(_write_config, name, resolved_seq, extra=extra)
+        logger.info(f"Control: POST /engine -> {name} {resolved_seq} {extra}")
+        return {"engine": name, "sequence": resolved_seq, **extra}
 
-    _write_config(name, resolved_seq, extra=extra)
-    logger.info(f"Control: POST /engine -> {name} {resolved_seq} {extra}")
-    return {"ok": True, "engine": name, "sequence": resolved_seq, **extra}
+    job = request.app.state.swaps.submit("engine", swap_default)
+    return await _job_response(request.app.state.swaps, job, wait, timeout)
+
+
+@router.get("/jobs")
+async def list_jobs(request: Request):
+    return {"jobs": [job.status() for job in request.app.state.swaps.jobs()]}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(request: Request, job_id: str):
+    job = request.app.state.swaps.get(job_id)
+    if job is None:
+        raise HTTPException(404, detail=f"Unknown job '{job_id}'")
+    return {**job.status(), "result": job.result}
 
 
 @router.post("/next")
-async def advance_next(request: Request):
-    carousel = request.app.state.carousel
-    image = await carousel.next()
-    logger.info(f"Control: POST /next -> {image.filename}")
-    return {"ok": True, "image": image.filename + ".bmp"}
+async def advance_next(request: Request, device: str | None = None):
+    """Advance one device's carousel, or every known device's when none is given."""
+    devices: DeviceManager = request.app.state.devices
+    targets: list[Device] = [await _get_device(devices, device)] if device else list(devices)
+    images = {target.id: (await target.carousel.next()).filename + ".bmp" for target in targets}
+    logger.info(f"Control: POST /next -> {images}")
+    return {"ok": True, "image": images[targets[0].id], "devices": images}
+
+
+@router.get("/schedule")
+async def get_schedule(request: Request):
+    logger.info("Control: GET /schedule")
+    return request.app.state.scheduler.status()
+
+
+@router.post("/schedule")
+async def set_schedule(request: Request, body: ScheduleRequest):
+    scheduler: Scheduler = request.app.state.scheduler
+    if body.intervals is not None:
+        if any(seconds < 1 for seconds in body.intervals.values()):
+            raise HTTPException(400, detail="Schedule intervals must be at least 1 second")
+        scheduler.intervals = dict(body.intervals)
+    if body.enabled is True:
+        scheduler.start()
+    elif body.enabled is False:
+        await scheduler.stop()
+
+    await run_blocking(_write_schedule, scheduler.running, scheduler.intervals)
+    logger.info(f"Control: POST /schedule -> enabled={scheduler.running} {scheduler.intervals}")
+    return {"ok": True, **scheduler.status()}
+
+
+@router.get("/telemetry")
+async def telemetry(
+    request: Request,
+    device: str | None = None,
+    metric: str | None = None,
+    hours: float = 24.0,
+    resolution: str = "raw",
+):
+    """Device telemetry trends from /api/log over the last `hours`."""
+    if metric is not None and metric not in METRICS:
+        raise HTTPException(400, detail=f"Unknown metric '{metric}'. Valid metrics: {', '.join(METRICS)}")
+    if resolution not in ("raw", "hourly"):
+        raise HTTPException(400, detail="resolution must be 'raw' or 'hourly'")
+    store = request.app.state.telemetry
+    store.flush()  # include samples still queued from the last few requests
+    since = time.time() - hours * 3600
+    logger.info(f"Control: GET /telemetry device={device} metric={metric}")
+    return {
+        "resolution": resolution,
+        "since": since,
+        "dropped": store.dropped,
+        "evicted_devices": store.evicted_devices,
+        "devices": store.query(device, metric, since, resolution),
+    }
 
 
 @router.post("/reload")
-async def reload_config(request: Request):
+async def reload_config(
+    request: Request, wait: bool = True, timeout: float = SWAP_WAIT, fresh: bool = False
+):
+    """Re-apply config.yaml; with fresh=true, cached engines are rebuilt rather than reused."""
     from trmnl.config import build_engine_from_config
-    try:
-        engine_obj, name, sequence = build_engine_from_config()
-    except Exception as e:
-        raise HTTPException(500, detail=f"Failed to reload config: {e}")
+    devices: DeviceManager = request.app.state.devices
+
+    async def reload(job: SwapJob) -> dict:
+        if fresh:
+            get_engine_cache().invalidate()
+        data = await run_blocking(read_config)
+        targets = list(devices)
+
+        def build_for(device: Device):
+            device_id = None if device is devices.default else device.id
+
+            def build():
+                try:
+                    return build_engine_from_config(device_id)
+                except Exception as e:
+                    where = "" if device_id is None else f" for {device_id}"
+                    raise RuntimeError(f"Failed to reload config{where}: {e}") from e
+
+            return build
+
+        in_use = partial(_is_active, devices)
+        # nothing is swapped unless every device's engine built
+        built = await build_all(
+            job,
+            [build_for(device) for device in targets],
+            in_use,
+            [device.router.active_engine for device in targets],
+        )
+        for device, (engine_obj, name, sequence, primed) in zip(targets, built):
+            _swap(device, engine_obj, name, sequence, primed)
+            if device is not devices.default:
+                device.follows_default = "engine" not in device_config(device.id, data)
+                device.refresh_interval = device_refresh_interval(device.id, data)
+
+        scheduler: Scheduler = request.app.state.scheduler
+        scheduled, scheduler.intervals = schedule_config(data)
+        if scheduled:
+            scheduler.start()
+        else:
+            await scheduler.stop()
+        name, sequence = devices.default.router.active_name, devices.default.router.active_sequence
+        logger.info(f"Control: POST /reload -> {name} {sequence}")
+        return {"engine": name, "sequence": sequence}
+
+    job = request.app.state.swaps.submit("reload", reload)
+    return await _job_response(request.app.state.swaps, job, wait, timeout)
 
-    eng_router: EngineRouter = request.app.state.router
-    eng_router.set_engine(engine_obj, name, sequence)
-    logger.info(f"Control: POST /reload -> {name} {sequence}")
-    return {"ok": True, "engine": name, "sequence": sequence}
 
+async def _job_response(swaps: EngineSwapper, job: SwapJob, wait: bool, timeout: float):
+    if wait:
+        await swaps.wait(job, max(timeout, 0.0))
+    if job.state == "failed":
+        status = 409 if isinstance(job.exception, DeviceLimitError) else 500
+        raise HTTPException(status, detail=job.error)
+    if not job.done:
+        return JSONResponse(status_code=202, content={"ok": True, "pending": True, "job": job.status()})
+    return {"ok": True, **job.result, "job": job.status()}
 
-def _build(name: str, sequence: list[str], registry: dict, extra: dict | None = None) -> tuple:
-    extra = extra or {}
-    if name == "mix":
-        valid = [s for s in sequence if s in registry]
-        if not valid:
-            valid = list(registry.keys())
-        engines = [registry[s]() for s in valid]
-        return MixEngine(engines), "mix", valid
-    else:
-        return registry[name](**extra), name, []
 
+def _swap(device: Device, engine, name: str, sequence: list[str], primed: Path | None) -> None:
+    """Swap a built engine in, unless it is the one the device already runs."""
+    if engine is device.router.active_engine:
+        logger.info(f"Control: {device.id} already runs this {name} engine, keeping it")
+        return
+    device.router.set_engine(engine, name, sequence, primed=primed)
 
-def _write_config(name: str, sequence: list[str], extra: dict | None = None) -> None:
+
+def _is_active(devices: DeviceManager, engine) -> bool:
+    return any(device.router.active_engine is engine for device in devices)
+
+
+async def _get_device(devices: DeviceManager, device_id: str) -> Device:
+    try:
+        return await devices.get(device_id)
+    except DeviceLimitError as e:
+        raise HTTPException(409, detail=str(e))
+
+
+def _build(
+    name: str, sequence: list[str], registry: dict, extra: dict | None = None, scope: str | None = None
+) -> tuple:
+    return _instantiate_engine(name, sequence, registry, extra=extra, scope=scope)
+
+
+def _write_config(
+    name: str, sequence: list[str], extra: dict | None = None, device: str | None = None
+) -> None:
+    """Persist an engine choice: top-level, or into the `devices:` section for one device."""
     CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
-    data: dict = {"engine": name, "sequence": sequence}
+    section: dict = {"engine": name, "sequence": sequence}
     if extra:
-        data.update(extra)
-    with CONFIG_FILE.open("w") as f:
-        yaml.dump(data, f)
+        section.update(extra)
+    with _config_lock:
+        current = read_config()
+        if device is not None:
+            data = current
+            data.setdefault("devices", {})[device] = section
+        else:
+            data = section
+            for key in _PRESERVED_SECTIONS:
+                if current.get(key):
+                    data[key] = current[key]
+        with CONFIG_FILE.open("w") as f:
+            yaml.dump(data, f)
+
+
+def _write_schedule(enabled: bool, intervals: dict[str, int]) -> None:
+    CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with _config_lock:
+        data = read_config()
+        data["schedule"] = {"enabled": enabled, "intervals": intervals}
+        with CONFIG_FILE.open("w") as f:
+            yaml.dump(data, f)
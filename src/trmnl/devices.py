@@ -0,0 +1,188 @@
+# src/trmnl/devices.py
+"""
+Per-device display state. Every TRMNL device (identified by the `ID` header)
+gets its own EngineRouter, Carousel and refresh interval, created on first
+contact. Requests without an ID use the default device built at startup.
+
+A device that polls again well before its refresh interval is up (a retry
+after a Wi-Fi hiccup, a reboot) gets the image it already has instead of
+advancing the carousel, so misbehaving devices can't burn render and LLM
+capacity. The control API can still force an advance.
+
+Engines built for different devices still share the on-disk render caches
+(the poem render cache, the fantasy/illustration image dirs), so a new device
+only adds rendering for images no other device has rendered yet.
+
+Devices named in the `devices:` section of config.yaml are always created;
+at most MAX_DEVICES others are, so arbitrary `ID` headers can't pile up
+carousels and prefetch tasks.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+import asyncio
+import hashlib
+import logging
+import re
+import time
+
+from trmnl.carousel import Carousel, TRMNLImage
+from trmnl.config import (
+    settings,
+    build_engine_from_config,
+    device_config,
+    device_refresh_interval,
+    read_config,
+)
+from trmnl.engines.router import EngineRouter
+from trmnl.loop import run_blocking
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEVICE = "default"
+
+# A poll arriving before this fraction of the refresh interval has passed is
+# treated as a repeat; devices wake slightly early, so don't require all of it.
+REPOLL_WINDOW = 0.8
+# Devices created for IDs that config.yaml doesn't name.
+MAX_DEVICES = 16
+
+_clock = time.monotonic
+
+
+class DeviceLimitError(RuntimeError):
+    """An unconfigured device would exceed MAX_DEVICES."""
+
+
+def device_working_dir(device_id: str) -> Path:
+    # the hash keeps IDs that sanitise alike (aa:bb, aa_bb) apart
+    digest = hashlib.sha256(device_id.encode()).hexdigest()[:8]
+    safe = re.sub(r"[^A-Za-z0-9_-]", "_", device_id)
+    path = settings.paths["CURRENT_IMAGE_DIR"] / "devices" / f"{safe}-{digest}"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+@dataclass
+class Device:
+    id: str
+    router: EngineRouter
+    carousel: Carousel
+    refresh_interval: int
+    # True while the engine comes from the top-level config rather than the
+    # device's own `devices:` section, so top-level switches apply to it.
+    follows_default: bool = True
+    last_advance: float | None = None  # _clock() time of the last advance
+    served: str | None = None  # filename last handed to the device
+    scheduled: bool = False  # advanced by the Scheduler rather than by polls
+
+    async def poll(self) -> TRMNLImage:
+        """
+        The image for a display request: advance only once the refresh
+        interval is (nearly) up. If the carousel was advanced by the control
+        API since the last poll, hand out that image without advancing again.
+        Scheduled devices never advance here once something is staged.
+        """
+        staged = self.carousel.staged
+        now = _clock()
+        if staged is not None and (self.scheduled or staged.filename != self.served):
+            image = staged
+        elif (
+            staged is not None
+            and self.last_advance is not None
+            and now - self.last_advance < self.refresh_interval * REPOLL_WINDOW
+        ):
+            logger.info(f"Repeat poll from {self.id}, serving {staged.filename} again")
+            return staged
+        else:
+            image = await self.carousel.next()
+        self.last_advance = now
+        self.served = image.filename
+        return image
+
+    def status(self) -> dict[str, Any]:
+        last = self.router.last_served.name if self.router.last_served else None
+        return {
+            "engine": self.router.active_name,
+            "sequence": self.router.active_sequence,
+            "last_served": last,
+            "refresh_interval": self.refresh_interval,
+            "follows_default": self.follows_default,
+        }
+
+
+class DeviceManager:
+    """Looks up devices by ID, creating their router/carousel lazily."""
+
+    def __init__(self, default: Device, max_devices: int = MAX_DEVICES):
+        self.default = default
+        self.max_devices = max_devices
+        self._devices: dict[str, Device] = {}
+        self._unconfigured: set[str] = set()
+        self._creating: dict[str, asyncio.Task[Device]] = {}
+
+    def __iter__(self):
+        yield self.default
+        yield from self._devices.values()
+
+    def __contains__(self, device_id: str) -> bool:
+        return device_id in self._devices
+
+    async def get(self, device_id: str | None) -> Device:
+        """
+        The device for an ID, created on first use. Its engine is built in
+        the executor; concurrent first requests share one creation. Raises
+        DeviceLimitError for an unconfigured ID beyond max_devices. No ID, or
+        the default device's own, gives the default device.
+        """
+        if not device_id or device_id == DEFAULT_DEVICE:
+            return self.default
+        device = self._devices.get(device_id)
+        if device is not None:
+            return device
+        task = self._creating.get(device_id)
+        if task is None:
+            task = self._creating[device_id] = asyncio.ensure_future(self._create(device_id))
+            task.add_done_callback(lambda _: self._creating.pop(device_id, None))
+        return await asyncio.shield(task)
+
+    def find_image(self, filename: str) -> TRMNLImage | None:
+        """Find a staged image by filename (without .bmp) across all devices."""
+        for device in self:
+            if image := device.carousel.lookup(filename):
+                return image
+        return None
+
+    async def stop(self) -> None:
+        for device in self:
+            await device.carousel.stop()
+            device.router.close()
+
+    async def _create(self, device_id: str) -> Device:
+        data = await run_blocking(read_config)
+        configured = device_id in (data.get("devices") or {})
+        if not configured and len(self._unconfigured) >= self.max_devices:
+            raise DeviceLimitError(
+                f"Not creating device {device_id}: {self.max_devices} unconfigured devices already"
+            )
+        if not configured:
+            self._unconfigured.add(device_id)  # claimed now, so concurrent creations count
+        try:
+            engine, name, sequence = await run_blocking(build_engine_from_config, device_id)
+            working_dir = await run_blocking(device_working_dir, device_id)
+        except BaseException:
+            self._unconfigured.discard(device_id)
+            raise
+        router = EngineRouter(engine, name, sequence)
+        carousel = Carousel(engine=router, working_dir=working_dir)
+        carousel.start()
+        logger.info(f"New device {device_id}: engine={name} sequence={sequence}")
+        device = self._devices[device_id] = Device(
+            id=device_id,
+            router=router,
+            carousel=carousel,
+            refresh_interval=device_refresh_interval(device_id, data),
+            follows_default="engine" not in device_config(device_id, data),
+        )
+        return device
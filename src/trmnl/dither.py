@@ -0,0 +1,132 @@
+# src/trmnl/dither.py
+"""
+Shared 1-bit conversion for every image path (HTML renders, fantasy/illustration
+caches, manual conversions).
+
+Grayscale -> bool bit array (True = white) with a choice of dithering, then the
+bit array is packed and written as a 1-bit BMP directly, without going back
+through a PIL image.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Literal
+import os
+import struct
+import uuid
+
+import numpy as np
+from PIL import Image
+
+DitherMethod = Literal["floyd-steinberg", "atkinson", "bayer", "threshold"]
+DITHER_METHODS: tuple[str, ...] = ("floyd-steinberg", "atkinson", "bayer", "threshold")
+
+# (dy, dx, weight). Atkinson only diffuses 6/8 of the error, which keeps highlights clean.
+_ATKINSON = [(0, 1, 1 / 8), (0, 2, 1 / 8), (1, -1, 1 / 8), (1, 0, 1 / 8), (1, 1, 1 / 8), (2, 0, 1 / 8)]
+
+
+def _bayer_matrix(n: int) -> np.ndarray:
+    m = np.zeros((1, 1), dtype=np.int64)
+    while m.shape[0] < n:
+        m = np.block([[4 * m, 4 * m + 2], [4 * m + 3, 4 * m + 1]])
+    return m
+
+
+_BAYER_8 = (_bayer_matrix(8) + 0.5) * (256 / 64)
+
+
+def _luma(image: Image.Image) -> Image.Image:
+    return image if image.mode == "L" else image.convert("L")
+
+
+def to_grayscale(image: Image.Image) -> np.ndarray:
+    """Luminance as a 2D uint8 array (Pillow's C conversion, ITU-R 601-2 weights)."""
+    return np.asarray(_luma(image))
+
+
+def _error_diffuse(gray: np.ndarray, kernel: list[tuple[int, int, float]]) -> np.ndarray:
+    """
+    Error diffusion processed as anti-diagonal wavefronts (x + 2y = t). For
+    kernels that only push error right, down-left, down and two rows down,
+    every pixel on a wavefront depends only on earlier wavefronts, so each one
+    is a single vectorized step: w + 2h steps instead of w * h iterations.
+    """
+    h, w = gray.shape
+    stride = w + 4  # two columns of padding on each side absorb edge spill
+    buf = np.zeros((h + 2) * stride, dtype=np.float32)
+    buf.reshape(h + 2, stride)[:h, 2 : w + 2] = gray
+    offsets = [dy * stride + dx for dy, dx, _ in kernel]
+    weights = [weight for _, _, weight in kernel]
+    for t in range(w + 2 * (h - 1)):
+        y_lo = max(0, (t - w + 2) // 2)
+        y_hi = min(h - 1, t // 2)
+        # flat index of pixel (y, x = t - 2y) is y * (stride - 2) + t + 2
+        idx = np.arange(y_lo * (stride - 2) + t + 2, y_hi * (stride - 2) + t + 3, stride - 2)
+        values = buf[idx]
+        white = values >= 128
+        error = values - np.where(white, 255.0, 0.0)
+        buf[idx] = white  # later wavefronts never write back here
+        for offset, weight in zip(offsets, weights):
+            buf[idx + offset] += error * weight
+    return buf.reshape(h + 2, stride)[:h, 2 : w + 2] > 0.5
+
+
+def dither(gray: np.ndarray, method: DitherMethod = "floyd-steinberg") -> np.ndarray:
+    """Reduce a uint8 grayscale array to bits (True = white)."""
+    if method == "floyd-steinberg":
+        # Pillow's C quantizer is Floyd-Steinberg, far faster than any NumPy
+        # formulation, and the output every existing cache was built with.
+        return np.asarray(Image.fromarray(gray).convert("1"))
+    if method == "atkinson":
+        return _error_diffuse(gray, _ATKINSON)
+    if method == "bayer":
+        h, w = gray.shape
+        reps = (-(-h // 8), -(-w // 8))
+        return gray > np.tile(_BAYER_8, reps)[:h, :w]
+    if method == "threshold":
+        return gray >= 128
+    valid = ", ".join(DITHER_METHODS)
+    raise ValueError(f"Unknown dither method '{method}'. Valid methods: {valid}")
+
+
+def encode_bmp_1bit(bits: np.ndarray) -> bytes:
+    """Pack a bool array (True = white) into a bottom-up 1-bit BMP."""
+    h, w = bits.shape
+    packed = np.packbits(bits, axis=1)  # MSB = leftmost pixel, as BMP expects
+    stride = (packed.shape[1] + 3) & ~3
+    if stride != packed.shape[1]:
+        packed = np.pad(packed, ((0, 0), (0, stride - packed.shape[1])))
+    pixel_data = np.ascontiguousarray(packed[::-1]).tobytes()
+
+    palette = b"\x00\x00\x00\x00\xff\xff\xff\x00"  # index 0 black, 1 white
+    offset = 14 + 40 + len(palette)
+    file_header = struct.pack("<2sIHHI", b"BM", offset + len(pixel_data), 0, 0, offset)
+    info_header = struct.pack(
+        "<IiiHHIIiiII", 40, w, h, 1, 1, 0, len(pixel_data), 2835, 2835, 2, 0
+    )
+    return file_header + info_header + palette + pixel_data
+
+
+def write_bmp_1bit(bits: np.ndarray, output_filename: str | Path) -> Path:
+    """Write bits as a 1-bit BMP via a temp file + rename, so readers never see a partial file."""
+    output_path = Path(output_filename)
+    tmp_path = output_path.with_name(f".{output_path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        tmp_path.write_bytes(encode_bmp_1bit(bits))
+        os.replace(tmp_path, output_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return output_path
+
+
+def save_bmp(
+    image: Image.Image, output_filename: str | Path, method: DitherMethod = "floyd-steinberg"
+) -> Path:
+    """Convert any Pillow image to a 1-bit BMP with the chosen dithering."""
+    if image.mode == "1":
+        bits = np.asarray(image)
+    elif method == "floyd-steinberg":
+        # stay in Pillow end to end; NumPy only sees the finished bits
+        bits = np.asarray(_luma(image).convert("1"))
+    else:
+        bits = dither(to_grayscale(image), method)
+    return write_bmp_1bit(bits, output_filename)
@@ -0,0 +1,98 @@
+# src/trmnl/engines/catalog.py
+"""
+In-memory index of the BMPs in a cache directory, so engines can draw an
+image without scanning the directory on every request.
+
+The directory's mtime changes whenever a file is created, removed or renamed
+into it (atomic writes included), so the catalog only re-lists the directory
+when that one stat says something changed, and applies the difference to the
+index instead of rebuilding it. The stat itself is throttled to once per
+`check_interval`; between checks a draw touches no filesystem at all.
+"""
+from __future__ import annotations
+from pathlib import Path
+import logging
+import os
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+CHECK_INTERVAL = 5.0  # seconds between directory mtime checks
+# Filesystems with coarse timestamps can give a file created just after a scan
+# the same mtime as the scan saw; re-list until the mtime is this old.
+MTIME_SETTLE = 2.0
+
+
+class DirectoryCatalog:
+    def __init__(self, directory: Path, suffix: str = ".bmp", check_interval: float = CHECK_INTERVAL):
+        self.directory = directory
+        self.suffix = suffix
+        self.check_interval = check_interval
+        self._paths: list[Path] = []
+        self._positions: dict[str, int] = {}  # name -> index in _paths
+        self._mtime_ns: int | None = None
+        self.version = 0  # bumped whenever the index changes
+        self._settled = False
+        self._checked_at = 0.0
+        self.refresh()
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._positions
+
+    @property
+    def paths(self) -> list[Path]:
+        return list(self._paths)
+
+    def due(self) -> bool:
+        """Whether the next draw should check the directory first."""
+        return time.monotonic() - self._checked_at >= self.check_interval
+
+    def refresh(self) -> bool:
+        """Stat the directory and re-list it if it changed; returns whether the index changed."""
+        self._checked_at = time.monotonic()
+        try:
+            mtime_ns = self.directory.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime_ns = None
+        if mtime_ns == self._mtime_ns and self._settled:
+            return False
+        self._mtime_ns = mtime_ns
+        self._settled = mtime_ns is None or time.time() - mtime_ns / 1e9 > MTIME_SETTLE
+        return self._apply(self._list() if mtime_ns is not None else set())
+
+    def choice(self) -> Path:
+        if not self._paths:
+            raise IndexError("catalog is empty")
+        return random.choice(self._paths)
+
+    def _list(self) -> set[str]:
+        with os.scandir(self.directory) as entries:
+            return {
+                entry.name
+                for entry in entries
+                if entry.name.endswith(self.suffix)
+                and not entry.name.startswith(".")  # in-progress atomic writes
+                and entry.is_file()
+            }
+
+    def _apply(self, names: set[str]) -> bool:
+        added = names - self._positions.keys()
+        removed = self._positions.keys() - names
+        for name in removed:
+            # swap the last entry into the hole: O(1) removal
+            index = self._positions.pop(name)
+            last = self._paths.pop()
+            if index < len(self._paths):
+                self._paths[index] = last
+                self._positions[last.name] = index
+        for name in sorted(added):
+            self._positions[name] = len(self._paths)
+            self._paths.append(self.directory / name)
+        if added or removed:
+            self.version += 1
+            logger.debug(f"Catalog {self.directory}: +{len(added)} -{len(removed)} -> {len(self)}")
+        return bool(added or removed)
@@ -20,6 +20,7 @@ from PIL import Image, ImageOps
 from rich.console import Console
 
 from trmnl.config import settings
+from trmnl.dither import DitherMethod, save_bmp
 from trmnl.engines.fantasy.prompts import STYLE_PREAMBLE, PROMPTS
 
 console = Console()
@@ -27,6 +28,8 @@ logger = logging.getLogger(__name__)
 
 FANTASY_DIR = settings.paths["CACHE_DIR"] / "fantasy"
 FANTASY_DIR.mkdir(parents=True, exist_ok=True)
+# Error diffusion keeps the engravings' crosshatching; Atkinson reads a little crisper.
+DITHER_METHOD: DitherMethod = "floyd-steinberg"
 
 
 async def _generate_one(slug: str, prompt: str) -> bool:
@@ -34,7 +37,6 @@ async def _generate_one(slug: str, prompt: str) -> bool:
     from conduit.core.model.model_async import ModelAsync
 
     output_path = FANTASY_DIR / f"fantasy_{slug}.bmp"
-    tmp_path = FANTASY_DIR / f"fantasy_{slug}.bmp.tmp"
     full_prompt = f"{STYLE_PREAMBLE} {prompt}"
 
     try:
@@ -58,9 +60,7 @@ async def _generate_one(slug: str, prompt: str) -> bool:
     image_data = base64.b64decode(images[0].b64_json)
     image = Image.open(io.BytesIO(image_data))
     image = ImageOps.pad(image, (800, 480), color=(0, 0, 0))
-    bmp = image.convert("1")
-    bmp.save(tmp_path, format="BMP")
-    tmp_path.rename(output_path)
+    save_bmp(image, output_path, DITHER_METHOD)  # atomic temp file + rename
 
     size = output_path.stat().st_size
     console.print(f"[green]Generated {slug}[/green] -> {output_path.name} ({size} bytes)")
@@ -1,8 +1,9 @@
 # src/trmnl/engines/fantasy/engine.py
 from __future__ import annotations
 from trmnl.config import settings
+from trmnl.engines.catalog import DirectoryCatalog
+from trmnl.loop import run_blocking
 from pathlib import Path
-import random
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,16 +14,18 @@ FANTASY_DIR.mkdir(parents=True, exist_ok=True)
 
 class FantasyEngine:
     def __init__(self) -> None:
-        count = len(list(FANTASY_DIR.glob("*.bmp")))
-        logger.info(f"FantasyEngine initialized with {count} cached images")
+        # picks up images the background generator writes later, without a restart
+        self.catalog = DirectoryCatalog(FANTASY_DIR)
+        logger.info(f"FantasyEngine initialized with {len(self.catalog)} cached images")
 
     async def next(self) -> Path:
-        bmp_files = list(FANTASY_DIR.glob("*.bmp"))
-        if not bmp_files:
+        if self.catalog.due():
+            await run_blocking(self.catalog.refresh)
+        if not len(self.catalog):
             logger.error("FantasyEngine: no images in cache")
             raise RuntimeError(
                 "No fantasy images cached. Run background_process.py first."
             )
-        chosen = random.choice(bmp_files)
+        chosen = self.catalog.choice()
         logger.info(f"FantasyEngine serving: {chosen.name}")
         return chosen
@@ -1,53 +1,170 @@
 # src/trmnl/engines/illustration/engine.py
 from __future__ import annotations
 from pathlib import Path
-import random
+import hashlib
+import json
 import logging
+import random
+import re
+import threading
+import uuid
 
 from trmnl.config import settings
+from trmnl.engines.catalog import DirectoryCatalog
+from trmnl.loop import run_blocking
 
 logger = logging.getLogger(__name__)
 
 ILLUSTRATION_DIR = settings.paths["CACHE_DIR"] / "illustration"
 ILLUSTRATION_DIR.mkdir(parents=True, exist_ok=True)
 
+# Rotation state lives in a hidden dir so it is never mistaken for an artist.
+STATE_DIR_NAME = ".state"
+FLAT_KEY = "_flat"
+
+# Saves run in executor threads and several engines share cursors.json.
+_state_lock = threading.Lock()
+
+
+def _state_dir(device: str | None) -> Path:
+    """Rotation state for a device; the top-level engine keeps the original location."""
+    root = ILLUSTRATION_DIR / STATE_DIR_NAME
+    if device is None:
+        return root
+    digest = hashlib.sha256(device.encode()).hexdigest()[:8]
+    return root / "devices" / f"{re.sub(r'[^A-Za-z0-9_-]', '_', device)}-{digest}"
+
+
+def _write_json(path: Path, data: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    tmp_path.write_text(json.dumps(data))
+    tmp_path.replace(path)
+
+
+def _read_json(path: Path) -> dict:
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+class ShuffleBag:
+    """
+    Draws every image in a directory once, in random order, before any
+    repeats. Images added mid-bag join the current bag; removed ones are
+    skipped when their turn comes.
+    """
+
+    def __init__(self, key: str, catalog: DirectoryCatalog):
+        self.key = key
+        self.catalog = catalog
+        self.order: list[str] = []
+        self.cursor = 0
+        self._queued: set[str] = set()
+        self._seen_version: int | None = None
+
+    def restore(self, order: list[str], cursor: int) -> None:
+        self.order = [name for name in order if isinstance(name, str)]
+        self.cursor = min(max(int(cursor), 0), len(self.order))
+        self._queued = set(self.order)
+        self._seen_version = None
+
+    def draw(self) -> tuple[Path, bool]:
+        """The next image, and whether the bag order changed (so it must be saved)."""
+        changed = False
+        if self._seen_version != self.catalog.version:
+            self._seen_version = self.catalog.version
+            newcomers = [p.name for p in self.catalog.paths if p.name not in self._queued]
+            self.order.extend(newcomers)
+            self._queued.update(newcomers)
+            changed = bool(newcomers)
+        while True:
+            if self.cursor >= len(self.order):
+                self._reshuffle()
+                changed = True
+            name = self.order[self.cursor]
+            self.cursor += 1
+            if name in self.catalog:
+                return self.catalog.directory / name, changed
+
+    def _reshuffle(self) -> None:
+        last = self.order[self.cursor - 1] if self.cursor else None
+        order = [p.name for p in self.catalog.paths]
+        random.shuffle(order)
+        if len(order) > 1 and order[0] == last:
+            # don't show the same image twice in a row across the bag boundary
+            swap = random.randrange(1, len(order))
+            order[0], order[swap] = order[swap], order[0]
+        self.order, self.cursor, self._queued = order, 0, set(order)
+        logger.debug(f"Illustration bag {self.key}: reshuffled {len(order)} images")
+
 
 class IllustrationEngine:
     def __init__(
         self,
         artist: str | None = None,
         artists: list[str] | None = None,
+        device: str | None = None,
     ) -> None:
         if artist and artists:
             raise ValueError("Specify artist or artists, not both")
 
         if artist:
-            self._dirs = [ILLUSTRATION_DIR / artist]
+            keys = [artist]
         elif artists:
-            self._dirs = [ILLUSTRATION_DIR / a for a in artists]
+            keys = list(artists)
         else:
             # flat dir fallback — backward compat
-            self._dirs = [ILLUSTRATION_DIR]
+            keys = [FLAT_KEY]
 
+        self._bags = [
+            ShuffleBag(key, DirectoryCatalog(ILLUSTRATION_DIR / key if key != FLAT_KEY else ILLUSTRATION_DIR))
+            for key in keys
+        ]
+        self._state_dir = _state_dir(device)  # devices each keep their own place
+        self._rotation_key = ",".join(keys)
         self._index = 0
+        self._load_state()
 
-        total = sum(len(list(d.glob("*.bmp"))) for d in self._dirs if d.exists())
+        total = sum(len(bag.catalog) for bag in self._bags)
         artists_desc = artist or (", ".join(artists) if artists else "all")
         logger.info(f"IllustrationEngine initialized: {total} images [{artists_desc}]")
 
     async def next(self) -> Path:
-        if len(self._dirs) == 1:
-            bmp_files = list(self._dirs[0].glob("*.bmp"))
-        else:
-            d = self._dirs[self._index]
-            self._index = (self._index + 1) % len(self._dirs)
-            bmp_files = list(d.glob("*.bmp"))
+        bag = self._bags[self._index]
+        self._index = (self._index + 1) % len(self._bags)
+        if bag.catalog.due():
+            await run_blocking(bag.catalog.refresh)
 
-        if not bmp_files:
+        if not len(bag.catalog):
             raise RuntimeError(
                 "No illustration images cached. "
                 "Run scripts/convert_illustrations.py --artist <name> first."
             )
-        chosen = random.choice(bmp_files)
+        chosen, order_changed = bag.draw()
+        await run_blocking(self._save_state, bag, order_changed)
         logger.info(f"IllustrationEngine serving: {chosen.name}")
         return chosen
+
+    def _load_state(self) -> None:
+        cursors = _read_json(self._state_dir / "cursors.json")
+        for bag in self._bags:
+            order = _read_json(self._bag_path(bag)).get("order", [])
+            bag.restore(order, cursors.get("bags", {}).get(bag.key, 0))
+        self._index = int(cursors.get("rotation", {}).get(self._rotation_key, 0)) % len(self._bags)
+
+    def _save_state(self, bag: ShuffleBag, order_changed: bool) -> None:
+        """The full bag order is only written when it changes; cursors on every draw."""
+        path = self._state_dir / "cursors.json"
+        with _state_lock:
+            if order_changed:
+                _write_json(self._bag_path(bag), {"order": bag.order})
+            cursors = _read_json(path)
+            cursors.setdefault("bags", {})[bag.key] = bag.cursor
+            cursors.setdefault("rotation", {})[self._rotation_key] = self._index
+            _write_json(path, cursors)
+
+    def _bag_path(self, bag: ShuffleBag) -> Path:
+        return self._state_dir / f"bag-{bag.key}.json"
@@ -1,31 +1,65 @@
 """
 Run this to process poems. These are cached on Headwater server, so this frontloads work.
+Processed poems are rendered to the PoemEngine image cache in concurrent batches.
 """
 
+import asyncio
+
+from trmnl.browser import BrowserPool
+from trmnl.engines.poems.engine import PoemEngine
 from trmnl.engines.poems.process import process_poem, Poem
 from trmnl.engines.poems.poem import filter_poems
 from rich.console import Console
-from conduit.utils.progress.verbosity import Verbosity
 
-VERBOSITY = Verbosity.SILENT
+RENDER_CONCURRENCY = 4
+BATCH_SIZE = 50
 console = Console()
 poem_list = filter_poems()
 poems = [Poem(**poem) for poem in poem_list]
 
 
-def run_background_process():
-    for index, poem in enumerate(poems):
-        console.print(f"[blue]Processing poem {index + 1} of {len(poems)}[/blue]")
-        processed_poem = process_poem(poem, verbose=VERBOSITY)
-        if processed_poem:
+async def _render(engine: PoemEngine, batch: list[dict[str, str]], pool: BrowserPool) -> None:
+    results = await engine.prerender(batch, concurrency=RENDER_CONCURRENCY, pool=pool)
+    for result in results:
+        if not result.ok:
             console.print(
-                f"\t[green]Processed poem:[/green] [cyan]{poem.title} by {poem.poet}[/cyan]"
+                f"\t[red]Render failed:[/red] {result.job.output_filename}: {result.error}"
             )
-        else:
-            console.print(
-                f"\t[yellow]Skipped poem:[/yellow] [cyan]{poem.title} by {poem.poet}[/cyan]"
+    n_ok = sum(1 for r in results if r.ok)
+    console.print(f"[blue]Rendered {n_ok} of {len(results)} new images[/blue]")
+
+
+async def run_background_process():
+    engine = PoemEngine()
+    pool = BrowserPool(size=RENDER_CONCURRENCY)
+    batch: list[dict[str, str]] = []
+    try:
+        for index, poem in enumerate(poems):
+            console.print(f"[blue]Processing poem {index + 1} of {len(poems)}[/blue]")
+            processed_poem = await process_poem(poem)
+            if processed_poem:
+                console.print(
+                    f"\t[green]Processed poem:[/green] [cyan]{poem.title} by {poem.poet}[/cyan]"
+                )
+            else:
+                console.print(
+                    f"\t[yellow]Skipped poem:[/yellow] [cyan]{poem.title} by {poem.poet}[/cyan]"
+                )
+            batch.append(
+                {
+                    "title": poem.title.strip(),
+                    "poet": poem.poet.strip(),
+                    "poem": (processed_poem or poem.poem).strip(),
+                }
             )
+            if len(batch) >= BATCH_SIZE:
+                await _render(engine, batch, pool)
+                batch = []
+        if batch:
+            await _render(engine, batch, pool)
+    finally:
+        await pool.close()
 
 
 if __name__ == "__main__":
-    run_background_process()
+    asyncio.run(run_background_process())
@@ -1,17 +1,46 @@
-from trmnl.config import settings
 from trmnl.carousel import ImageEngine
-from trmnl.generate import generate_bmp_from_html
+from trmnl.browser import BrowserPool
+from trmnl.dither import DITHER_METHODS, DitherMethod
+from trmnl.generate import (
+    generate_bmp_from_text,
+    get_render_cache,
+    html_cache_key,
+    render_batch,
+    render_html_cached,
+    render_text_cached,
+    text_cache_key,
+    AutoFit,
+    RenderBackend,
+    RenderCache,
+    RenderJob,
+    RenderResult,
+)
 from pathlib import Path
+from typing import Literal
 import logging
 
 logger = logging.getLogger(__name__)
 
-CACHE_DIR = settings.paths["CACHE_DIR"]
-POEMS_DIR = CACHE_DIR / "poems"
-POEMS_DIR.mkdir(parents=True, exist_ok=True)
-
 
 class PoemEngine(ImageEngine):
+    def __init__(
+        self,
+        backend: RenderBackend = "html",
+        cache: RenderCache | None = None,
+        dither: DitherMethod = "floyd-steinberg",
+        layout: Literal["fixed", "autofit"] = "fixed",
+    ) -> None:
+        if backend not in ("html", "text"):
+            raise ValueError(f"Unknown render backend '{backend}'")
+        if layout not in ("fixed", "autofit"):
+            raise ValueError(f"Unknown layout '{layout}'")
+        if dither not in DITHER_METHODS:
+            raise ValueError(f"Unknown dither method '{dither}'")
+        self.backend: RenderBackend = backend
+        self.dither: DitherMethod = dither
+        self.layout = layout
+        self.cache: RenderCache = cache or get_render_cache()
+
     async def next(self) -> Path:
         poem_object = await self._retrieve_poem()
         title = poem_object["title"]
@@ -22,7 +51,7 @@ class PoemEngine(ImageEngine):
 
     @property
     def image_dir(self) -> Path:
-        return POEMS_DIR
+        return self.cache.cache_dir
 
     async def _retrieve_poem(self) -> dict[str, str]:
         from trmnl.engines.poems.poem import random_poem
@@ -30,26 +59,92 @@ class PoemEngine(ImageEngine):
         poem_object: dict[str, str] = await random_poem()
         return poem_object
 
-    async def _generate_poem_image(self, title: str, poem: str, poet: str) -> Path:
-        title_name = title.lower().replace(" ", "_")
-        output_filename: Path = POEMS_DIR / f"poem_{title_name}.bmp"
-        # If file already exists, skip generation
-        if output_filename.exists():
-            logger.info(
-                f"Poem image {output_filename} already exists. Skipping generation."
+    async def prerender(
+        self,
+        poems: list[dict[str, str]],
+        concurrency: int = 4,
+        pool: BrowserPool | None = None,
+    ) -> list[RenderResult]:
+        """
+        Fill the render cache for many poems at once (dicts with title/poem/poet).
+        Poems that are already cached, or duplicate one earlier in the batch,
+        are skipped.
+        """
+        jobs: dict[str, RenderJob] = {}
+        pending: dict[str, dict[str, str]] = {}
+        for p in poems:
+            key = self._cache_key(p["title"], p["poem"], p["poet"], pool)
+            # not lookup(): a pre-render check isn't a cache hit or miss
+            if key in jobs or self.cache.path_for(key).exists():
+                continue
+            html = self._poem_html(p["title"], p["poem"], p["poet"])
+            jobs[key] = RenderJob(html, self.cache.path_for(key), self.dither, self._autofit())
+            pending[key] = p
+        if not jobs:
+            return []
+        if self.backend == "html":
+            return await render_batch(
+                jobs.values(), concurrency=concurrency, pool=pool, cache=self.cache
             )
-            return output_filename
+
+        results = []
+        for key, job in jobs.items():
+            p = pending[key]
+            try:
+                path = await generate_bmp_from_text(
+                    self._heading(p["title"], p["poet"]), p["poem"], job.output_filename
+                )
+            except Exception as e:
+                logger.error(f"Render failed for {job.output_filename}: {e}")
+                results.append(RenderResult(job=job, error=e))
+            else:
+                results.append(RenderResult(job=job, path=path))
+        return results
+
+    async def _generate_poem_image(self, title: str, poem: str, poet: str) -> Path:
+        # Cached by content: the same poem/template/settings is only rendered once.
+        if self.backend == "text":
+            return await render_text_cached(self._heading(title, poet), poem, cache=self.cache)
+        poem_html = self._poem_html(title, poem, poet)
+        return await render_html_cached(
+            poem_html, cache=self.cache, dither=self.dither, autofit=self._autofit()
+        )
+
+    def _cache_key(
+        self, title: str, poem: str, poet: str, pool: BrowserPool | None = None
+    ) -> str:
+        if self.backend == "text":
+            return text_cache_key(self._heading(title, poet), poem)
+        return html_cache_key(
+            self._poem_html(title, poem, poet), pool, self.dither, self._autofit()
+        )
+
+    def _autofit(self) -> AutoFit | None:
+        return AutoFit() if self.layout == "autofit" else None
+
+    def _heading(self, title: str, poet: str) -> str:
+        return f"{title.upper()} by {poet}"
+
+    def _poem_html(self, title: str, poem: str, poet: str) -> str:
         # Simple HTML template for poem rendering
         # Replace newlines with <br> for HTML formatting
         poem_text = poem.replace("\n", "<br>")
-        poem_html = f"""
+        if self.layout == "autofit":
+            # Fixed-size box + auto margins so AutoFit can measure overflow
+            return f"""
+        <div id="fit" style="height: 480px; box-sizing: border-box; padding: 24px; display: flex; flex-direction: column; overflow: hidden; text-align: center;">
+            <div style="margin: auto;">
+                <p style="font-weight: bold; margin: 0 0 1em;">{self._heading(title, poet)}</p>
+                <p style="margin: 0;">{poem_text}</p>
+            </div>
+        </div>
+        """
+        return f"""
         <div style="display: flex; justify-content: center; align-items: center; height: 80%; flex-direction: column;">
-            <b><p>{title.upper()} by {poet}</p></b>
+            <b><p>{self._heading(title, poet)}</p></b>
             <p>{poem_text}</p>
         </div>
         """
-        new_path = await generate_bmp_from_html(poem_html, output_filename)
-        return new_path
 
 
 if __name__ == "__main__":
@@ -8,6 +8,7 @@ from conduit.remote import (
 )
 from pathlib import Path
 from pydantic import BaseModel
+from trmnl.metrics import stage
 from typing import Literal
 import logging
 import re
@@ -56,7 +57,8 @@ async def _restore_poem(poem: Poem) -> str:
     prompt = pl["expert"]
     rendered = prompt.render(input_variables=poem.model_dump())
     request = GenerationRequest.from_query_input(rendered, PARAMS, OPTIONS)
-    response = await model.query(request)
+    with stage("llm.restore"):
+        response = await model.query(request)
     return str(response.content)
 
 
@@ -68,7 +70,8 @@ async def _reconstruct_poem(poem: Poem) -> str:
     prompt = pl["forensic"]
     rendered = prompt.render(input_variables=poem.model_dump())
     request = GenerationRequest.from_query_input(rendered, PARAMS, OPTIONS)
-    response = await model.query(request)
+    with stage("llm.reconstruct"):
+        response = await model.query(request)
     return str(response.content)
 
 
@@ -76,7 +79,8 @@ async def _route_poem(poem: Poem) -> Literal["restore", "reconstruct"]:
     prompt = pl["route"]
     rendered = prompt.render(input_variables=poem.model_dump())
     request = GenerationRequest.from_query_input(rendered, PARAMS, OPTIONS)
-    response = await model.query(request)
+    with stage("llm.route"):
+        response = await model.query(request)
     response_string = str(response.content).strip().lower()
     if response_string == "no":
         return "reconstruct"
@@ -1,10 +1,22 @@
 # src/trmnl/engines/registry.py
 from __future__ import annotations
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Callable, Hashable
+import logging
+import threading
+import time
+import weakref
 
 if TYPE_CHECKING:
     from trmnl.carousel import ImageEngine
 
+logger = logging.getLogger(__name__)
+
+# Engines not handed out for this long are no longer held by the cache; one
+# still active in a router stays reachable (weakly) and is reused.
+ENGINE_IDLE_TTL = 3600.0
+
+_clock = time.monotonic
+
 
 def get_engine_registry() -> dict[str, type[ImageEngine]]:
     """
@@ -21,3 +33,114 @@ def get_engine_registry() -> dict[str, type[ImageEngine]]:
         "fantasy": FantasyEngine,
         "illustration": IllustrationEngine,
     }
+
+
+def _freeze(value: Any) -> Hashable:
+    """A hashable stand-in for constructor args (lists and dicts included)."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class _Entry:
+    __slots__ = ("ref", "held", "last_used")
+
+    def __init__(self, engine: ImageEngine):
+        self.ref = weakref.ref(engine)
+        self.held: ImageEngine | None = engine
+        self.last_used = _clock()
+
+
+class EngineCache:
+    """
+    Engine instances keyed by scope (a device ID, or None for the top-level
+    engine), name, class and constructor args, so switching back to an engine
+    picks up its warmed state (catalogs, shuffle bags, loaded datasets)
+    instead of building a new one. Scopes keep rotation state per device.
+
+    Thread-safe: engines are built in the executor during hot swaps.
+    """
+
+    def __init__(self, idle_ttl: float = ENGINE_IDLE_TTL):
+        self.idle_ttl = idle_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[tuple, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        scope: str | None,
+        name: str,
+        cls: Callable[..., ImageEngine],
+        args: dict[str, Any] | None = None,
+        factory: Callable[[], ImageEngine] | None = None,
+    ) -> ImageEngine:
+        """The cached engine for this key, or a new one from `factory` (default: cls(**args))."""
+        args = args or {}
+        key = (scope, name, cls, _freeze(args))
+        with self._lock:
+            self._evict_idle()
+            entry = self._entries.get(key)
+            engine = entry.ref() if entry is not None else None
+            if engine is not None:
+                entry.held, entry.last_used = engine, _clock()
+                self.hits += 1
+                return engine
+            self.misses += 1
+        # built outside the lock: constructors can take seconds
+        engine = factory() if factory is not None else cls(**args)
+        with self._lock:
+            entry = self._entries.get(key)
+            existing = entry.ref() if entry is not None else None
+            if existing is not None:
+                return existing  # built concurrently; keep the first
+            self._entries[key] = _Entry(engine)
+        logger.debug(f"Engine cache: built {name} for {scope or 'default'} {args}")
+        return engine
+
+    def invalidate(self, name: str | None = None, scope: str | None = None) -> int:
+        """
+        Forget cached engines (all, or by name and/or scope) so the next
+        switch builds fresh ones. Mixes go whenever an engine is named, since
+        they hold their members. Returns how many entries were dropped.
+        """
+        with self._lock:
+            doomed = [
+                key
+                for key in self._entries
+                if (name is None or key[1] in (name, "mix"))
+                and (scope is None or key[0] == scope)
+            ]
+            for key in doomed:
+                del self._entries[key]
+        if doomed:
+            logger.info(f"Engine cache: invalidated {len(doomed)} engine(s)")
+        return len(doomed)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            self._evict_idle()
+            return {
+                "engines": len(self._entries),
+                "held": sum(entry.held is not None for entry in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _evict_idle(self) -> None:
+        now = _clock()
+        for key, entry in list(self._entries.items()):
+            if entry.held is not None and now - entry.last_used > self.idle_ttl:
+                entry.held = None
+            if entry.held is None and entry.ref() is None:
+                del self._entries[key]
+
+
+_engine_cache = EngineCache()
+
+
+def get_engine_cache() -> EngineCache:
+    return _engine_cache
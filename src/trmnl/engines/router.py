@@ -1,7 +1,13 @@
 # src/trmnl/engines/router.py
 from __future__ import annotations
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Callable
+import asyncio
 import logging
-from typing import TYPE_CHECKING
+import time
+
+from trmnl.loop import SingleFlight
+from trmnl.metrics import stage
 
 if TYPE_CHECKING:
     from pathlib import Path
@@ -9,23 +15,172 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# Seconds a mixed engine may take before it is skipped for this turn.
+ENGINE_TIMEOUT = 120.0
+BACKOFF_BASE = 5.0
+BACKOFF_MAX = 300.0
+
+_clock = time.monotonic
+
+
+def engine_stage(engine: ImageEngine) -> str:
+    """Metrics stage name for an engine's next(), e.g. PoemEngine -> engine.poem."""
+    return "engine." + type(engine).__name__.removesuffix("Engine").lower()
+
 
 class MixEngine:
-    def __init__(self, engines: list[ImageEngine]):
+    """
+    Interleaves several engines by weight with smooth weighted round-robin
+    (the nginx algorithm): weights 2:1 give a, b, a, a, b, a rather than
+    a, a, b. Equal weights reduce to plain round-robin.
+
+    Selection is synchronous, with no await between reading and updating the
+    weights, so concurrent callers each claim their own turn. An engine that
+    raises or exceeds `timeout` is skipped in favour of the next pick and
+    sits out for an exponential backoff, so one bad engine can't stall the
+    rotation.
+
+    Once an image is handed out, the engine whose turn is next starts its
+    next() in the background and the result is held until that turn comes,
+    so a slow engine (poem) following a fast one (fantasy) is already done.
+    """
+
+    def __init__(
+        self,
+        engines: list[ImageEngine],
+        weights: list[int] | None = None,
+        names: list[str] | None = None,
+        timeout: float | None = ENGINE_TIMEOUT,
+        lookahead: bool = True,
+    ):
         if not engines:
             raise ValueError("MixEngine requires at least one engine")
+        weights = weights or [1] * len(engines)
+        if len(weights) != len(engines) or any(w < 1 for w in weights):
+            raise ValueError("MixEngine needs one positive integer weight per engine")
         self.engines = engines
-        self._index = 0
+        self.weights = list(weights)
+        self.names = names or [engine_stage(e).removeprefix("engine.") for e in engines]
+        self.timeout = timeout
+        self.lookahead = lookahead
+        self._current = [0] * len(engines)  # smooth weighted round-robin state
+        self._failures = [0] * len(engines)
+        self._skip_until = [0.0] * len(engines)
+        self._warming: dict[int, asyncio.Task[Path]] = {}  # engine index -> look-ahead
+
+    @classmethod
+    def from_sequence(
+        cls,
+        sequence: list[str],
+        registry: dict[str, type[ImageEngine]],
+        weights: dict[str, int] | None = None,
+        build: Callable[[str], ImageEngine] | None = None,
+    ) -> tuple[MixEngine, list[str]]:
+        """
+        Build a mix with one shared instance per engine name. Repeating a name
+        in the sequence raises its weight; explicit weights override that.
+        `build` makes a member engine by name (default: the registry class).
+        Returns the engine and the resolved sequence.
+        """
+        valid = cls.resolve_sequence(sequence, registry)
+        build = build or (lambda name: registry[name]())
+        counts = Counter(valid)
+        names = list(dict.fromkeys(valid))
+        resolved = [int((weights or {}).get(name, counts[name])) for name in names]
+        return cls([build(name) for name in names], resolved, names), valid
+
+    @staticmethod
+    def resolve_sequence(sequence: list[str], registry: dict[str, type[ImageEngine]]) -> list[str]:
+        """The known engines in sequence, or every engine if none are known."""
+        return [s for s in sequence if s in registry] or list(registry.keys())
+
+    def status(self) -> list[dict[str, Any]]:
+        now = _clock()
+        return [
+            {
+                "engine": name,
+                "weight": weight,
+                "failures": failures,
+                "backoff_s": round(max(until - now, 0.0), 1),
+                "warm": index in self._warming,
+            }
+            for index, (name, weight, failures, until) in enumerate(
+                zip(self.names, self.weights, self._failures, self._skip_until)
+            )
+        ]
+
+    def cancel_lookahead(self) -> None:
+        """Drop any results being warmed, e.g. because the mix is being replaced."""
+        for task in self._warming.values():
+            task.cancel()
+        self._warming.clear()
+
+    def _select(self, exclude: set[int], peek: bool = False) -> int | None:
+        """The next engine by weight; with peek, without taking the turn."""
+        now = _clock()
+        candidates = [
+            i for i in range(len(self.engines)) if i not in exclude and self._skip_until[i] <= now
+        ]
+        if not candidates:
+            # everything is backing off: try whichever comes back soonest
+            waiting = [i for i in range(len(self.engines)) if i not in exclude]
+            if not waiting:
+                return None
+            return min(waiting, key=lambda i: self._skip_until[i])
+        current = list(self._current) if peek else self._current
+        total = sum(self.weights[i] for i in candidates)
+        for i in candidates:
+            current[i] += self.weights[i]
+        chosen = max(candidates, key=lambda i: current[i])
+        current[chosen] -= total
+        return chosen
 
     async def next(self) -> Path:
-        engine = self.engines[self._index]
-        current = self._index
-        self._index = (self._index + 1) % len(self.engines)
-        # Note: _index is not concurrency-safe in a concurrent async context.
-        # Two concurrent callers could read the same index before either increments it.
-        # This is fine for the single-consumer use case here.
-        logger.debug(f"MixEngine: index {current} -> {self._index}")
-        return await engine.next()
+        tried: set[int] = set()
+        last_error: Exception | None = None
+        while (index := self._select(tried)) is not None:
+            tried.add(index)
+            try:
+                path = await self._take(index)
+            except Exception as e:
+                last_error = e
+                self._record_failure(index, e)
+                continue
+            self._failures[index] = 0
+            self._skip_until[index] = 0.0
+            logger.debug(f"MixEngine: served {self.names[index]}")
+            if self.lookahead:
+                self._warm_next()
+            return path
+        raise RuntimeError(f"All mixed engines failed; last error: {last_error}") from last_error
+
+    async def _take(self, index: int) -> Path:
+        warming = self._warming.pop(index, None)
+        if warming is not None:
+            return await warming
+        return await self._run(index)
+
+    async def _run(self, index: int) -> Path:
+        engine = self.engines[index]
+        with stage(engine_stage(engine)):
+            return await asyncio.wait_for(engine.next(), self.timeout)
+
+    def _warm_next(self) -> None:
+        index = self._select(set(), peek=True)
+        if index is None or index in self._warming:
+            return
+        task = asyncio.create_task(self._run(index))
+        # a failure is surfaced (and backed off) when the engine's turn comes
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._warming[index] = task
+        logger.debug(f"MixEngine: warming {self.names[index]}")
+
+    def _record_failure(self, index: int, error: Exception) -> None:
+        self._failures[index] += 1
+        backoff = min(BACKOFF_BASE * 2 ** (self._failures[index] - 1), BACKOFF_MAX)
+        self._skip_until[index] = _clock() + backoff
+        reason = "timed out" if isinstance(error, asyncio.TimeoutError) else f"failed ({error})"
+        logger.warning(f"MixEngine: {self.names[index]} {reason}, skipping it for {backoff:.0f}s")
 
 
 class EngineRouter:
@@ -34,14 +189,56 @@ class EngineRouter:
         self.active_name: str = name
         self.active_sequence: list[str] = sequence
         self.last_served: Path | None = None
+        self._primed: Path | None = None  # first image from a warmed-up engine
+        self._switch_listeners: list[Callable[[], None]] = []
+        self._advance: SingleFlight[Path] = SingleFlight()
+        self._generation = 0  # bumped by set_engine
+
+    def add_switch_listener(self, callback: Callable[[], None]) -> None:
+        """Register a callback run after every set_engine (e.g. to flush prefetched images)."""
+        self._switch_listeners.append(callback)
 
     async def next(self) -> Path:
-        path = await self.active_engine.next()
-        self.last_served = path
+        """
+        Advance the active engine; concurrent callers share the in-flight
+        result. An advance still running on an engine that has since been
+        switched out is discarded, and the new engine is asked instead.
+        """
+        while True:
+            generation = self._generation
+            path = await self._advance.run(self._next)
+            if generation == self._generation:
+                return path
+            logger.debug(f"Discarding {path.name} from the engine switched out mid-advance")
+
+    async def _next(self) -> Path:
+        generation = self._generation
+        path, self._primed = self._primed, None
+        if path is None:
+            with stage("router"), stage(engine_stage(self.active_engine)):
+                path = await self.active_engine.next()
+        if generation == self._generation:
+            self.last_served = path
         return path
 
-    def set_engine(self, engine: ImageEngine, name: str, sequence: list[str]) -> None:
+    def set_engine(
+        self, engine: ImageEngine, name: str, sequence: list[str], primed: Path | None = None
+    ) -> None:
+        """Swap engines; `primed` is an image the new engine already produced, served next."""
+        if self.active_engine is not engine:
+            self.close()
         self.active_engine = engine
         self.active_name = name
         self.active_sequence = sequence
+        self._primed = primed
+        # callers from now on must not join an advance on the old engine
+        self._generation += 1
+        self._advance = SingleFlight()
         logger.info(f"Engine switched to {name} (sequence: {sequence})")
+        for callback in self._switch_listeners:
+            callback()
+
+    def close(self) -> None:
+        """Cancel background work held by the active engine."""
+        if isinstance(self.active_engine, MixEngine):
+            self.active_engine.cancel_lookahead()
@@ -1,18 +1,255 @@
-from playwright.async_api import async_playwright
+from __future__ import annotations
+from trmnl.browser import BrowserPool
+from trmnl.config import settings
+from trmnl.dither import DitherMethod, save_bmp
+from trmnl.loop import run_blocking
+from trmnl.metrics import stage
+from trmnl.text_render import render_text_image
 from PIL import Image
+from dataclasses import dataclass
+from typing import Any, Iterable, Literal
+import asyncio
+import hashlib
 import io
+import json
 import logging
+import threading
+import uuid
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# "html": Chromium screenshot of an HTML document (any layout).
+# "text": Pillow text layout (heading + body only), no browser involved.
+RenderBackend = Literal["html", "text"]
+
+RENDER_CACHE_DIR = settings.paths["CACHE_DIR"] / "renders"
+RENDER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+# Bump when the screenshot -> BMP conversion changes so cached renders are invalidated.
+CONVERSION_VERSION = 1
+
+# Screenshots are captured as high-quality JPEG rather than PNG: Chromium's JPEG
+# encoder is much cheaper than its zlib-based PNG encoder, and libjpeg can decode
+# straight to grayscale (draft mode), skipping RGB conversion before dithering.
+# See scripts/bench_capture.py.
+CAPTURE_FORMAT: Literal["png", "jpeg"] = "jpeg"
+CAPTURE_QUALITY = 95
+
+_pool: BrowserPool | None = None
+_render_cache: RenderCache | None = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """
+    Shared BrowserPool for HTML rendering. The app lifespan starts and closes it;
+    standalone callers get one lazily. A pool bound to a finished event loop
+    (e.g. a previous asyncio.run) is replaced.
+    """
+    global _pool
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if _pool is None or (_pool.loop is not None and _pool.loop is not loop):
+        _pool = BrowserPool()
+    return _pool
+
+
+class RenderCache:
+    """
+    Content-addressed store of rendered BMPs. The key is a hash of the full
+    document plus every setting that affects the output, so identical renders
+    are deduplicated and any template/setting change misses the cache.
+
+    Thread-safe: lookups run in the executor.
+    """
+
+    def __init__(self, cache_dir: Path = RENDER_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(document: str, render_settings: dict[str, Any]) -> str:
+        digest = hashlib.sha256()
+        digest.update(json.dumps(render_settings, sort_keys=True).encode())
+        digest.update(b"\0")
+        digest.update(document.encode())
+        return digest.hexdigest()
+
+    def path_for(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.bmp"
+
+    def lookup(self, key: str) -> Path | None:
+        """Return the cached render for key (counting a hit) or None (counting a miss)."""
+        path = self.path_for(key)
+        found = path.exists()
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return path if found else None
+
+    def read_meta(self, key: str) -> dict[str, Any] | None:
+        """Metadata recorded alongside a render (e.g. the auto-fit font size)."""
+        try:
+            return json.loads((self.cache_dir / "meta" / f"{key}.json").read_text())
+        except (OSError, ValueError):
+            return None
+
+    def write_meta(self, key: str, meta: dict[str, Any]) -> None:
+        meta_dir = self.cache_dir / "meta"
+        meta_dir.mkdir(exist_ok=True)
+        tmp_path = meta_dir / f".{key}.json.{uuid.uuid4().hex[:8]}.tmp"
+        tmp_path.write_text(json.dumps(meta))
+        tmp_path.replace(meta_dir / f"{key}.json")
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / total if total else None,
+        }
+
+
+def get_render_cache() -> RenderCache:
+    global _render_cache
+    if _render_cache is None:
+        _render_cache = RenderCache()
+    return _render_cache
+
+
+@dataclass
+class AutoFit:
+    """
+    Auto-fit typography: the largest integer font-size (px) in [min_size, max_size]
+    at which the `selector` element's content doesn't overflow it. The search runs
+    in-page after set_content, so it costs layout passes, not screenshots. If
+    font_size is already known (recorded from an earlier render of the same
+    layout) the search is skipped; after a render it holds the chosen size.
+    """
+
+    selector: str = "#fit"
+    min_size: int = 10
+    max_size: int = 48
+    font_size: int | None = None
+
+    def settings(self) -> dict[str, Any]:
+        return {"selector": self.selector, "min": self.min_size, "max": self.max_size}
+
+
+# Binary search on font-size. Overflow is measured on the element itself, so it
+# needs a fixed size and overflow: hidden, with content centered by auto margins
+# (which, unlike justify-content: center, still overflow measurably).
+AUTOFIT_JS = """
+({selector, min, max, known}) => {
+    const el = document.querySelector(selector);
+    if (!el) return null;
+    const fits = (size) => {
+        el.style.fontSize = size + "px";
+        return el.scrollHeight <= el.clientHeight && el.scrollWidth <= el.clientWidth;
+    };
+    if (known !== null) {
+        el.style.fontSize = known + "px";
+        return known;
+    }
+    let lo = min, hi = max;
+    while (lo < hi) {
+        const mid = Math.ceil((lo + hi) / 2);
+        if (fits(mid)) lo = mid; else hi = mid - 1;
+    }
+    el.style.fontSize = lo + "px";
+    return lo;
+}
+"""
+
+
+def layout_key(
+    html_content: str, pool: BrowserPool | None = None, autofit: AutoFit | None = None
+) -> str:
+    """Hash of everything that affects layout (not conversion), for recorded fit sizes."""
+    pool = pool or get_browser_pool()
+    render_settings = {
+        "viewport": pool.viewport,
+        "autofit": autofit.settings() if autofit else None,
+    }
+    return RenderCache.key(_wrap_html(html_content), render_settings)
+
+
+def html_cache_key(
+    html_content: str,
+    pool: BrowserPool | None = None,
+    dither: DitherMethod = "floyd-steinberg",
+    autofit: AutoFit | None = None,
+) -> str:
+    pool = pool or get_browser_pool()
+    render_settings = {
+        "backend": "html",
+        "viewport": pool.viewport,
+        "autofit": autofit.settings() if autofit else None,
+        "conversion": {
+            "version": CONVERSION_VERSION,
+            "capture": CAPTURE_FORMAT,
+            "quality": CAPTURE_QUALITY,
+            "mode": "1",
+            "dither": dither,
+        },
+    }
+    return RenderCache.key(_wrap_html(html_content), render_settings)
+
+
+def text_cache_key(heading: str | None, body: str, font_size: int = 16) -> str:
+    render_settings = {"backend": "text", "font_size": font_size, "mode": "1"}
+    return RenderCache.key(f"{heading or ''}\0{body}", render_settings)
+
+
+def screenshot_options(viewport: dict[str, int]) -> dict[str, Any]:
+    """page.screenshot() kwargs: capture format, clipped to exactly the viewport."""
+    options: dict[str, Any] = {
+        "type": CAPTURE_FORMAT,
+        "clip": {"x": 0, "y": 0, "width": viewport["width"], "height": viewport["height"]},
+    }
+    if CAPTURE_FORMAT == "jpeg":
+        options["quality"] = CAPTURE_QUALITY
+    return options
 
-async def generate_bmp_from_html(
-    html_content: str, output_filename: str | Path
-) -> Path:
-    logger.info(f"Generating {output_filename} from HTML content.")
 
-    full_html = f"""
+def decode_screenshot(data: bytes) -> Image.Image:
+    """Decode captured bytes, asking libjpeg for grayscale output directly."""
+    image = Image.open(io.BytesIO(data))
+    if image.format == "JPEG":
+        image.draft("L", image.size)
+    return image
+
+
+@dataclass
+class RenderJob:
+    html_content: str
+    output_filename: str | Path
+    dither: DitherMethod = "floyd-steinberg"
+    autofit: AutoFit | None = None
+
+
+@dataclass
+class RenderResult:
+    job: RenderJob
+    path: Path | None = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _wrap_html(html_content: str) -> str:
+    return f"""
     <!DOCTYPE html>
     <html>
     <head>
@@ -27,20 +264,149 @@ async def generate_bmp_from_html(
     </html>
     """
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        page = await browser.new_page(viewport={"width": 800, "height": 480})
 
-        await page.set_content(full_html)
+def _convert_screenshot(
+    screenshot: bytes, output_filename: str | Path, dither: DitherMethod
+) -> Path:
+    return save_bmp(decode_screenshot(screenshot), output_filename, dither)
+
+
+def _render_text(
+    heading: str | None, body: str, output_filename: str | Path, font_size: int
+) -> Path:
+    return save_bmp(render_text_image(heading, body, font_size=font_size), output_filename)
+
+
+async def generate_bmp_from_html(
+    html_content: str,
+    output_filename: str | Path,
+    pool: BrowserPool | None = None,
+    dither: DitherMethod = "floyd-steinberg",
+    autofit: AutoFit | None = None,
+    cache: RenderCache | None = None,
+) -> Path:
+    """
+    Screenshot html_content at the pool's viewport and write a 1-bit BMP.
+    With autofit, the font size is fitted in-page before the screenshot and
+    recorded in the render cache's metadata, keyed by layout.
+    """
+    logger.info(f"Generating {output_filename} from HTML content.")
+
+    full_html = _wrap_html(html_content)
+    pool = pool or get_browser_pool()
+
+    fit_key = chosen = None
+    if autofit is not None:
+        cache = cache or get_render_cache()
+        fit_key = layout_key(html_content, pool, autofit)
+        if autofit.font_size is None and (meta := await run_blocking(cache.read_meta, fit_key)):
+            autofit.font_size = meta.get("font_size")
 
-        png_data: bytes = await page.screenshot()
-        await browser.close()
+    with stage("render.html"):
+        async with pool.page() as page:
+            with stage("render.html.layout"):
+                await page.set_content(full_html)
+                if autofit is not None:
+                    args = {**autofit.settings(), "known": autofit.font_size}
+                    chosen = await page.evaluate(AUTOFIT_JS, args)
+                    if chosen is None:
+                        logger.warning(f"Auto-fit element {autofit.selector!r} not found")
+            with stage("render.html.screenshot"):
+                screenshot: bytes = await page.screenshot(**screenshot_options(pool.viewport))
 
-    image = Image.open(io.BytesIO(png_data))
-    final_bmp = image.convert("1")
-    final_bmp.save(output_filename)
+        if autofit is not None and chosen is not None:
+            if autofit.font_size != chosen:
+                await run_blocking(cache.write_meta, fit_key, {"font_size": chosen})
+            autofit.font_size = chosen
+
+        with stage("render.html.convert"):
+            output_path = await run_blocking(_convert_screenshot, screenshot, output_filename, dither)
+
+    if not output_path.exists():
+        raise RuntimeError(f"Failed to create BMP file at {output_filename}")
+    return output_path
+
+
+async def generate_bmp_from_text(
+    heading: str | None, body: str, output_filename: str | Path, font_size: int = 16
+) -> Path:
+    """Render a bold heading and centered body text to a 1-bit BMP with Pillow."""
+    logger.info(f"Generating {output_filename} from text content.")
+    with stage("render.text"):
+        output_path = await run_blocking(_render_text, heading, body, output_filename, font_size)
 
-    output_path = Path(output_filename)
     if not output_path.exists():
         raise RuntimeError(f"Failed to create BMP file at {output_filename}")
     return output_path
+
+
+async def render_html_cached(
+    html_content: str,
+    cache: RenderCache | None = None,
+    pool: BrowserPool | None = None,
+    dither: DitherMethod = "floyd-steinberg",
+    autofit: AutoFit | None = None,
+) -> Path:
+    """Render HTML through the content-addressed cache; only misses hit Chromium."""
+    cache = cache or get_render_cache()
+    key = html_cache_key(html_content, pool, dither, autofit)
+    if cached := await run_blocking(cache.lookup, key):
+        logger.info(f"Render cache hit: {cached.name}")
+        return cached
+    return await generate_bmp_from_html(
+        html_content, cache.path_for(key), pool=pool, dither=dither, autofit=autofit, cache=cache
+    )
+
+
+async def render_text_cached(
+    heading: str | None,
+    body: str,
+    font_size: int = 16,
+    cache: RenderCache | None = None,
+) -> Path:
+    """Pillow text render through the content-addressed cache."""
+    cache = cache or get_render_cache()
+    key = text_cache_key(heading, body, font_size)
+    if cached := await run_blocking(cache.lookup, key):
+        logger.info(f"Render cache hit: {cached.name}")
+        return cached
+    return await generate_bmp_from_text(heading, body, cache.path_for(key), font_size)
+
+
+async def render_batch(
+    jobs: Iterable[RenderJob],
+    concurrency: int = 4,
+    pool: BrowserPool | None = None,
+    cache: RenderCache | None = None,
+) -> list[RenderResult]:
+    """
+    Render many HTML documents concurrently across pages of one browser.
+    At most `concurrency` jobs run at once (and never more than the pool's
+    page count). A failing job is recorded in its RenderResult and does not
+    stop the rest. Results come back in job order.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    pool = pool or get_browser_pool()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def run(job: RenderJob) -> RenderResult:
+        async with limit:
+            try:
+                path = await generate_bmp_from_html(
+                    job.html_content,
+                    job.output_filename,
+                    pool=pool,
+                    dither=job.dither,
+                    autofit=job.autofit,
+                    cache=cache,
+                )
+            except Exception as e:
+                logger.error(f"Render failed for {job.output_filename}: {e}")
+                return RenderResult(job=job, error=e)
+            return RenderResult(job=job, path=path)
+
+    results = await asyncio.gather(*(run(job) for job in jobs))
+    n_failed = sum(1 for r in results if not r.ok)
+    logger.info(f"Batch render done: {len(results) - n_failed} ok, {n_failed} failed")
+    return list(results)
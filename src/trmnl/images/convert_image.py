@@ -1,12 +1,17 @@
 import os
 from PIL import Image
 from pathlib import Path
+from trmnl.dither import DitherMethod, save_bmp
 
 MAX_BYTES = 90000
 BARB_IMAGE = Path(__file__).parent / "barb.png"
 
 
-def image_to_bmp(input_path: str | Path, output_filename: str = "current.bmp"):
+def image_to_bmp(
+    input_path: str | Path,
+    output_filename: str = "current.bmp",
+    method: DitherMethod = "floyd-steinberg",
+):
     input_path = str(input_path)
     # 1. Load source image (any format Pillow supports)
     image = Image.open(input_path)
@@ -16,11 +21,9 @@ def image_to_bmp(input_path: str | Path, output_filename: str = "current.bmp"):
     # If you want to preserve aspect ratio, we can change this later.
     image = image.resize((800, 480))
 
-    # 3. Convert to 1-bit with Floyd–Steinberg dithering (same as html_to_bmp)
-    final_bmp = image.convert("1")
-
-    # 5. Save as BMP
-    final_bmp.save(output_filename)
+    # 3. Convert to 1-bit (Floyd–Steinberg by default, same as html_to_bmp)
+    #    and write the packed BMP
+    save_bmp(image, output_filename, method)
 
     # 6. Enforce TRMNL’s 90 KB limit (defensive)
     size = os.path.getsize(output_filename)
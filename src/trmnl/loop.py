@@ -0,0 +1,134 @@
+# src/trmnl/loop.py
+"""
+Event-loop hygiene: a managed executor for blocking file/image work,
+single-flight coalescing for concurrent callers, and a monitor that notices
+when something blocks the loop anyway.
+"""
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Awaitable, Callable, Generic, TypeVar
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+BLOCKING_WORKERS = 4
+LAG_CHECK_INTERVAL = 0.5  # seconds between monitor ticks
+LAG_THRESHOLD = 0.1  # seconds of extra delay that count as a stall
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=BLOCKING_WORKERS, thread_name_prefix="trmnl-blocking"
+        )
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run blocking file I/O or Pillow work in the managed executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(fn, *args, **kwargs))
+
+
+class SingleFlight(Generic[T]):
+    """
+    Runs one call at a time under a lock. Callers arriving while a call is in
+    flight await that same result instead of starting duplicate work. The
+    shared task is shielded, so one caller going away (e.g. a client
+    disconnect) doesn't cancel it for the others.
+    """
+
+    def __init__(self) -> None:
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task[T] | None = None
+
+    @property
+    def in_flight(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def run(self, fn: Callable[[], Awaitable[T]]) -> T:
+        if not self.in_flight:
+            self._task = asyncio.ensure_future(self._locked(fn))
+            # mark the outcome retrieved even if every caller was cancelled
+            self._task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return await asyncio.shield(self._task)
+
+    async def _locked(self, fn: Callable[[], Awaitable[T]]) -> T:
+        async with self._lock:
+            return await fn()
+
+
+class LoopLagMonitor:
+    """
+    Sleeps for `interval` in a loop and measures how late it wakes up. Any
+    extra delay above `threshold` means something held the event loop, and
+    is logged and kept in a short history of stalls.
+    """
+
+    def __init__(
+        self,
+        interval: float = LAG_CHECK_INTERVAL,
+        threshold: float = LAG_THRESHOLD,
+        history: int = 20,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.stalls = 0
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self.recent: deque[dict[str, float]] = deque(maxlen=history)
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "stalls": self.stalls,
+            "threshold_ms": round(self.threshold * 1000, 1),
+            "last_lag_ms": round(self.last_lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "recent": list(self.recent),
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record(loop.time() - start - self.interval)
+
+    def record(self, lag: float) -> None:
+        lag = max(lag, 0.0)
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        if lag > self.threshold:
+            self.stalls += 1
+            self.recent.append({"at": time.time(), "lag_ms": round(lag * 1000, 1)})
+            logger.warning(f"Event loop stalled for {lag * 1000:.0f} ms")
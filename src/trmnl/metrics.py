@@ -0,0 +1,113 @@
+# src/trmnl/metrics.py
+"""
+In-process metrics in the Prometheus text exposition format, so /metrics can
+be scraped (or just curl'd) without a client library or external service.
+
+Two histograms cover latency: one per HTTP route, and one per pipeline stage
+(router, engines, LLM calls, browser launch, screenshot, dithering, staging).
+Gauges such as cache hit ratio and prefetch depth are read at scrape time.
+"""
+from __future__ import annotations
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Iterable, Iterator
+import math
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _labels(pairs: Iterable[tuple[str, str]]) -> str:
+    body = ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+    return f"{{{body}}}" if body else ""
+
+
+def _number(value: float | None) -> str:
+    if value is None or math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the wall time of the block, including across awaits."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in sorted(self._series.items()):
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                le = _labels([*pairs, ("le", _number(bound))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(pairs)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(pairs)} {count}")
+        return lines
+
+
+def sample_lines(
+    name: str, help: str, kind: str, samples: Iterable[tuple[dict[str, str], float | None]]
+) -> list[str]:
+    """A gauge or counter family from (labels, value) pairs computed at scrape time."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(labels.items())} {_number(value)}")
+    return lines
+
+
+REQUEST_LATENCY = Histogram(
+    "trmnl_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route", "status"),
+)
+STAGE_LATENCY = Histogram(
+    "trmnl_stage_duration_seconds",
+    "Time spent in each stage of producing an image.",
+    ("stage",),
+)
+
+
+def stage(name: str):
+    """Time a pipeline stage: `with stage("render.screenshot"): ...`."""
+    return STAGE_LATENCY.time(stage=name)
+
+
+def render(extra: Iterable[list[str]] = ()) -> str:
+    families = [REQUEST_LATENCY.render(), STAGE_LATENCY.render(), *extra]
+    return "\n".join(line for family in families for line in family) + "\n"
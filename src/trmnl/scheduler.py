@@ -0,0 +1,109 @@
+# src/trmnl/scheduler.py
+"""
+Optional server-side clock for advancing carousels. When enabled, each device
+is advanced at wall-clock multiples of its interval (on the minute for 60 s),
+so engine work happens ahead of the poll and /api/display only hands out the
+image that is already staged.
+
+Intervals come from `schedule.intervals` in config.yaml, keyed by engine name
+(the device's active engine, "mix" included), and fall back to the device's
+refresh interval.
+"""
+from __future__ import annotations
+from typing import Any
+import asyncio
+import logging
+import math
+import time
+
+from trmnl.devices import Device, DeviceManager
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on how long the loop sleeps, so new devices and interval
+# changes are picked up promptly.
+SCHEDULER_TICK = 1.0
+
+_clock = time.time
+
+
+def next_boundary(now: float, interval: int) -> float:
+    """The next wall-clock multiple of interval strictly after now."""
+    return (math.floor(now / interval) + 1) * interval
+
+
+class Scheduler:
+    def __init__(self, devices: DeviceManager, intervals: dict[str, int] | None = None):
+        self.devices = devices
+        self.intervals: dict[str, int] = dict(intervals or {})
+        self.advanced = 0
+        self.failures = 0
+        self._due: dict[str, tuple[int, float]] = {}  # device id -> (interval, due at)
+        self._task: asyncio.Task | None = None
+        self._advances: set[asyncio.Task] = set()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def interval_for(self, device: Device) -> int:
+        return max(int(self.intervals.get(device.router.active_name, device.refresh_interval)), 1)
+
+    def start(self) -> None:
+        if not self.running:
+            self._due.clear()
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Scheduler started (intervals: {self.intervals or 'refresh interval'})")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Scheduler stopped")
+        for task in list(self._advances):
+            task.cancel()
+        for device in self.devices:
+            device.scheduled = False
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "enabled": self.running,
+            "intervals": self.intervals,
+            "advanced": self.advanced,
+            "failures": self.failures,
+            "devices": {
+                device_id: {"interval": interval, "next_at": due}
+                for device_id, (interval, due) in self._due.items()
+            },
+        }
+
+    async def _run(self) -> None:
+        while True:
+            now = _clock()
+            for device in self.devices:
+                device.scheduled = True
+                interval = self.interval_for(device)
+                current = self._due.get(device.id)
+                if current is None or current[0] != interval:
+                    self._due[device.id] = (interval, next_boundary(now, interval))
+                elif now >= current[1]:
+                    self._due[device.id] = (interval, next_boundary(now, interval))
+                    task = asyncio.create_task(self._advance(device))
+                    self._advances.add(task)
+                    task.add_done_callback(self._advances.discard)
+            soonest = min((due for _, due in self._due.values()), default=now + SCHEDULER_TICK)
+            await asyncio.sleep(min(max(soonest - now, 0.0), SCHEDULER_TICK))
+
+    async def _advance(self, device: Device) -> None:
+        try:
+            image = await device.carousel.next()
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Scheduled advance failed for {device.id}: {e}")
+            return
+        self.advanced += 1
+        logger.info(f"Scheduled advance for {device.id} -> {image.filename}")
@@ -0,0 +1,168 @@
+# src/trmnl/swap.py
+"""
+Engine hot swap for the control API.
+
+Building an engine can block for seconds (PoemEngine reads the whole poem
+dataset with pandas on import), so construction runs in the executor. The new
+engine then produces its first image, and only after that is it swapped into
+the router, so devices keep being served by the old engine in the meantime.
+Swaps run one at a time, in the order they were requested, as jobs the caller
+can wait on or poll.
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+import asyncio
+import logging
+import time
+import uuid
+
+from trmnl.engines.router import ENGINE_TIMEOUT, MixEngine
+from trmnl.loop import run_blocking
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from trmnl.carousel import ImageEngine
+
+logger = logging.getLogger(__name__)
+
+JOB_HISTORY = 20  # finished jobs kept for polling
+WARMUP_TIMEOUT = ENGINE_TIMEOUT
+
+BuiltEngine = tuple["ImageEngine", str, list[str]]
+
+
+@dataclass
+class SwapJob:
+    id: str
+    kind: str
+    state: str = "queued"  # queued -> building -> warming -> done | failed
+    created: float = field(default_factory=time.time)
+    finished: float | None = None
+    result: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+    exception: Exception | None = field(default=None, repr=False)
+    task: asyncio.Task | None = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.state in ("done", "failed")
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "state": self.state,
+            "created": self.created,
+            "finished": self.finished,
+            "error": self.error,
+        }
+
+
+async def build_and_warm(
+    job: SwapJob, build: Callable[[], BuiltEngine], current: ImageEngine | None = None
+) -> tuple[ImageEngine, str, list[str], Path | None]:
+    """
+    Construct an engine off the loop, then take its first image. A failed
+    warm-up doesn't block the swap: the engine goes in cold and its errors
+    surface on the next advance, as they would have before.
+
+    If the build hands back `current` (the engine cache returned the one the
+    router already runs), it is not warmed: that would draw an image outside
+    the router and, once swapped, flush the router's prefetched images.
+    """
+    job.state = "building"
+    engine, name, sequence = await run_blocking(build)
+    if engine is current:
+        return engine, name, sequence, None
+    job.state = "warming"
+    try:
+        primed = await asyncio.wait_for(engine.next(), WARMUP_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Warm-up of {name} failed, swapping it in cold: {e}")
+        primed = None
+    return engine, name, sequence, primed
+
+
+async def build_all(
+    job: SwapJob,
+    builds: list[Callable[[], BuiltEngine]],
+    in_use: Callable[[ImageEngine], bool] = lambda engine: False,
+    current: list[ImageEngine | None] | None = None,
+) -> list[tuple[ImageEngine, str, list[str], Path | None]]:
+    """
+    build_and_warm each build concurrently (`current` gives each one's
+    running engine, if any). If one fails, the rest are
+    cancelled, and engines that were already warmed (and so may have
+    look-ahead running) are shut down unless `in_use` says a router has them.
+    """
+    current = current or [None] * len(builds)
+    tasks = [
+        asyncio.ensure_future(build_and_warm(job, build, engine))
+        for build, engine in zip(builds, current)
+    ]
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        for result in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(result, tuple) and not in_use(result[0]):
+                discard(result[0])
+        raise
+
+
+def discard(engine: ImageEngine) -> None:
+    """Stop background work on an engine that won't be swapped in."""
+    if isinstance(engine, MixEngine):
+        engine.cancel_lookahead()
+
+
+class EngineSwapper:
+    def __init__(self, history: int = JOB_HISTORY):
+        self.history = history
+        self._jobs: OrderedDict[str, SwapJob] = OrderedDict()
+        self._lock = asyncio.Lock()  # FIFO, so the last request wins
+
+    def submit(self, kind: str, work: Callable[[SwapJob], Awaitable[dict[str, Any]]]) -> SwapJob:
+        job = SwapJob(uuid.uuid4().hex[:12], kind)
+        job.task = asyncio.create_task(self._run(job, work))
+        self._jobs[job.id] = job
+        finished = [j for j in self._jobs.values() if j.done]
+        for old in finished[: max(len(finished) - self.history, 0)]:
+            del self._jobs[old.id]
+        return job
+
+    def get(self, job_id: str) -> SwapJob | None:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> list[SwapJob]:
+        return list(self._jobs.values())
+
+    async def wait(self, job: SwapJob, timeout: float | None) -> bool:
+        """Wait up to `timeout` for the job; returns whether it finished."""
+        if job.task is not None and not job.done:
+            await asyncio.wait({job.task}, timeout=timeout)
+        return job.done
+
+    async def stop(self) -> None:
+        for job in self._jobs.values():
+            if job.task is not None and not job.task.done():
+                job.task.cancel()
+        await asyncio.gather(*(j.task for j in self._jobs.values() if j.task), return_exceptions=True)
+
+    async def _run(self, job: SwapJob, work: Callable[[SwapJob], Awaitable[dict[str, Any]]]) -> None:
+        async with self._lock:
+            try:
+                job.result = await work(job)
+                job.state = "done"
+                logger.info(f"Swap job {job.id} ({job.kind}) done: {job.result}")
+            except asyncio.CancelledError:
+                job.state, job.error = "failed", "cancelled"
+                raise
+            except Exception as e:
+                job.state, job.error, job.exception = "failed", str(e), e
+                logger.error(f"Swap job {job.id} ({job.kind}) failed: {e}")
+            finally:
+                job.finished = time.time()
@@ -0,0 +1,275 @@
+# src/trmnl/telemetry.py
+"""
+Device telemetry from /api/log: battery, Wi-Fi signal, refresh and heap stats.
+
+Payloads are parsed once into typed samples and handed to a queue; a
+background task drains it in batches into per-device, per-metric series.
+Each series is two fixed-size array-backed rings: recent raw samples, and
+hourly buckets (mean/min/max/count) that go back much further. Memory is
+bounded however long the server runs, and however many device IDs report:
+past MAX_DEVICES, the least recently seen device is dropped.
+"""
+from __future__ import annotations
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Iterator
+import asyncio
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+RAW_CAPACITY = 1024  # raw samples kept per device and metric
+BUCKET_SECONDS = 3600
+BUCKET_CAPACITY = 24 * 90  # ~90 days of hourly buckets
+QUEUE_SIZE = 1000
+BATCH_SIZE = 100
+MAX_DEVICES = 64
+
+# firmware field -> metric name
+_FIELDS = {
+    "battery_voltage": "battery_voltage",
+    "wifi_rssi_level": "rssi",
+    "refresh_rate": "refresh_rate",
+    "time_since_last_sleep_start": "awake_seconds",
+    "free_heap_size": "free_heap",
+}
+METRICS: tuple[str, ...] = tuple(_FIELDS.values())
+
+
+@dataclass(frozen=True)
+class TelemetrySample:
+    device: str
+    timestamp: float
+    metric: str
+    value: float
+
+
+def parse_log_payload(
+    payload: Any, device_id: str | None, received: float | None = None
+) -> list[TelemetrySample]:
+    """
+    Pull numeric stats out of a device log. Accepts the firmware's
+    {"log": {"logs_array": [{"device_status_stamp": {...}, "creation_timestamp": ...}]}}
+    shape as well as a flat dict of fields; anything unrecognised is ignored.
+    """
+    received = time.time() if received is None else received
+    device = device_id or "unknown"
+    if isinstance(payload, dict) and isinstance(payload.get("log"), dict):
+        payload = payload["log"]
+    entries = payload.get("logs_array", [payload]) if isinstance(payload, dict) else []
+    if not isinstance(entries, list):
+        entries = []
+
+    samples = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        stamp = entry.get("device_status_stamp", entry)
+        if not isinstance(stamp, dict):
+            continue
+        timestamp = _number(entry.get("creation_timestamp"))
+        # devices without a synced clock report small uptime-ish values
+        if timestamp is None or timestamp < 1_000_000_000:
+            timestamp = received
+        for field, metric in _FIELDS.items():
+            value = _number(stamp.get(field))
+            if value is not None:
+                samples.append(TelemetrySample(device, timestamp, metric, value))
+    return samples
+
+
+def _number(value: Any) -> float | None:
+    if isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+class Ring:
+    """
+    Fixed-capacity ring of (time, *fields) rows stored in flat float arrays.
+    The arrays grow as rows arrive until they reach capacity, then wrap.
+    """
+
+    def __init__(self, capacity: int, width: int = 1):
+        self.capacity = capacity
+        self.width = width
+        self._times = array("d")
+        self._values = array("d")
+        self._next = 0
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def append(self, timestamp: float, *values: float) -> None:
+        if len(self._times) < self.capacity:
+            self._times.append(timestamp)
+            self._values.extend(values)
+        else:
+            self._times[self._next] = timestamp
+            base = self._next * self.width
+            self._values[base : base + self.width] = array("d", values)
+        self._next = (self._next + 1) % self.capacity
+
+    def rows(self, since: float = 0.0) -> Iterator[tuple[float, ...]]:
+        """Rows oldest first, skipping any before `since`."""
+        size = len(self._times)
+        start = self._next if size == self.capacity else 0
+        for i in range(size):
+            slot = (start + i) % size
+            if self._times[slot] >= since:
+                base = slot * self.width
+                yield (self._times[slot], *self._values[base : base + self.width])
+
+
+class Series:
+    """Raw samples plus hourly downsampled buckets for one device metric."""
+
+    def __init__(self, raw_capacity: int = RAW_CAPACITY, bucket_capacity: int = BUCKET_CAPACITY):
+        self.raw = Ring(raw_capacity)
+        self.buckets = Ring(bucket_capacity, width=4)  # mean, min, max, count
+        self.latest: tuple[float, float] | None = None
+        self._bucket_start: float | None = None
+        self._sum = self._min = self._max = 0.0
+        self._count = 0
+
+    def add(self, timestamp: float, value: float) -> None:
+        self.raw.append(timestamp, value)
+        if self.latest is None or timestamp >= self.latest[0]:
+            self.latest = (timestamp, value)
+        start = timestamp - timestamp % BUCKET_SECONDS
+        if self._bucket_start is not None and start > self._bucket_start:
+            self._flush()
+        if self._bucket_start is None or start > self._bucket_start:
+            self._bucket_start = start
+            self._sum, self._min, self._max, self._count = 0.0, value, value, 0
+        # late samples from an older hour are folded into the open bucket
+        self._sum += value
+        self._min = min(self._min, value)
+        self._max = max(self._max, value)
+        self._count += 1
+
+    def _flush(self) -> None:
+        if self._count:
+            self.buckets.append(
+                self._bucket_start, self._sum / self._count, self._min, self._max, self._count
+            )
+
+    def hourly(self, since: float = 0.0) -> list[tuple[float, ...]]:
+        rows = list(self.buckets.rows(since))
+        if self._count and self._bucket_start is not None and self._bucket_start >= since:
+            rows.append(
+                (self._bucket_start, self._sum / self._count, self._min, self._max, self._count)
+            )
+        return rows
+
+
+class TelemetryStore:
+    def __init__(self, queue_size: int = QUEUE_SIZE, max_devices: int = MAX_DEVICES):
+        self.max_devices = max_devices
+        # least recently seen device first
+        self.series: OrderedDict[str, dict[str, Series]] = OrderedDict()
+        self.dropped = 0
+        self.evicted_devices = 0
+        self._queue: asyncio.Queue[TelemetrySample] = asyncio.Queue(maxsize=queue_size)
+        self._task: asyncio.Task | None = None
+
+    def submit(self, samples: list[TelemetrySample]) -> None:
+        """Queue samples without waiting; the oldest queued ones go if the writer falls behind."""
+        for sample in samples:
+            if self._queue.full():
+                self._queue.get_nowait()
+                self.dropped += 1
+            self._queue.put_nowait(sample)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._drain_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.flush()
+
+    def flush(self) -> int:
+        """Write everything queued so far; returns how many samples were stored."""
+        written = 0
+        while not self._queue.empty():
+            self._store(self._queue.get_nowait())
+            written += 1
+        return written
+
+    async def _drain_loop(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < BATCH_SIZE and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            for sample in batch:
+                self._store(sample)
+
+    def _store(self, sample: TelemetrySample) -> None:
+        device = self.series.get(sample.device)
+        if device is None:
+            if len(self.series) >= self.max_devices:
+                evicted, _ = self.series.popitem(last=False)
+                self.evicted_devices += 1
+                logger.info(f"Telemetry: dropped least recently seen device {evicted}")
+            device = self.series[sample.device] = {}
+        else:
+            self.series.move_to_end(sample.device)
+        series = device.get(sample.metric)
+        if series is None:
+            series = device[sample.metric] = Series()
+        series.add(sample.timestamp, sample.value)
+
+    def query(
+        self,
+        device: str | None = None,
+        metric: str | None = None,
+        since: float = 0.0,
+        resolution: str = "raw",
+    ) -> dict[str, dict[str, dict[str, Any]]]:
+        """
+        {device: {metric: {latest, min, max, mean, points}}} for the window.
+        Raw points are [time, value]; hourly points are [time, mean, min, max, count].
+        """
+        result: dict[str, dict[str, dict[str, Any]]] = {}
+        for device_id, metrics in self.series.items():
+            if device is not None and device_id != device:
+                continue
+            for name, series in metrics.items():
+                if metric is not None and name != metric:
+                    continue
+                if resolution == "hourly":
+                    points = [list(row) for row in series.hourly(since)]
+                    count = sum(row[4] for row in points)
+                    summary = {
+                        "min": min((row[2] for row in points), default=None),
+                        "max": max((row[3] for row in points), default=None),
+                        "mean": sum(row[1] * row[4] for row in points) / count if count else None,
+                    }
+                else:
+                    points = [list(row) for row in series.raw.rows(since)]
+                    values = [row[1] for row in points]
+                    summary = {
+                        "min": min(values, default=None),
+                        "max": max(values, default=None),
+                        "mean": sum(values) / len(values) if values else None,
+                    }
+                result.setdefault(device_id, {})[name] = {
+                    "latest": list(series.latest) if series.latest else None,
+                    **summary,
+                    "points": points,
+                }
+        return result
@@ -0,0 +1,171 @@
+# src/trmnl/text_render.py
+"""
+Browser-free text layout for text-only engines.
+Lays out a bold heading and body text with Pillow and draws straight onto an
+800x480 1-bit canvas, so no Chromium process is involved.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from functools import lru_cache
+import logging
+
+from PIL import Image, ImageDraw, ImageFont
+
+logger = logging.getLogger(__name__)
+
+WIDTH, HEIGHT = 800, 480
+FONT_CANDIDATES: dict[bool, list[str]] = {
+    False: [
+        "DejaVuSans.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+        "/usr/share/fonts/TTF/DejaVuSans.ttf",
+        "/Library/Fonts/Arial.ttf",
+        "Arial.ttf",
+    ],
+    True: [
+        "DejaVuSans-Bold.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+        "/usr/share/fonts/TTF/DejaVuSans-Bold.ttf",
+        "/Library/Fonts/Arial Bold.ttf",
+        "Arial Bold.ttf",
+    ],
+}
+
+
+@dataclass
+class FontMetrics:
+    """
+    A loaded font plus a per-glyph advance cache. Line widths are the sum of
+    cached advances, so measuring while wrapping never goes back to FreeType
+    for a glyph it has already seen.
+    """
+
+    font: ImageFont.FreeTypeFont | ImageFont.ImageFont
+    fake_bold: bool = False
+    _advances: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def line_height(self) -> int:
+        ascent, descent = self.font.getmetrics()
+        return ascent + descent
+
+    def width(self, text: str) -> float:
+        advances = self._advances
+        total = 0.0
+        for ch in text:
+            adv = advances.get(ch)
+            if adv is None:
+                adv = advances[ch] = self.font.getlength(ch)
+            total += adv
+        return total + (1 if self.fake_bold and text else 0)
+
+
+@lru_cache(maxsize=64)
+def get_font(size: int, bold: bool = False) -> FontMetrics:
+    """Load (once per size/weight) the first available candidate font."""
+    for candidate in FONT_CANDIDATES[bold]:
+        try:
+            return FontMetrics(ImageFont.truetype(candidate, size))
+        except OSError:
+            continue
+    if bold:
+        # No bold face installed: reuse the regular face and overstrike it.
+        regular = get_font(size, bold=False)
+        return FontMetrics(regular.font, fake_bold=True)
+    logger.warning("No TrueType font found, falling back to Pillow's default font")
+    return FontMetrics(ImageFont.load_default(size))
+
+
+def wrap_line(text: str, metrics: FontMetrics, max_width: float) -> list[str]:
+    """Greedy word wrap; words wider than max_width are split by character."""
+    if not text.strip():
+        return [""]
+    lines: list[str] = []
+    current = ""
+    for word in text.split():
+        candidate = f"{current} {word}" if current else word
+        if metrics.width(candidate) <= max_width:
+            current = candidate
+            continue
+        if current:
+            lines.append(current)
+        # at least one character per line, even a glyph wider than max_width
+        while len(word) > 1 and metrics.width(word) > max_width:
+            cut = len(word) - 1
+            while cut > 1 and metrics.width(word[:cut]) > max_width:
+                cut -= 1
+            lines.append(word[:cut])
+            word = word[cut:]
+        current = word
+    lines.append(current)
+    return lines
+
+
+@dataclass
+class _Line:
+    text: str
+    metrics: FontMetrics
+
+
+def layout_text(
+    heading: str | None,
+    body: str,
+    font_size: int = 16,
+    heading_size: int | None = None,
+    margin: int = 24,
+    width: int = WIDTH,
+) -> list[_Line]:
+    """Wrap a bold heading and body text into drawable lines."""
+    body_metrics = get_font(font_size)
+    heading_metrics = get_font(heading_size or font_size, bold=True)
+    max_width = width - 2 * margin
+
+    lines: list[_Line] = []
+    if heading:
+        for text in wrap_line(heading, heading_metrics, max_width):
+            lines.append(_Line(text, heading_metrics))
+        lines.append(_Line("", body_metrics))  # blank line between heading and body
+    for raw in body.split("\n"):
+        for text in wrap_line(raw, body_metrics, max_width):
+            lines.append(_Line(text, body_metrics))
+    return lines
+
+
+def render_text_image(
+    heading: str | None,
+    body: str,
+    font_size: int = 16,
+    heading_size: int | None = None,
+    margin: int = 24,
+    size: tuple[int, int] = (WIDTH, HEIGHT),
+) -> Image.Image:
+    """
+    Draw centered heading + body onto a white 1-bit canvas. Lines that don't
+    fit vertically are dropped, matching the HTML template's overflow: hidden.
+    """
+    width, height = size
+    lines = layout_text(heading, body, font_size, heading_size, margin, width=width)
+
+    fitted: list[_Line] = []
+    used = 0
+    for line in lines:
+        h = line.metrics.line_height
+        if used + h > height - 2 * margin:
+            dropped = len(lines) - len(fitted)
+            logger.warning(f"Text overflows {width}x{height}, dropping {dropped} lines")
+            break
+        fitted.append(line)
+        used += h
+
+    image = Image.new("1", size, 1)
+    draw = ImageDraw.Draw(image)
+    y = (height - used) // 2
+    for line in fitted:
+        if line.text:
+            x = (width - line.metrics.width(line.text)) / 2
+            draw.text((x, y), line.text, font=line.metrics.font, fill=0)
+            if line.metrics.fake_bold:
+                draw.text((x + 1, y), line.text, font=line.metrics.font, fill=0)
+        y += line.metrics.line_height
+    return image
+
@@ -1 +1,12 @@
 from __future__ import annotations
+import pytest
+
+from trmnl.engines.registry import get_engine_cache
+
+
+@pytest.fixture(autouse=True)
+def _fresh_engine_cache():
+    """Engines cached by one test must not leak into the next."""
+    get_engine_cache().invalidate()
+    yield
+    get_engine_cache().invalidate()
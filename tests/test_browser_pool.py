@@ -0,0 +1,121 @@
+# tests/test_browser_pool.py
+from __future__ import annotations
+import asyncio
+import pytest
+from unittest.mock import patch
+import trmnl.browser as browser_mod
+from trmnl.browser import BrowserPool
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+    async def evaluate(self, _expr):
+        return 1
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.pages: list[FakePage] = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_page(self, viewport=None):
+        page = FakePage()
+        self.pages.append(page)
+        return page
+
+    async def close(self):
+        self.connected = False
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.browsers: list[FakeBrowser] = []
+        self.chromium = self
+
+    async def launch(self):
+        browser = FakeBrowser()
+        self.browsers.append(browser)
+        return browser
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        pass
+
+
+@pytest.fixture
+def fake_playwright():
+    fake = FakePlaywright()
+    with patch.object(browser_mod, "async_playwright", return_value=fake):
+        yield fake
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_pages(fake_playwright):
+    pool = BrowserPool(size=2)
+    async with pool.page() as first:
+        pass
+    async with pool.page() as second:
+        pass
+    assert first is second
+    assert pool.launches == 1
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_bounds_concurrent_pages(fake_playwright):
+    pool = BrowserPool(size=2)
+    active = 0
+    peak = 0
+
+    async def borrow():
+        nonlocal active, peak
+        async with pool.page():
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*(borrow() for _ in range(6)))
+    assert peak == 2
+    assert len(fake_playwright.browsers[0].pages) == 2
+
+
+@pytest.mark.asyncio
+async def test_pool_discards_page_on_error(fake_playwright):
+    pool = BrowserPool(size=1)
+    with pytest.raises(RuntimeError):
+        async with pool.page() as page:
+            raise RuntimeError("render failed")
+    assert page.closed
+    async with pool.page() as fresh:
+        assert fresh is not page
+
+
+@pytest.mark.asyncio
+async def test_pool_relaunches_after_crash(fake_playwright):
+    pool = BrowserPool(size=1)
+    await pool.start()
+    fake_playwright.browsers[0].connected = False
+
+    async with pool.page():
+        pass
+    assert pool.launches == 2
+    assert fake_playwright.browsers[1].is_connected()
+
+
+def test_pool_size_must_be_positive():
+    with pytest.raises(ValueError, match="at least 1"):
+        BrowserPool(size=0)
@@ -0,0 +1,277 @@
+# tests/test_carousel.py
+from __future__ import annotations
+import asyncio
+import pytest
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+import trmnl.carousel as carousel_mod
+from trmnl.carousel import Carousel
+from trmnl.engines.router import EngineRouter
+
+
+def _source_images(tmp_path: Path, names: list[str]) -> list[Path]:
+    src_dir = tmp_path / "src"
+    src_dir.mkdir(exist_ok=True)
+    paths = []
+    for name in names:
+        path = src_dir / f"{name}.bmp"
+        path.write_bytes(f"BM {name}".encode())
+        paths.append(path)
+    return paths
+
+
+@pytest.fixture
+def working_dir(tmp_path):
+    d = tmp_path / "working"
+    d.mkdir()
+    return d
+
+
+@pytest.mark.asyncio
+async def test_next_without_prefetch_calls_engine(tmp_path, working_dir):
+    (a,) = _source_images(tmp_path, ["a"])
+    engine = MagicMock()
+    engine.next = AsyncMock(return_value=a)
+
+    carousel = Carousel(engine, working_dir=working_dir, prefetch_depth=0)
+    image = await carousel.next()
+
+    assert image.path.parent == working_dir
+    assert image.path.read_bytes() == b"BM a"
+    assert len(list(working_dir.glob("*.bmp"))) == 1
+
+
+@pytest.mark.asyncio
+async def test_current_is_served_from_memory(tmp_path, working_dir, monkeypatch):
+    (a,) = _source_images(tmp_path, ["a"])
+    engine = MagicMock()
+    engine.next = AsyncMock(return_value=a)
+
+    carousel = Carousel(engine, working_dir=working_dir, prefetch_depth=0)
+    staged = await carousel.next()
+
+    blocking = AsyncMock()
+    monkeypatch.setattr(carousel_mod, "run_blocking", blocking)
+    current = await carousel.current()
+
+    assert current is staged
+    assert current.data == b"BM a"
+    assert current.etag is not None
+    blocking.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_next_stages_hardlink_and_retires_previous(tmp_path, working_dir):
+    a, b = _source_images(tmp_path, ["a", "b"])
+    (working_dir / "leftover.bmp").write_bytes(b"old run")
+    engine = MagicMock()
+    engine.next = AsyncMock(side_effect=[a, b])
+
+    carousel = Carousel(engine, working_dir=working_dir, prefetch_depth=0, history=1)
+    first = await carousel.next()
+    assert first.path.stat().st_ino == a.stat().st_ino
+    assert list(working_dir.glob("*.bmp")) == [first.path]
+
+    second = await carousel.next()
+    assert not first.path.exists()
+    assert list(working_dir.glob("*.bmp")) == [second.path]
+    assert (await carousel.current()).data == b"BM b"
+
+
+@pytest.mark.asyncio
+async def test_recent_images_stay_servable_until_evicted(tmp_path, working_dir):
+    paths = _source_images(tmp_path, ["a", "b", "c"])
+    engine = MagicMock()
+    engine.next = AsyncMock(side_effect=paths)
+
+    carousel = Carousel(engine, working_dir=working_dir, prefetch_depth=0, history=2)
+    a, b = await carousel.next(), await carousel.next()
+    assert carousel.lookup(a.filename) is a
+    assert carousel.lookup(b.filename) is b
+
+    c = await carousel.next()
+    assert carousel.lookup(a.filename) is None
+    assert carousel.lookup(c.filename).data == b"BM c"
+    assert not a.path.exists()
+    assert sorted(working_dir.glob("*.bmp")) == sorted([b.path, c.path])
+
+
+@pytest.mark.asyncio
+async def test_stage_falls_back_to_copy(tmp_path, working_dir, monkeypatch):
+    (a,) = _source_images(tmp_path, ["a"])
+
+    def no_link(src, dest):
+        raise OSError("cross-device link")
+
+    monkeypatch.setattr(carousel_mod.os, "link", no_link)
+    engine = MagicMock()
+    engine.next = AsyncMock(return_value=a)
+
+    image = await Carousel(engine, working_dir=working_dir, prefetch_depth=0).next()
+    assert image.path.read_bytes() == b"BM a"
+    assert image.path.stat().st_ino != a.stat().st_ino
+
+
+@pytest.mark.asyncio
+async def test_memory_only_carousel(tmp_path):
+    (a,) = _source_images(tmp_path, ["a"])
+    engine = MagicMock()
+    engine.next = AsyncMock(return_value=a)
+
+    carousel = Carousel(engine, working_dir=None, prefetch_depth=0)
+    image = await carousel.next()
+    assert image.data == b"BM a"
+    assert image.image_url.endswith(image.path.name)
+    assert await carousel.current() is image
+
+
+@pytest.mark.asyncio
+async def test_current_recovers_from_working_dir(working_dir):
+    (working_dir / "previous.bmp").write_bytes(b"BM previous")
+    carousel = Carousel(MagicMock(), working_dir=working_dir, prefetch_depth=0)
+    image = await carousel.current()
+    assert image.filename == "previous"
+    assert image.data == b"BM previous"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_next_shares_one_advance(tmp_path, working_dir):
+    (a,) = _source_images(tmp_path, ["a"])
+
+    async def slow_next():
+        await asyncio.sleep(0.01)
+        return a
+
+    engine = MagicMock()
+    engine.next = AsyncMock(side_effect=slow_next)
+
+    carousel = Carousel(engine, working_dir=working_dir, prefetch_depth=0)
+    images = await asyncio.gather(*(carousel.next() for _ in range(4)))
+    assert len({image.filename for image in images}) == 1
+    assert engine.next.await_count == 1
+    assert list(working_dir.glob("*.bmp")) == [images[0].path]
+
+
+@pytest.mark.asyncio
+async def test_prefetch_fills_buffer(tmp_path, working_dir):
+    paths = _source_images(tmp_path, ["a", "b", "c", "d"])
+    engine = MagicMock()
+    engine.next = AsyncMock(side_effect=paths)
+
+    carousel = Carousel(engine, working_dir=working_dir, prefetch_depth=2)
+    carousel.start()
+    for _ in range(20):
+        if carousel.prefetch_status()["depth"] == 2:
+            break
+        await asyncio.sleep(0.01)
+    assert carousel.prefetch_status() == {"enabled": True, "depth": 2, "capacity": 2}
+
+    image = await carousel.next()
+    assert image.path.read_bytes() == b"BM a"
+    await carousel.stop()
+
+
+@pytest.mark.asyncio
+async def test_prefetch_surfaces_engine_errors(tmp_path, working_dir, monkeypatch):
+    monkeypatch.setattr(carousel_mod, "PREFETCH_RETRY_DELAY", 0.01)
+    (a,) = _source_images(tmp_path, ["a"])
+    engine = MagicMock()
+    engine.next = AsyncMock(side_effect=[RuntimeError("engine down"), a])
+
+    carousel = Carousel(engine, working_dir=working_dir, prefetch_depth=1)
+    carousel.start()
+    with pytest.raises(RuntimeError, match="engine down"):
+        await carousel.next()
+    image = await carousel.next()
+    assert image.path.read_bytes() == b"BM a"
+    await carousel.stop()
+
+
+@pytest.mark.asyncio
+async def test_prefetch_drops_errors_once_the_engine_recovers(tmp_path, working_dir, monkeypatch):
+    monkeypatch.setattr(carousel_mod, "PREFETCH_RETRY_DELAY", 0.001)
+    a, b = _source_images(tmp_path, ["a", "b"])
+    engine = MagicMock()
+    engine.next = AsyncMock(
+        side_effect=[RuntimeError("first"), RuntimeError("second"), a, b, a, b]
+    )
+
+    carousel = Carousel(engine, working_dir=working_dir, prefetch_depth=2)
+    carousel.start()
+    await asyncio.sleep(0.05)
+
+    # both failures happened before anyone asked; the recovered engine wins
+    assert (await carousel.next()).path.read_bytes() == b"BM a"
+    assert (await carousel.next()).path.read_bytes() == b"BM b"
+    await carousel.stop()
+
+
+@pytest.mark.asyncio
+async def test_prefetch_keeps_only_the_latest_error(tmp_path, working_dir, monkeypatch):
+    monkeypatch.setattr(carousel_mod, "PREFETCH_RETRY_DELAY", 0.001)
+    failures = iter(["first", "second"])
+
+    async def failing():
+        raise RuntimeError(next(failures, "latest"))
+
+    engine = MagicMock()
+    engine.next = failing
+
+    carousel = Carousel(engine, working_dir=working_dir, prefetch_depth=2)
+    carousel.start()
+    await asyncio.sleep(0.05)
+
+    assert carousel.prefetch_status()["depth"] == 1
+    with pytest.raises(RuntimeError, match="latest"):
+        await carousel.next()
+    await carousel.stop()
+
+
+@pytest.mark.asyncio
+async def test_engine_switch_flushes_prefetched_images(tmp_path, working_dir):
+    old_a, old_b, new_a, new_b = _source_images(tmp_path, ["old_a", "old_b", "new_a", "new_b"])
+    old_engine = MagicMock()
+    old_engine.next = AsyncMock(side_effect=[old_a, old_b, old_a, old_b])
+    new_engine = MagicMock()
+    new_engine.next = AsyncMock(side_effect=[new_a, new_b, new_a, new_b])
+
+    router = EngineRouter(old_engine, "old", [])
+    carousel = Carousel(router, working_dir=working_dir, prefetch_depth=2)
+    carousel.start()
+    await asyncio.sleep(0.01)
+
+    router.set_engine(new_engine, "new", [])
+    image = await carousel.next()
+    assert image.path.read_bytes() == b"BM new_a"
+    assert carousel.prefetching
+    await carousel.stop()
+
+
+@pytest.mark.asyncio
+async def test_engine_switch_discards_advance_in_flight_on_old_engine(tmp_path, working_dir):
+    old_a, new_a, new_b = _source_images(tmp_path, ["old_a", "new_a", "new_b"])
+
+    async def slow_old():
+        await asyncio.sleep(0.2)
+        return old_a
+
+    async def fast_new(paths=iter([new_a, new_b] * 5)):
+        await asyncio.sleep(0.01)
+        return next(paths)
+
+    old_engine = MagicMock()
+    old_engine.next = AsyncMock(side_effect=slow_old)
+    new_engine = MagicMock()
+    new_engine.next = AsyncMock(side_effect=fast_new)
+
+    router = EngineRouter(old_engine, "old", [])
+    carousel = Carousel(router, working_dir=working_dir, prefetch_depth=2)
+    carousel.start()
+    await asyncio.sleep(0.05)  # the old engine is mid-render
+
+    router.set_engine(new_engine, "new", [])
+    await asyncio.sleep(0.3)  # long enough for the old render to finish
+    buffered = [carousel._buffer.get_nowait().name for _ in range(carousel._buffer.qsize())]
+    assert buffered == ["new_a.bmp", "new_b.bmp"]
+    assert router.last_served != old_a
+    await carousel.stop()
@@ -0,0 +1,66 @@
+# tests/test_catalog.py
+from __future__ import annotations
+import os
+import time
+import trmnl.engines.catalog as catalog_mod
+from trmnl.engines.catalog import DirectoryCatalog
+
+
+def _age(path, seconds: float) -> None:
+    """Backdate a directory's mtime so the catalog treats it as settled."""
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_catalog_indexes_bmps_only(tmp_path):
+    (tmp_path / "a.bmp").write_bytes(b"BM")
+    (tmp_path / "b.png").write_bytes(b"PNG")
+    (tmp_path / ".c.bmp.1234.tmp").write_bytes(b"BM")
+    (tmp_path / ".d.bmp").write_bytes(b"BM")
+    catalog = DirectoryCatalog(tmp_path)
+    assert [p.name for p in catalog.paths] == ["a.bmp"]
+    assert catalog.choice() == tmp_path / "a.bmp"
+
+
+def test_catalog_applies_changes_incrementally(tmp_path):
+    for name in ("a", "b", "c"):
+        (tmp_path / f"{name}.bmp").write_bytes(b"BM")
+    _age(tmp_path, 60)
+    catalog = DirectoryCatalog(tmp_path)
+    assert not catalog.refresh()  # unchanged directory: one stat, no listing
+
+    (tmp_path / "a.bmp").unlink()
+    (tmp_path / "d.bmp").write_bytes(b"BM")
+    assert catalog.refresh()
+    assert sorted(p.name for p in catalog.paths) == ["b.bmp", "c.bmp", "d.bmp"]
+    assert "a.bmp" not in catalog
+    assert all(catalog._paths[i].name == name for name, i in catalog._positions.items())
+
+
+def test_catalog_rechecks_until_mtime_settles(tmp_path, monkeypatch):
+    (tmp_path / "a.bmp").write_bytes(b"BM")
+    catalog = DirectoryCatalog(tmp_path)
+    listings = []
+    monkeypatch.setattr(catalog, "_list", lambda: listings.append(1) or {"a.bmp"})
+    catalog.refresh()
+    assert listings  # mtime too fresh to trust: listed again
+
+    _age(tmp_path, 60)
+    catalog.refresh()
+    listings.clear()
+    catalog.refresh()
+    assert not listings
+
+
+def test_catalog_missing_directory_is_empty(tmp_path):
+    catalog = DirectoryCatalog(tmp_path / "missing")
+    assert len(catalog) == 0
+
+
+def test_catalog_due_respects_interval(tmp_path, monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(catalog_mod.time, "monotonic", lambda: clock[0])
+    catalog = DirectoryCatalog(tmp_path, check_interval=5.0)
+    assert not catalog.due()
+    clock[0] += 5.0
+    assert catalog.due()
@@ -65,3 +65,63 @@ def test_build_engine_unknown_engine_name(tmp_path, monkeypatch):
         from trmnl.config import build_engine_from_config
         engine, name, sequence = build_engine_from_config()
     assert name == "mix"
+
+
+def test_build_engine_mix_weights(tmp_path, monkeypatch):
+    cfg = tmp_path / "config.yaml"
+    cfg.write_text("engine: mix\nsequence: [poem, poem, fantasy]\nweights:\n  fantasy: 3\n")
+    monkeypatch.setattr("trmnl.config.CONFIG_FILE", cfg)
+    with patch("trmnl.config.get_engine_registry", return_value=_mock_registry()):
+        from trmnl.config import build_engine_from_config
+        engine, name, sequence = build_engine_from_config()
+    assert sequence == ["poem", "poem", "fantasy"]
+    assert engine.names == ["poem", "fantasy"]
+    assert engine.weights == [2, 3]
+
+
+def test_build_engine_passes_only_accepted_options(tmp_path, monkeypatch):
+    cfg = tmp_path / "config.yaml"
+    cfg.write_text("engine: fantasy\ndither: threshold\nbackend: text\n")
+    monkeypatch.setattr("trmnl.config.CONFIG_FILE", cfg)
+    registry = _mock_registry()
+    with patch("trmnl.config.get_engine_registry", return_value=registry):
+        from trmnl.config import build_engine_from_config
+        _, name, _ = build_engine_from_config()
+    assert name == "fantasy"
+    registry["fantasy"].assert_called_once_with()
+
+
+def test_build_engine_forwards_poem_options_to_mix_member(tmp_path, monkeypatch):
+    cfg = tmp_path / "config.yaml"
+    cfg.write_text("engine: mix\nsequence: [poem, fantasy]\ndither: threshold\n")
+    monkeypatch.setattr("trmnl.config.CONFIG_FILE", cfg)
+    registry = _mock_registry()
+    with patch("trmnl.config.get_engine_registry", return_value=registry):
+        from trmnl.config import build_engine_from_config
+        build_engine_from_config()
+    registry["poem"].assert_called_once_with(dither="threshold")
+    registry["fantasy"].assert_called_once_with()
+
+
+def test_build_engine_constructor_error_falls_back_to_mix(tmp_path, monkeypatch):
+    cfg = tmp_path / "config.yaml"
+    cfg.write_text("engine: poem\nbackend: bogus\n")
+    monkeypatch.setattr("trmnl.config.CONFIG_FILE", cfg)
+    registry = _mock_registry()
+    registry["poem"].side_effect = [ValueError("Unknown render backend 'bogus'"), MagicMock()]
+    with patch("trmnl.config.get_engine_registry", return_value=registry):
+        from trmnl.config import build_engine_from_config
+        engine, name, _ = build_engine_from_config()
+    assert name == "mix"
+    assert isinstance(engine, MixEngine)
+
+
+def test_build_engine_passes_device_scope_to_illustration(tmp_path, monkeypatch):
+    cfg = tmp_path / "config.yaml"
+    cfg.write_text("engine: illustration\nartist: escher\n")
+    monkeypatch.setattr("trmnl.config.CONFIG_FILE", cfg)
+    registry = {**_mock_registry(), "illustration": MagicMock()}
+    with patch("trmnl.config.get_engine_registry", return_value=registry):
+        from trmnl.config import build_engine_from_config
+        build_engine_from_config("kitchen")
+    registry["illustration"].assert_called_once_with(artist="escher", device="kitchen")
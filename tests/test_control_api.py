@@ -4,6 +4,7 @@ import pytest
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 from fastapi.testclient import TestClient
+from trmnl.carousel import TRMNLImage
 from trmnl.engines.router import EngineRouter
 
 
@@ -17,19 +18,27 @@ def client():
     router = EngineRouter(mock_engine, "fantasy", [])
     router.last_served = Path("/tmp/fantasy_dragon_hoard.bmp")
 
-    mock_image = MagicMock()
-    mock_image.filename = "abc123"
-    mock_image.path = Path("/tmp/abc123.bmp")
+    mock_image = TRMNLImage(Path("/tmp/abc123.bmp"), data=b"BM abc123", mtime=1_700_000_000)
     mock_carousel = MagicMock()
     mock_carousel.next = AsyncMock(return_value=mock_image)
     mock_carousel.current = AsyncMock(return_value=mock_image)
+    mock_carousel.staged = None
+    mock_carousel.lookup.side_effect = lambda name: mock_image if name == "abc123" else None
+    mock_carousel.stop = AsyncMock()
+    mock_carousel.prefetch_status.return_value = {"enabled": True, "depth": 2, "capacity": 2}
+
+    mock_pool = MagicMock()
+    mock_pool.start = AsyncMock()
+    mock_pool.close = AsyncMock()
 
     with patch("trmnl.app.build_engine_from_config", return_value=(mock_engine, "fantasy", [])):
         with patch("trmnl.app.Carousel", return_value=mock_carousel):
             with patch("trmnl.app.EngineRouter", return_value=router):
-                with patch("trmnl.control._write_config"):
-                    with TestClient(app, raise_server_exceptions=True) as tc:
-                        yield tc
+                with patch("trmnl.control._write_config"), patch("trmnl.control._write_schedule"):
+                    with patch("trmnl.app.get_browser_pool", return_value=mock_pool):
+                        with patch("trmnl.app.schedule_config", return_value=(False, {})):
+                            with TestClient(app, raise_server_exceptions=True) as tc:
+                                yield tc
 
 
 def test_status_returns_engine_info(client):
@@ -38,6 +47,10 @@ def test_status_returns_engine_info(client):
     data = resp.json()
     assert data["engine"] == "fantasy"
     assert "last_served" in data
+    assert set(data["render_cache"]) == {"hits", "misses", "hit_ratio"}
+    assert data["prefetch"]["depth"] == 2
+    assert data["loop"]["stalls"] >= 0
+    assert data["scheduler"]["enabled"] is False
 
 
 def test_engines_list(client):
@@ -54,12 +67,81 @@ def test_set_engine_unknown_returns_400(client):
     assert "bogus" in resp.json()["detail"]
 
 
+def test_set_engine_unknown_dither_returns_400(client):
+    resp = client.post("/api/control/engine", json={"engine": "poem", "dither": "foo"})
+    assert resp.status_code == 400
+    assert "foo" in resp.json()["detail"]
+
+
 def test_set_engine_valid(client):
     resp = client.post("/api/control/engine", json={"engine": "fantasy"})
     assert resp.status_code == 200
     assert resp.json()["engine"] == "fantasy"
 
 
+def test_set_engine_swaps_in_warmed_engine(client):
+    new_engine = MagicMock()
+    new_engine.next = AsyncMock(return_value=Path("/tmp/first.bmp"))
+    with patch("trmnl.control._build", return_value=(new_engine, "poem", [])):
+        resp = client.post("/api/control/engine", json={"engine": "poem"})
+    assert resp.status_code == 200
+    assert resp.json()["job"]["state"] == "done"
+
+    router = client.app.state.router
+    assert router.active_engine is new_engine
+    assert router._primed == Path("/tmp/first.bmp")  # served next, without re-rendering
+
+
+def test_set_engine_without_waiting_returns_job(client):
+    import time
+
+    started = []
+
+    def slow_build(*args, **kwargs):
+        started.append(True)
+        time.sleep(0.2)  # runs in the executor, not on the loop
+        engine = MagicMock()
+        engine.next = AsyncMock(return_value=Path("/tmp/slow.bmp"))
+        return engine, "poem", []
+
+    with patch("trmnl.control._build", side_effect=slow_build):
+        resp = client.post("/api/control/engine?wait=false", json={"engine": "poem"})
+        assert resp.status_code == 202
+        job_id = resp.json()["job"]["id"]
+        # the old engine keeps serving until the swap lands
+        assert client.get("/api/control/status").json()["engine"] == "fantasy"
+
+        for _ in range(50):
+            job = client.get(f"/api/control/jobs/{job_id}").json()
+            if job["state"] == "done":
+                break
+            time.sleep(0.02)
+    assert job["state"] == "done"
+    assert job["result"]["engine"] == "poem"
+    assert client.get("/api/control/status").json()["engine"] == "poem"
+    assert client.get("/api/control/jobs/nope").status_code == 404
+
+
+def test_set_engine_build_failure_keeps_old_engine(client):
+    with patch("trmnl.control._build", side_effect=ValueError("Specify artist or artists, not both")):
+        resp = client.post("/api/control/engine", json={"engine": "illustration"})
+    assert resp.status_code == 500
+    assert "artist" in resp.json()["detail"]
+    assert client.get("/api/control/status").json()["engine"] == "fantasy"
+
+
+def test_reload_keeps_engine_the_cache_hands_back(client):
+    router = client.app.state.router
+    engine = router.active_engine
+    calls = engine.next.await_count
+    with patch("trmnl.config.build_engine_from_config", return_value=(engine, "fantasy", [])):
+        with patch.object(router, "set_engine") as set_engine:
+            resp = client.post("/api/control/reload", json={})
+    assert resp.status_code == 200
+    set_engine.assert_not_called()  # the prefetched images are kept
+    assert engine.next.await_count == calls  # no draw outside the router
+
+
 def test_control_next(client):
     resp = client.post("/api/control/next", json={})
     assert resp.status_code == 200
@@ -70,3 +152,202 @@ def test_ping(client):
     resp = client.get("/ping")
     assert resp.status_code == 200
     assert resp.json() == {"status": "ok"}
+
+
+def test_serve_image_from_memory(client):
+    resp = client.get("/api/image/abc123.bmp")
+    assert resp.status_code == 200
+    assert resp.content == b"BM abc123"
+    assert resp.headers["content-type"] == "image/bmp"
+    assert resp.headers["etag"].startswith('"')
+    assert resp.headers["last-modified"] == "Tue, 14 Nov 2023 22:13:20 GMT"
+
+
+def test_serve_unknown_image_returns_404(client):
+    resp = client.get("/api/image/long-gone.bmp")
+    assert resp.status_code == 404
+
+
+def test_serve_image_if_none_match_returns_304(client):
+    etag = client.get("/api/image/abc123.bmp").headers["etag"]
+    resp = client.get("/api/image/abc123.bmp", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.content == b""
+    assert resp.headers["etag"] == etag
+
+    resp = client.get("/api/image/abc123.bmp", headers={"If-None-Match": '"stale"'})
+    assert resp.status_code == 200
+
+
+def test_serve_image_if_modified_since_returns_304(client):
+    resp = client.get(
+        "/api/image/abc123.bmp", headers={"If-Modified-Since": "Tue, 14 Nov 2023 22:13:20 GMT"}
+    )
+    assert resp.status_code == 304
+    resp = client.get(
+        "/api/image/abc123.bmp", headers={"If-Modified-Since": "Mon, 13 Nov 2023 00:00:00 GMT"}
+    )
+    assert resp.status_code == 200
+
+
+@pytest.fixture
+def device_client(client, tmp_path):
+    """client, with lazily created devices built on fake engines in tmp dirs."""
+    paths = iter(Path(f"/tmp/device_{i}.bmp") for i in range(1000))
+    src = tmp_path / "src"
+    src.mkdir()
+
+    def build(device_id=None):
+        engine = MagicMock()
+
+        async def next_image():
+            path = src / next(paths).name
+            path.write_bytes(b"BM " + path.stem.encode())
+            return path
+
+        engine.next = next_image
+        return engine, "poem", []
+
+    def working_dir(device_id):
+        path = tmp_path / "working" / device_id
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    with patch("trmnl.devices.build_engine_from_config", side_effect=build):
+        with patch("trmnl.devices.read_config", return_value={}):
+            with patch("trmnl.devices.device_working_dir", side_effect=working_dir):
+                yield client
+
+
+def test_display_uses_per_device_carousels(device_client):
+    a1 = device_client.get("/api/display", headers={"ID": "aa"}).json()
+    b1 = device_client.get("/api/display", headers={"ID": "bb"}).json()
+    assert a1["filename"] != b1["filename"]
+
+    devices = device_client.get("/api/control/status").json()["devices"]
+    assert set(devices) == {"default", "aa", "bb"}
+    assert devices["aa"]["engine"] == "poem"
+
+    resp = device_client.get(f"/api/image/{b1['filename']}.bmp")
+    assert resp.status_code == 200
+    assert resp.content.startswith(b"BM device_")
+
+    # a URL issued just before an advance still resolves
+    device_client.post("/api/control/next?device=bb", json={})
+    assert device_client.get(f"/api/image/{b1['filename']}.bmp").status_code == 200
+
+
+def test_set_engine_for_one_device(device_client):
+    device_client.get("/api/setup", headers={"ID": "aa"})
+    fantasy = MagicMock()
+    fantasy.next = AsyncMock(side_effect=FileNotFoundError("no images"))
+    with patch("trmnl.control._build", return_value=(fantasy, "fantasy", [])):
+        resp = device_client.post(
+            "/api/control/engine",
+            json={"engine": "fantasy", "device": "aa", "refresh_interval": 300},
+        )
+    assert resp.status_code == 200
+    assert resp.json()["device"] == "aa"
+
+    devices = device_client.get("/api/control/status").json()["devices"]
+    assert devices["aa"]["engine"] == "fantasy"
+    assert devices["aa"]["refresh_interval"] == 300
+    assert devices["aa"]["follows_default"] is False
+    assert devices["default"]["engine"] == "fantasy"  # from the fixture's engine
+
+    display = device_client.get("/api/display", headers={"ID": "bb"})
+    assert display.json()["refresh_rate"] == 60
+
+
+def test_default_id_header_uses_the_default_device(device_client):
+    device_client.get("/api/display", headers={"ID": "default"})
+    devices = device_client.app.state.devices
+    assert [device.id for device in devices] == ["default"]
+
+
+def test_set_engine_creates_new_device_inside_the_job(device_client):
+    fantasy = MagicMock()
+    fantasy.next = AsyncMock(return_value=Path("/tmp/fantasy.bmp"))
+    with patch("trmnl.control._build", return_value=(fantasy, "fantasy", [])):
+        resp = device_client.post("/api/control/engine", json={"engine": "fantasy", "device": "new"})
+    assert resp.status_code == 200
+    assert resp.json()["device"] == "new"
+    devices = device_client.get("/api/control/status").json()["devices"]
+    assert devices["new"]["engine"] == "fantasy"
+
+
+def test_repeat_poll_within_refresh_window_is_idempotent(device_client):
+    first = device_client.get("/api/display", headers={"ID": "aa"}).json()
+    again = device_client.get("/api/display", headers={"ID": "aa"}).json()
+    assert again["filename"] == first["filename"]
+
+    # a forced advance is handed out on the next poll, without advancing twice
+    forced = device_client.post("/api/control/next?device=aa", json={}).json()
+    after = device_client.get("/api/display", headers={"ID": "aa"}).json()
+    assert after["filename"] + ".bmp" == forced["image"] != first["filename"] + ".bmp"
+    assert device_client.get("/api/display", headers={"ID": "aa"}).json() == after
+
+
+def test_poll_advances_once_refresh_interval_is_up(device_client, monkeypatch):
+    import trmnl.devices as devices_mod
+
+    clock = [1000.0]
+    monkeypatch.setattr(devices_mod, "_clock", lambda: clock[0])
+    first = device_client.get("/api/display", headers={"ID": "aa"}).json()
+    clock[0] += first["refresh_rate"] * devices_mod.REPOLL_WINDOW
+    second = device_client.get("/api/display", headers={"ID": "aa"}).json()
+    assert second["filename"] != first["filename"]
+
+
+def test_schedule_can_be_enabled_and_configured(client):
+    assert client.get("/api/control/schedule").json()["enabled"] is False
+
+    resp = client.post("/api/control/schedule", json={"enabled": True, "intervals": {"poem": 300}})
+    assert resp.status_code == 200
+    assert resp.json()["enabled"] is True
+    assert resp.json()["intervals"] == {"poem": 300}
+
+    resp = client.post("/api/control/schedule", json={"enabled": False})
+    assert resp.json()["enabled"] is False
+    assert resp.json()["intervals"] == {"poem": 300}
+
+    resp = client.post("/api/control/schedule", json={"intervals": {"poem": 0}})
+    assert resp.status_code == 400
+
+
+def test_device_log_is_queryable_as_telemetry(client):
+    import time
+
+    payload = {
+        "log": {
+            "logs_array": [
+                {
+                    "creation_timestamp": int(time.time()),
+                    "device_status_stamp": {"battery_voltage": 4.05, "wifi_rssi_level": -58},
+                }
+            ]
+        }
+    }
+    assert client.post("/api/log", json=payload, headers={"ID": "aa"}).json() == {"status": "ok"}
+
+    data = client.get("/api/control/telemetry", params={"device": "aa"}).json()
+    assert data["devices"]["aa"]["battery_voltage"]["latest"][1] == 4.05
+    assert data["devices"]["aa"]["rssi"]["min"] == -58
+
+    hourly = client.get("/api/control/telemetry", params={"resolution": "hourly"}).json()
+    assert hourly["devices"]["aa"]["rssi"]["points"][0][4] == 1
+
+    assert client.get("/api/control/telemetry", params={"metric": "bogus"}).status_code == 400
+
+
+def test_metrics_endpoint_exposes_latency_and_gauges(client):
+    client.get("/ping")
+    client.get("/api/image/abc123.bmp")
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    body = resp.text
+    assert 'trmnl_request_duration_seconds_count{method="GET",route="/ping",status="200"}' in body
+    assert 'route="/api/image/{filename}"' in body
+    assert "trmnl_render_cache_hit_ratio" in body
+    assert 'trmnl_prefetch_depth{device="default"} 2' in body
@@ -0,0 +1,123 @@
+# tests/test_devices.py
+from __future__ import annotations
+import pytest
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+from trmnl.carousel import Carousel
+from trmnl.config import build_engine_from_config
+from trmnl.devices import DEFAULT_DEVICE, Device, DeviceManager
+from trmnl.engines.router import EngineRouter
+
+
+def _registry():
+    return {"poem": MagicMock(), "fantasy": MagicMock()}
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    cfg = tmp_path / "config.yaml"
+    cfg.write_text(
+        "engine: poem\n"
+        "devices:\n"
+        "  kitchen:\n"
+        "    engine: fantasy\n"
+        "    refresh_interval: 900\n"
+        "  hall:\n"
+        "    refresh_interval: 120\n"
+    )
+    monkeypatch.setattr("trmnl.config.CONFIG_FILE", cfg)
+    monkeypatch.setattr("trmnl.devices.device_working_dir", lambda device_id: tmp_path / device_id)
+    with patch("trmnl.config.get_engine_registry", return_value=_registry()):
+        yield cfg
+
+
+def _manager(tmp_path: Path) -> DeviceManager:
+    router = EngineRouter(MagicMock(), "poem", [])
+    default = Device(DEFAULT_DEVICE, router, Carousel(router, working_dir=None, prefetch_depth=0), 60)
+    return DeviceManager(default)
+
+
+def test_build_engine_for_device_section(config):
+    assert build_engine_from_config("kitchen")[1] == "fantasy"
+    assert build_engine_from_config("hall")[1] == "poem"  # no engine key: follows top level
+    assert build_engine_from_config("unknown")[1] == "poem"
+
+
+@pytest.mark.asyncio
+async def test_devices_created_lazily_from_config(config, tmp_path):
+    manager = _manager(tmp_path)
+    assert await manager.get(None) is manager.default
+    assert "kitchen" not in manager
+
+    kitchen = await manager.get("kitchen")
+    hall = await manager.get("hall")
+    other = await manager.get("other")
+    assert await manager.get("kitchen") is kitchen
+    assert (kitchen.router.active_name, kitchen.refresh_interval, kitchen.follows_default) == (
+        "fantasy",
+        900,
+        False,
+    )
+    assert (hall.router.active_name, hall.refresh_interval, hall.follows_default) == ("poem", 120, True)
+    assert other.refresh_interval == 60
+    assert kitchen.carousel is not hall.carousel
+    assert [d.id for d in manager] == [DEFAULT_DEVICE, "kitchen", "hall", "other"]
+    await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_find_image_across_devices(config, tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.bmp").write_bytes(b"BM a")
+    manager = _manager(tmp_path)
+    kitchen = await manager.get("kitchen")
+    await kitchen.carousel.stop()
+    kitchen.router.active_engine.next = AsyncMock(return_value=src / "a.bmp")
+    (tmp_path / "kitchen").mkdir()
+
+    image = await kitchen.carousel.next()
+    assert manager.find_image(image.filename) is image
+    assert manager.find_image("missing") is None
+
+
+@pytest.mark.asyncio
+async def test_unconfigured_devices_are_capped(config, tmp_path):
+    from trmnl.devices import DeviceLimitError
+
+    router = EngineRouter(MagicMock(), "poem", [])
+    default = Device(DEFAULT_DEVICE, router, Carousel(router, working_dir=None, prefetch_depth=0), 60)
+    manager = DeviceManager(default, max_devices=1)
+
+    await manager.get("stranger")
+    with pytest.raises(DeviceLimitError):
+        await manager.get("another")
+    assert await manager.get("kitchen")  # configured devices don't count
+    assert await manager.get("stranger")  # known devices are still found
+    await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_default_id_maps_to_the_default_device(config, tmp_path):
+    manager = _manager(tmp_path)
+    assert await manager.get(DEFAULT_DEVICE) is manager.default
+    assert DEFAULT_DEVICE not in manager
+    await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_requests_create_one_device(config, tmp_path):
+    import asyncio
+
+    manager = _manager(tmp_path)
+    first, second = await asyncio.gather(manager.get("kitchen"), manager.get("kitchen"))
+    assert first is second
+    await manager.stop()
+
+
+def test_working_dirs_differ_for_ids_that_sanitise_alike(tmp_path, monkeypatch):
+    from trmnl.devices import device_working_dir, settings
+
+    monkeypatch.setitem(settings.paths, "CURRENT_IMAGE_DIR", tmp_path)
+    assert device_working_dir("aa:bb") != device_working_dir("aa_bb")
+    assert device_working_dir("aa:bb").name.startswith("aa_bb-")
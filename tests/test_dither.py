@@ -0,0 +1,54 @@
+# tests/test_dither.py
+from __future__ import annotations
+import numpy as np
+import pytest
+from PIL import Image
+from trmnl.dither import DITHER_METHODS, dither, save_bmp, to_grayscale, write_bmp_1bit
+
+
+def _gradient() -> Image.Image:
+    return Image.linear_gradient("L").resize((800, 480)).convert("RGB")
+
+
+def test_grayscale_matches_pillow():
+    image = _gradient()
+    ours = to_grayscale(image).astype(int)
+    pillow = np.asarray(image.convert("L")).astype(int)
+    assert np.abs(ours - pillow).max() <= 1
+
+
+@pytest.mark.parametrize("method", DITHER_METHODS)
+def test_dither_preserves_mean_tone(method):
+    bits = dither(to_grayscale(_gradient()), method)
+    assert bits.shape == (480, 800)
+    assert bits.dtype == bool
+    assert abs(bits.mean() - 0.5) < 0.02
+
+
+def test_floyd_steinberg_matches_previous_output():
+    image = _gradient()
+    bits = dither(to_grayscale(image), "floyd-steinberg")
+    assert (bits == np.asarray(image.convert("1"))).all()
+
+
+def test_unknown_method_raises():
+    with pytest.raises(ValueError, match="Valid methods"):
+        dither(np.zeros((4, 4), dtype=np.uint8), "halftone")
+
+
+@pytest.mark.parametrize("width", [800, 13, 33])
+def test_bmp_writer_round_trips(tmp_path, width):
+    rng = np.random.default_rng(0)
+    bits = rng.random((7, width)) > 0.5
+    path = write_bmp_1bit(bits, tmp_path / "out.bmp")
+    with Image.open(path) as img:
+        assert img.mode == "1"
+        assert (np.asarray(img) == bits).all()
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_save_bmp_matches_pillow_size(tmp_path):
+    image = _gradient()
+    ours = save_bmp(image, tmp_path / "ours.bmp", "atkinson")
+    image.convert("1").save(tmp_path / "pillow.bmp")
+    assert ours.stat().st_size == (tmp_path / "pillow.bmp").stat().st_size == 48062
@@ -36,3 +36,29 @@ async def test_fantasy_engine_only_returns_bmps(tmp_path, monkeypatch):
     for _ in range(10):
         path = await engine.next()
         assert path.suffix == ".bmp"
+
+
+@pytest.mark.asyncio
+async def test_fantasy_engine_sees_new_images_without_restart(tmp_path, monkeypatch):
+    monkeypatch.setattr(fantasy_mod, "FANTASY_DIR", tmp_path)
+    engine = fantasy_mod.FantasyEngine()
+    engine.catalog.check_interval = 0
+    with pytest.raises(RuntimeError):
+        await engine.next()
+
+    (tmp_path / "fantasy_new.bmp").write_bytes(b"BM")
+    assert await engine.next() == tmp_path / "fantasy_new.bmp"
+
+
+@pytest.mark.asyncio
+async def test_fantasy_engine_draw_skips_directory_scan(tmp_path, monkeypatch):
+    (tmp_path / "fantasy_a.bmp").write_bytes(b"BM")
+    monkeypatch.setattr(fantasy_mod, "FANTASY_DIR", tmp_path)
+    engine = fantasy_mod.FantasyEngine()
+
+    def no_scan(*args, **kwargs):
+        raise AssertionError("directory scanned")
+
+    monkeypatch.setattr(Path, "glob", no_scan)
+    monkeypatch.setattr(fantasy_mod, "run_blocking", no_scan)
+    assert (await engine.next()).name == "fantasy_a.bmp"
@@ -0,0 +1,196 @@
+# tests/test_generate.py
+from __future__ import annotations
+import io
+import pytest
+from contextlib import asynccontextmanager
+from PIL import Image
+from trmnl.generate import (
+    AutoFit,
+    RenderCache,
+    RenderJob,
+    decode_screenshot,
+    generate_bmp_from_html,
+    html_cache_key,
+    render_batch,
+    render_html_cached,
+)
+
+
+def _screenshot_bytes(fmt: str = "png") -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (800, 480), (255, 255, 255)).save(buf, format=fmt.upper())
+    return buf.getvalue()
+
+
+class FakePage:
+    def __init__(self):
+        self.content = ""
+        self.screenshot_kwargs: dict = {}
+        self.evaluations: list[dict] = []
+
+    async def set_content(self, html):
+        if "FAIL" in html:
+            raise RuntimeError("boom")
+        self.content = html
+
+    async def evaluate(self, _script, args):
+        self.evaluations.append(args)
+        return args["known"] if args["known"] is not None else 22
+
+    async def screenshot(self, **kwargs):
+        self.screenshot_kwargs = kwargs
+        return _screenshot_bytes(kwargs.get("type", "png"))
+
+
+class FakePool:
+    def __init__(self):
+        self.size = 4
+        self.viewport = {"width": 800, "height": 480}
+        self.borrowed = 0
+        self.pages: list[FakePage] = []
+
+    @asynccontextmanager
+    async def page(self):
+        self.borrowed += 1
+        page = FakePage()
+        self.pages.append(page)
+        yield page
+
+
+@pytest.mark.asyncio
+async def test_render_batch_reports_per_job(tmp_path):
+    pool = FakePool()
+    jobs = [
+        RenderJob("<p>one</p>", tmp_path / "one.bmp"),
+        RenderJob("<p>FAIL</p>", tmp_path / "two.bmp"),
+        RenderJob("<p>three</p>", tmp_path / "three.bmp"),
+    ]
+    results = await render_batch(jobs, concurrency=2, pool=pool)
+
+    assert [r.ok for r in results] == [True, False, True]
+    assert results[0].path == tmp_path / "one.bmp"
+    assert results[0].path.exists()
+    assert isinstance(results[1].error, RuntimeError)
+    assert not (tmp_path / "two.bmp").exists()
+    assert pool.borrowed == 3
+
+
+@pytest.mark.asyncio
+async def test_render_batch_rejects_bad_concurrency(tmp_path):
+    with pytest.raises(ValueError, match="concurrency"):
+        await render_batch([], concurrency=0, pool=FakePool())
+
+
+@pytest.mark.asyncio
+async def test_render_cache_deduplicates_identical_html(tmp_path):
+    pool = FakePool()
+    cache = RenderCache(tmp_path)
+
+    first = await render_html_cached("<p>same</p>", cache=cache, pool=pool)
+    second = await render_html_cached("<p>same</p>", cache=cache, pool=pool)
+
+    assert first == second
+    assert first.parent == tmp_path
+    assert pool.borrowed == 1
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+
+@pytest.mark.asyncio
+async def test_render_cache_key_changes_with_content_and_viewport(tmp_path):
+    pool = FakePool()
+    key = html_cache_key("<p>a</p>", pool)
+    assert key != html_cache_key("<p>b</p>", pool)
+
+    pool.viewport = {"width": 400, "height": 240}
+    assert key != html_cache_key("<p>a</p>", pool)
+
+
+@pytest.mark.asyncio
+async def test_render_cache_handles_unsafe_titles(tmp_path):
+    """Titles with slashes used to break the old poem_{title}.bmp paths."""
+    from trmnl.engines.poems.engine import PoemEngine
+
+    engine = PoemEngine(backend="text", cache=RenderCache(tmp_path))
+    a = await engine._generate_poem_image("Either/Or", "first poem", "A")
+    b = await engine._generate_poem_image("Either/Or", "second poem", "B")
+
+    assert a != b
+    assert a.parent == b.parent == tmp_path
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+@pytest.mark.asyncio
+async def test_screenshot_is_clipped_jpeg(tmp_path):
+    pool = FakePool()
+    path = await generate_bmp_from_html("<p>hi</p>", tmp_path / "out.bmp", pool=pool)
+
+    kwargs = pool.pages[0].screenshot_kwargs
+    assert kwargs["type"] == "jpeg"
+    assert kwargs["clip"] == {"x": 0, "y": 0, "width": 800, "height": 480}
+    with Image.open(path) as img:
+        assert img.mode == "1"
+        assert img.size == (800, 480)
+
+
+def test_decode_screenshot_jpeg_is_grayscale():
+    image = decode_screenshot(_screenshot_bytes("jpeg"))
+    image.load()
+    assert image.mode == "L"
+
+
+@pytest.mark.asyncio
+async def test_autofit_records_size_and_skips_search_on_rerender(tmp_path):
+    pool = FakePool()
+    cache = RenderCache(tmp_path)
+    html = "<div id='fit'>poem</div>"
+
+    fit = AutoFit()
+    await render_html_cached(html, cache=cache, pool=pool, autofit=fit)
+    assert fit.font_size == 22
+    assert pool.pages[0].evaluations[0]["known"] is None
+
+    # different conversion settings -> new render, but the layout is unchanged
+    refit = AutoFit()
+    await render_html_cached(html, cache=cache, pool=pool, dither="threshold", autofit=refit)
+    assert pool.pages[1].evaluations[0]["known"] == 22
+    assert refit.font_size == 22
+
+
+@pytest.mark.asyncio
+async def test_autofit_is_part_of_cache_key():
+    pool = FakePool()
+    assert html_cache_key("<p>a</p>", pool) != html_cache_key("<p>a</p>", pool, autofit=AutoFit())
+    assert html_cache_key("<p>a</p>", pool, autofit=AutoFit(max_size=30)) != html_cache_key(
+        "<p>a</p>", pool, autofit=AutoFit()
+    )
+
+
+@pytest.mark.asyncio
+async def test_prerender_skips_cached_poems_without_counting_misses(tmp_path):
+    from trmnl.engines.poems.engine import PoemEngine
+
+    cache = RenderCache(tmp_path)
+    engine = PoemEngine(backend="text", cache=cache)
+    poem = {"title": "Ozymandias", "poem": "I met a traveller", "poet": "Shelley"}
+    cache.path_for(engine._cache_key(poem["title"], poem["poem"], poem["poet"])).write_bytes(b"BM")
+
+    assert await engine.prerender([poem]) == []
+    assert cache.stats() == {"hits": 0, "misses": 0, "hit_ratio": None}
+
+
+def test_write_meta_leaves_no_temp_files(tmp_path):
+    cache = RenderCache(tmp_path)
+    cache.write_meta("abc", {"font_size": 30})
+    cache.write_meta("abc", {"font_size": 28})
+    assert cache.read_meta("abc") == {"font_size": 28}
+    assert [p.name for p in (tmp_path / "meta").iterdir()] == ["abc.json"]
+
+
+def test_render_cache_counts_lookups_from_many_threads(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache = RenderCache(tmp_path)
+    cache.path_for("hit").write_bytes(b"BM")
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(cache.lookup, ["hit", "miss"] * 2000))
+    assert cache.stats() == {"hits": 2000, "misses": 2000, "hit_ratio": 0.5}
@@ -36,3 +36,81 @@ async def test_illustration_engine_only_returns_bmps(tmp_path, monkeypatch):
     for _ in range(10):
         path = await engine.next()
         assert path.suffix == ".bmp"
+
+
+def _artist(root: Path, artist: str, count: int) -> list[str]:
+    d = root / artist
+    d.mkdir()
+    names = [f"{artist}_{i}.bmp" for i in range(count)]
+    for name in names:
+        (d / name).write_bytes(b"BM")
+    return names
+
+
+@pytest.mark.asyncio
+async def test_illustration_engine_no_repeats_within_a_bag(tmp_path, monkeypatch):
+    names = _artist(tmp_path, "escher", 6)
+    monkeypatch.setattr(illustration_mod, "ILLUSTRATION_DIR", tmp_path)
+
+    engine = illustration_mod.IllustrationEngine(artist="escher")
+    first_bag = [(await engine.next()).name for _ in range(6)]
+    second_bag = [(await engine.next()).name for _ in range(6)]
+    assert sorted(first_bag) == sorted(second_bag) == sorted(names)
+    assert first_bag[-1] != second_bag[0]
+
+
+@pytest.mark.asyncio
+async def test_illustration_engine_persists_rotation(tmp_path, monkeypatch):
+    _artist(tmp_path, "beardsley", 5)
+    _artist(tmp_path, "escher", 5)
+    monkeypatch.setattr(illustration_mod, "ILLUSTRATION_DIR", tmp_path)
+
+    engine = illustration_mod.IllustrationEngine(artists=["beardsley", "escher"])
+    served = [(await engine.next()).name for _ in range(5)]
+    assert [name.split("_")[0] for name in served] == ["beardsley", "escher"] * 2 + ["beardsley"]
+
+    restarted = illustration_mod.IllustrationEngine(artists=["beardsley", "escher"])
+    served += [(await restarted.next()).name for _ in range(5)]
+    assert served[5].startswith("escher")  # round-robin resumes where it stopped
+    assert sorted(served) == sorted(f"{a}_{i}.bmp" for a in ("beardsley", "escher") for i in range(5))
+
+
+@pytest.mark.asyncio
+async def test_illustration_engine_new_images_join_current_bag(tmp_path, monkeypatch):
+    _artist(tmp_path, "escher", 2)
+    monkeypatch.setattr(illustration_mod, "ILLUSTRATION_DIR", tmp_path)
+
+    engine = illustration_mod.IllustrationEngine(artist="escher")
+    first = (await engine.next()).name
+    (tmp_path / "escher" / "escher_new.bmp").write_bytes(b"BM")
+    engine._bags[0].catalog.refresh()
+    rest = {(await engine.next()).name for _ in range(2)}
+    assert rest | {first} == {"escher_0.bmp", "escher_1.bmp", "escher_new.bmp"}
+
+
+@pytest.mark.asyncio
+async def test_illustration_state_dir_is_not_an_image_source(tmp_path, monkeypatch):
+    (tmp_path / "flat.bmp").write_bytes(b"BM")
+    monkeypatch.setattr(illustration_mod, "ILLUSTRATION_DIR", tmp_path)
+
+    engine = illustration_mod.IllustrationEngine()
+    for _ in range(3):
+        assert (await engine.next()).name == "flat.bmp"
+    assert (tmp_path / illustration_mod.STATE_DIR_NAME / "cursors.json").exists()
+
+
+@pytest.mark.asyncio
+async def test_illustration_state_is_kept_per_device(tmp_path, monkeypatch):
+    _artist(tmp_path, "escher", 6)
+    monkeypatch.setattr(illustration_mod, "ILLUSTRATION_DIR", tmp_path)
+
+    kitchen = illustration_mod.IllustrationEngine(artist="escher", device="kitchen")
+    hall = illustration_mod.IllustrationEngine(artist="escher", device="hall")
+    for _ in range(4):
+        await kitchen.next()
+    await hall.next()
+
+    # each device resumes from its own cursor after a restart
+    assert illustration_mod.IllustrationEngine(artist="escher", device="kitchen")._bags[0].cursor == 4
+    assert illustration_mod.IllustrationEngine(artist="escher", device="hall")._bags[0].cursor == 1
+    assert not (tmp_path / illustration_mod.STATE_DIR_NAME / "cursors.json").exists()
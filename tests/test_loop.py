@@ -0,0 +1,90 @@
+# tests/test_loop.py
+from __future__ import annotations
+import asyncio
+import threading
+import time
+import pytest
+from trmnl.loop import LoopLagMonitor, SingleFlight, run_blocking
+
+
+@pytest.mark.asyncio
+async def test_run_blocking_uses_worker_thread():
+    main = threading.get_ident()
+    worker = await run_blocking(threading.get_ident)
+    assert worker != main
+
+
+@pytest.mark.asyncio
+async def test_run_blocking_keeps_loop_responsive():
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    await run_blocking(time.sleep, 0.2)
+    task.cancel()
+    assert ticks >= 5
+
+
+@pytest.mark.asyncio
+async def test_monitor_records_stall():
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.05)
+    monitor.start()
+    await asyncio.sleep(0.03)
+    time.sleep(0.15)  # block the loop on purpose
+    await asyncio.sleep(0.03)
+    await monitor.stop()
+
+    stats = monitor.stats()
+    assert stats["stalls"] >= 1
+    assert stats["max_lag_ms"] >= 100
+    assert stats["recent"][-1]["lag_ms"] >= 100
+
+
+def test_monitor_ignores_small_lag():
+    monitor = LoopLagMonitor(threshold=0.1)
+    monitor.record(0.05)
+    assert monitor.stalls == 0
+    assert monitor.stats()["last_lag_ms"] == 50.0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_concurrent_calls():
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    flight: SingleFlight[int] = SingleFlight()
+    assert await asyncio.gather(*(flight.run(work) for _ in range(5))) == [1] * 5
+    assert await flight.run(work) == 2  # a later call starts fresh work
+
+
+@pytest.mark.asyncio
+async def test_single_flight_survives_cancelled_caller_and_shares_errors():
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def work():
+        started.set()
+        await release.wait()
+        raise RuntimeError("boom")
+
+    flight: SingleFlight[None] = SingleFlight()
+    first = asyncio.create_task(flight.run(work))
+    await started.wait()
+    second = asyncio.create_task(flight.run(work))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    with pytest.raises(RuntimeError, match="boom"):
+        await second
+    assert first.cancelled()
@@ -0,0 +1,52 @@
+# tests/test_metrics.py
+from __future__ import annotations
+import asyncio
+import pytest
+from trmnl.metrics import Histogram, sample_lines
+
+
+def test_histogram_renders_cumulative_buckets():
+    hist = Histogram("t_seconds", "Test.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        hist.observe(value, stage="render")
+    lines = hist.render()
+    assert lines[:2] == ["# HELP t_seconds Test.", "# TYPE t_seconds histogram"]
+    assert 't_seconds_bucket{stage="render",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{stage="render",le="1.0"} 3' in lines
+    assert 't_seconds_bucket{stage="render",le="+Inf"} 4' in lines
+    assert 't_seconds_count{stage="render"} 4' in lines
+    assert 't_seconds_sum{stage="render"} 4.25' in lines
+
+
+@pytest.mark.asyncio
+async def test_histogram_time_spans_awaits():
+    hist = Histogram("t_seconds", "Test.", ("stage",))
+    with hist.time(stage="sleep"):
+        await asyncio.sleep(0.02)
+    (counts, total, count) = hist._series[("sleep",)]
+    assert count == 1
+    assert total >= 0.02
+
+
+def test_sample_lines_escape_labels_and_missing_values():
+    lines = sample_lines("t_ratio", "Ratio.", "gauge", [({"device": 'a"b'}, None), ({}, 0.5)])
+    assert lines[2] == 't_ratio{device="a\\"b"} NaN'
+    assert lines[3] == "t_ratio 0.5"
+
+
+@pytest.mark.asyncio
+async def test_router_and_engines_record_stages():
+    from pathlib import Path
+    from unittest.mock import AsyncMock
+    from trmnl.engines.router import EngineRouter, MixEngine
+    from trmnl.metrics import STAGE_LATENCY
+
+    class PoemEngine:
+        next = AsyncMock(return_value=Path("/a.bmp"))
+
+    before = STAGE_LATENCY._series.get(("engine.poem",), [None, 0.0, 0])[2]
+    router = EngineRouter(MixEngine([PoemEngine()]), "mix", ["poem"])
+    await router.next()
+    assert STAGE_LATENCY._series[("engine.poem",)][2] == before + 1
+    assert ("engine.mix",) in STAGE_LATENCY._series
+    assert ("router",) in STAGE_LATENCY._series
@@ -0,0 +1,73 @@
+# tests/test_registry.py
+from __future__ import annotations
+import gc
+from unittest.mock import MagicMock, patch
+import trmnl.engines.registry as registry_mod
+from trmnl.config import build_engine_from_config
+from trmnl.engines.registry import EngineCache
+
+
+class FakeEngine:
+    def __init__(self, artists=None):
+        self.artists = artists
+
+
+def test_cache_reuses_engine_for_same_key():
+    cache = EngineCache()
+    first = cache.get(None, "illustration", FakeEngine, {"artists": ["a", "b"]})
+    assert cache.get(None, "illustration", FakeEngine, {"artists": ["a", "b"]}) is first
+    assert cache.get(None, "illustration", FakeEngine, {"artists": ["b"]}) is not first
+    assert cache.get("kitchen", "illustration", FakeEngine, {"artists": ["a", "b"]}) is not first
+    assert cache.stats() == {"engines": 3, "held": 3, "hits": 1, "misses": 3}
+
+
+def test_idle_engines_are_released_unless_still_in_use(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(registry_mod, "_clock", lambda: now[0])
+    cache = EngineCache(idle_ttl=60)
+    active = cache.get(None, "poem", FakeEngine)
+    cache.get(None, "fantasy", FakeEngine)
+
+    now[0] = 61
+    gc.collect()
+    assert cache.stats()["held"] == 0
+    assert cache.stats()["engines"] == 1  # the idle one is gone entirely
+    # still referenced by a router, so it is found again rather than rebuilt
+    assert cache.get(None, "poem", FakeEngine) is active
+    assert cache.stats()["held"] == 1
+    cache.get(None, "fantasy", FakeEngine)
+    assert cache.misses == 3  # rebuilt
+
+
+def test_invalidate_by_name_drops_mixes_too():
+    cache = EngineCache()
+    poem = cache.get(None, "poem", FakeEngine)
+    fantasy = cache.get(None, "fantasy", FakeEngine)
+    cache.get(None, "mix", FakeEngine, {"sequence": ["poem", "fantasy"]}, factory=FakeEngine)
+
+    assert cache.invalidate("poem") == 2
+    assert cache.get(None, "poem", FakeEngine) is not poem
+    assert cache.get(None, "fantasy", FakeEngine) is fantasy
+    assert cache.invalidate() == 2
+
+
+def test_config_switches_reuse_engines(tmp_path, monkeypatch):
+    cfg = tmp_path / "config.yaml"
+    monkeypatch.setattr("trmnl.config.CONFIG_FILE", cfg)
+    registry = {
+        "poem": MagicMock(side_effect=lambda: MagicMock()),
+        "fantasy": MagicMock(side_effect=lambda: MagicMock()),
+    }
+    with patch("trmnl.config.get_engine_registry", return_value=registry):
+        cfg.write_text("engine: poem\n")
+        poem, _, _ = build_engine_from_config()
+        cfg.write_text("engine: mix\nsequence: [poem, fantasy]\n")
+        mix, _, _ = build_engine_from_config()
+        cfg.write_text("engine: poem\n")
+        again, _, _ = build_engine_from_config()
+        other_device, _, _ = build_engine_from_config("kitchen")
+
+    assert again is poem
+    assert mix.engines[0] is poem  # the mix shares the standalone instance
+    assert other_device is not poem  # rotation state stays per device
+    assert registry["poem"].call_count == 2
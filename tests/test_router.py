@@ -1,11 +1,19 @@
 # tests/test_router.py
 from __future__ import annotations
+import asyncio
 import pytest
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock
+from trmnl.engines import router as router_module
 from trmnl.engines.router import EngineRouter, MixEngine
 
 
+def _engine(name: str) -> MagicMock:
+    engine = MagicMock()
+    engine.next = AsyncMock(return_value=Path(f"/{name}.bmp"))
+    return engine
+
+
 @pytest.mark.asyncio
 async def test_mix_engine_round_robin():
     mock_a = MagicMock()
@@ -28,6 +36,134 @@ async def test_mix_engine_single():
     assert await engine.next() == Path("/only.bmp")
 
 
+@pytest.mark.asyncio
+async def test_mix_engine_smooth_weights():
+    engine = MixEngine([_engine("a"), _engine("b")], weights=[2, 1])
+    served = [(await engine.next()).stem for _ in range(6)]
+    assert served == ["a", "b", "a", "a", "b", "a"]
+
+
+@pytest.mark.asyncio
+async def test_mix_engine_concurrent_callers_take_separate_turns():
+    def slow(path):
+        async def next():
+            await asyncio.sleep(0.01)
+            return path
+        return next
+
+    mock_a, mock_b = MagicMock(), MagicMock()
+    mock_a.next = AsyncMock(side_effect=slow(Path("/a.bmp")))
+    mock_b.next = AsyncMock(side_effect=slow(Path("/b.bmp")))
+    engine = MixEngine([mock_a, mock_b])
+
+    paths = await asyncio.gather(*(engine.next() for _ in range(4)))
+    assert sorted(p.stem for p in paths) == ["a", "a", "b", "b"]
+
+
+def test_mix_engine_from_sequence_shares_instances():
+    registry = {"poem": MagicMock(), "fantasy": MagicMock()}
+    engine, valid = MixEngine.from_sequence(["poem", "fantasy", "poem", "bogus"], registry)
+    assert valid == ["poem", "fantasy", "poem"]
+    assert engine.names == ["poem", "fantasy"]
+    assert engine.weights == [2, 1]
+    registry["poem"].assert_called_once_with()
+
+    engine, _ = MixEngine.from_sequence(["poem", "fantasy"], registry, {"fantasy": 4})
+    assert engine.weights == [1, 4]
+
+
+@pytest.mark.asyncio
+async def test_mix_engine_skips_failing_engine_with_backoff(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(router_module, "_clock", lambda: now[0])
+    broken = MagicMock()
+    broken.next = AsyncMock(side_effect=RuntimeError("no images"))
+    good = _engine("good")
+    engine = MixEngine([broken, good], names=["broken", "good"])
+
+    assert await engine.next() == Path("/good.bmp")
+    assert broken.next.await_count == 1
+    # backing off: the broken engine isn't even tried
+    assert await engine.next() == Path("/good.bmp")
+    assert broken.next.await_count == 1
+    assert engine.status()[0]["failures"] == 1
+
+    now[0] += router_module.BACKOFF_BASE + 1
+    broken.next = AsyncMock(return_value=Path("/broken.bmp"))
+    served = {(await engine.next()).stem for _ in range(2)}
+    assert served == {"broken", "good"}
+    assert engine.status()[0]["failures"] == 0
+
+
+@pytest.mark.asyncio
+async def test_mix_engine_skips_engine_that_times_out():
+    async def hang():
+        await asyncio.sleep(10)
+
+    stuck = MagicMock()
+    stuck.next = AsyncMock(side_effect=hang)
+    engine = MixEngine([stuck, _engine("b")], timeout=0.01)
+    assert await engine.next() == Path("/b.bmp")
+
+
+@pytest.mark.asyncio
+async def test_mix_engine_all_failing_raises():
+    broken = MagicMock()
+    broken.next = AsyncMock(side_effect=RuntimeError("boom"))
+    engine = MixEngine([broken])
+    with pytest.raises(RuntimeError, match="All mixed engines failed"):
+        await engine.next()
+
+
+@pytest.mark.asyncio
+async def test_mix_engine_warms_next_engine():
+    fast, slow = _engine("fantasy"), _engine("poem")
+    engine = MixEngine([fast, slow])
+
+    assert await engine.next() == Path("/fantasy.bmp")
+    await asyncio.sleep(0.01)
+    # poem's turn is next, so it has already started
+    assert slow.next.await_count == 1
+    assert engine.status()[1]["warm"] is True
+
+    assert await engine.next() == Path("/poem.bmp")
+    assert slow.next.await_count == 1  # the held result was used
+    engine.cancel_lookahead()
+
+
+@pytest.mark.asyncio
+async def test_mix_engine_failed_warm_is_skipped_on_its_turn():
+    good = _engine("good")
+    flaky = MagicMock()
+    flaky.next = AsyncMock(side_effect=RuntimeError("boom"))
+    engine = MixEngine([good, flaky], names=["good", "flaky"])
+
+    assert await engine.next() == Path("/good.bmp")
+    await asyncio.sleep(0.01)
+    assert await engine.next() == Path("/good.bmp")
+    assert engine.status()[1]["failures"] == 1
+    engine.cancel_lookahead()
+
+
+@pytest.mark.asyncio
+async def test_set_engine_cancels_lookahead():
+    async def hang():
+        await asyncio.sleep(10)
+
+    stuck = MagicMock()
+    stuck.next = AsyncMock(side_effect=hang)
+    mix = MixEngine([_engine("a"), stuck])
+    router = EngineRouter(mix, "mix", ["a", "stuck"])
+
+    await router.next()
+    warming = mix._warming[1]
+
+    router.set_engine(_engine("other"), "other", [])
+    with pytest.raises(asyncio.CancelledError):
+        await warming
+    assert mix._warming == {}
+
+
 def test_mix_engine_empty_raises():
     with pytest.raises(ValueError, match="at least one engine"):
         MixEngine([])
@@ -50,6 +186,32 @@ async def test_engine_router_tracks_last_served():
     assert router.last_served == Path("/second.bmp")
 
 
+@pytest.mark.asyncio
+async def test_engine_router_coalesces_concurrent_advances():
+    async def slow_next():
+        await asyncio.sleep(0.01)
+        return Path("/only.bmp")
+
+    mock_engine = MagicMock()
+    mock_engine.next = AsyncMock(side_effect=slow_next)
+    router = EngineRouter(mock_engine, "poem", [])
+
+    paths = await asyncio.gather(router.next(), router.next(), router.next())
+    assert paths == [Path("/only.bmp")] * 3
+    assert mock_engine.next.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_engine_router_serves_primed_image_first():
+    old, new = _engine("old"), _engine("new")
+    router = EngineRouter(old, "poem", [])
+    router.set_engine(new, "fantasy", [], primed=Path("/warm.bmp"))
+
+    assert await router.next() == Path("/warm.bmp")
+    assert new.next.await_count == 0
+    assert await router.next() == Path("/new.bmp")
+
+
 def test_engine_router_set_engine_updates_state():
     mock_a = MagicMock()
     mock_b = MagicMock()
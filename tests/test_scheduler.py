@@ -0,0 +1,75 @@
+# tests/test_scheduler.py
+from __future__ import annotations
+import asyncio
+import pytest
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+import trmnl.scheduler as scheduler_mod
+from trmnl.carousel import Carousel
+from trmnl.devices import DEFAULT_DEVICE, Device, DeviceManager
+from trmnl.engines.router import EngineRouter
+from trmnl.scheduler import Scheduler, next_boundary
+
+
+def _device(tmp_path: Path, name: str = "poem", refresh_interval: int = 60) -> Device:
+    src = tmp_path / "src"
+    src.mkdir(exist_ok=True)
+    counter = iter(range(1000))
+
+    async def next_image():
+        path = src / f"img_{next(counter)}.bmp"
+        path.write_bytes(b"BM " + path.stem.encode())
+        return path
+
+    engine = MagicMock()
+    engine.next = AsyncMock(side_effect=next_image)
+    router = EngineRouter(engine, name, [])
+    carousel = Carousel(router, working_dir=None, prefetch_depth=0)
+    return Device(DEFAULT_DEVICE, router, carousel, refresh_interval)
+
+
+def test_next_boundary_aligns_to_interval():
+    assert next_boundary(119.0, 60) == 120
+    assert next_boundary(120.0, 60) == 180
+    assert next_boundary(1000.5, 300) == 1200
+
+
+def test_interval_per_engine(tmp_path):
+    device = _device(tmp_path, name="poem", refresh_interval=60)
+    scheduler = Scheduler(DeviceManager(device), {"poem": 900})
+    assert scheduler.interval_for(device) == 900
+    device.router.active_name = "fantasy"
+    assert scheduler.interval_for(device) == 60
+
+
+@pytest.mark.asyncio
+async def test_scheduler_advances_on_its_clock(tmp_path, monkeypatch):
+    clock = [119.9]
+    monkeypatch.setattr(scheduler_mod, "_clock", lambda: clock[0])
+    monkeypatch.setattr(scheduler_mod, "SCHEDULER_TICK", 0.01)
+    device = _device(tmp_path)
+    first = await device.carousel.next()
+    scheduler = Scheduler(DeviceManager(device))
+
+    scheduler.start()
+    await asyncio.sleep(0.03)
+    assert scheduler.status()["devices"][DEFAULT_DEVICE] == {"interval": 60, "next_at": 120}
+    assert device.carousel.staged is first
+
+    clock[0] = 120.0
+    for _ in range(50):
+        if scheduler.advanced:
+            break
+        await asyncio.sleep(0.01)
+    assert scheduler.advanced == 1
+    assert device.carousel.staged is not first
+    assert scheduler.status()["devices"][DEFAULT_DEVICE]["next_at"] == 180
+
+    # polls hand out the staged image instead of advancing
+    staged = device.carousel.staged
+    assert device.scheduled
+    assert await device.poll() is staged
+    assert device.router.active_engine.next.await_count == 2
+
+    await scheduler.stop()
+    assert not device.scheduled
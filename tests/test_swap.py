@@ -0,0 +1,122 @@
+# tests/test_swap.py
+from __future__ import annotations
+import asyncio
+import pytest
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+from trmnl.engines.router import MixEngine
+from trmnl.swap import EngineSwapper, SwapJob, build_all, build_and_warm
+
+
+def _built(name: str, next_image=None):
+    engine = MagicMock()
+    engine.next = next_image or AsyncMock(return_value=Path(f"/{name}.bmp"))
+    return engine, name, []
+
+
+@pytest.mark.asyncio
+async def test_build_and_warm_primes_first_image():
+    job = SwapJob("j1", "engine")
+    engine, name, sequence, primed = await build_and_warm(job, lambda: _built("poem"))
+    assert name == "poem"
+    assert primed == Path("/poem.bmp")
+    assert job.state == "warming"
+
+
+@pytest.mark.asyncio
+async def test_build_and_warm_leaves_running_engine_alone():
+    built = _built("poem")
+    engine, _, _, primed = await build_and_warm(SwapJob("j1", "reload"), lambda: built, built[0])
+    assert engine is built[0]
+    assert primed is None
+    engine.next.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_build_and_warm_tolerates_failed_warmup():
+    job = SwapJob("j1", "engine")
+    failing = AsyncMock(side_effect=RuntimeError("no images"))
+    engine, name, _, primed = await build_and_warm(job, lambda: _built("fantasy", failing))
+    assert name == "fantasy"
+    assert primed is None
+
+
+@pytest.mark.asyncio
+async def test_swaps_apply_in_submission_order():
+    swapper = EngineSwapper()
+    applied = []
+
+    def work(name, delay):
+        async def run(job):
+            await asyncio.sleep(delay)
+            applied.append(name)
+            return {"engine": name}
+        return run
+
+    first = swapper.submit("engine", work("slow", 0.02))
+    second = swapper.submit("engine", work("fast", 0.0))
+    assert await swapper.wait(second, timeout=1.0)
+    assert first.done
+    assert applied == ["slow", "fast"]
+    assert second.result == {"engine": "fast"}
+
+
+@pytest.mark.asyncio
+async def test_failed_job_records_error_and_history_is_bounded():
+    swapper = EngineSwapper(history=2)
+
+    async def boom(job):
+        raise ValueError("bad config")
+
+    job = swapper.submit("reload", boom)
+    assert await swapper.wait(job, timeout=1.0)
+    assert job.state == "failed"
+    assert job.error == "bad config"
+
+    async def ok(job):
+        return {}
+
+    for _ in range(3):
+        await swapper.wait(swapper.submit("engine", ok), timeout=1.0)
+    swapper.submit("engine", ok)
+    assert swapper.get(job.id) is None
+    assert len(swapper.jobs()) == 3  # two finished plus the new one
+    await swapper.stop()
+
+
+@pytest.mark.asyncio
+async def test_wait_times_out_on_slow_job():
+    swapper = EngineSwapper()
+
+    async def slow(job):
+        await asyncio.sleep(10)
+        return {}
+
+    job = swapper.submit("engine", slow)
+    assert await swapper.wait(job, timeout=0.01) is False
+    await swapper.stop()
+    assert job.error == "cancelled"
+
+
+@pytest.mark.asyncio
+async def test_build_all_cancels_siblings_and_discards_warmed_engines():
+    import time
+
+    mix = MixEngine([_built("a")[0], _built("b")[0]])
+    cancelled = []
+
+    async def hang():
+        try:
+            await asyncio.sleep(10)
+        finally:
+            cancelled.append(True)
+
+    def broken():
+        time.sleep(0.05)  # fail after the other engines are warming
+        raise ValueError("bad artist")
+
+    builds = [lambda: (mix, "mix", ["a", "b"]), broken, lambda: _built("slow", AsyncMock(side_effect=hang))]
+    with pytest.raises(ValueError, match="bad artist"):
+        await build_all(SwapJob("j1", "reload"), builds)
+    assert mix._warming == {}  # its look-ahead was cancelled
+    assert cancelled == [True]
@@ -0,0 +1,114 @@
+# tests/test_telemetry.py
+from __future__ import annotations
+import asyncio
+import pytest
+from trmnl.telemetry import (
+    BUCKET_SECONDS,
+    Ring,
+    Series,
+    TelemetryStore,
+    parse_log_payload,
+)
+
+FIRMWARE_LOG = {
+    "log": {
+        "logs_array": [
+            {
+                "creation_timestamp": 1_700_000_000,
+                "log_message": "Sleep",
+                "device_status_stamp": {
+                    "wifi_rssi_level": -61,
+                    "wifi_status": "connected",
+                    "refresh_rate": 60,
+                    "time_since_last_sleep_start": 12,
+                    "current_fw_version": "1.4.7",
+                    "battery_voltage": 4.12,
+                    "free_heap_size": 180000,
+                },
+            }
+        ]
+    }
+}
+
+
+def test_parse_firmware_log():
+    samples = parse_log_payload(FIRMWARE_LOG, "dev1")
+    by_metric = {s.metric: s for s in samples}
+    assert by_metric["battery_voltage"].value == pytest.approx(4.12)
+    assert by_metric["rssi"].value == -61
+    assert by_metric["awake_seconds"].value == 12
+    assert {s.device for s in samples} == {"dev1"}
+    assert {s.timestamp for s in samples} == {1_700_000_000}
+
+
+def test_parse_flat_payload_and_junk():
+    samples = parse_log_payload({"battery_voltage": "3.9", "rssi": "n/a"}, None, received=5e9)
+    assert [(s.device, s.metric, s.value, s.timestamp) for s in samples] == [
+        ("unknown", "battery_voltage", 3.9, 5e9)
+    ]
+    assert parse_log_payload(["not", "a", "dict"], "dev1") == []
+    assert parse_log_payload({"battery_voltage": float("nan")}, "dev1") == []
+    assert parse_log_payload({"logs_array": None}, "dev1") == []
+    assert parse_log_payload({"log": {"logs_array": 3}}, "dev1") == []
+
+
+def test_ring_keeps_newest_rows():
+    ring = Ring(3, width=2)
+    for i in range(5):
+        ring.append(float(i), i * 10.0, i * 100.0)
+    assert len(ring) == 3
+    assert list(ring.rows()) == [(2.0, 20.0, 200.0), (3.0, 30.0, 300.0), (4.0, 40.0, 400.0)]
+    assert [row[0] for row in ring.rows(since=3.5)] == [4.0]
+
+
+def test_ring_grows_on_demand():
+    ring = Ring(1000, width=4)
+    assert len(ring) == 0 and list(ring.rows()) == []
+    ring.append(1.0, 1.0, 2.0, 3.0, 4.0)
+    ring.append(2.0, 5.0, 6.0, 7.0, 8.0)
+    assert len(ring._times) == 2 and len(ring._values) == 8
+    assert list(ring.rows()) == [(1.0, 1.0, 2.0, 3.0, 4.0), (2.0, 5.0, 6.0, 7.0, 8.0)]
+
+
+def test_series_downsamples_hourly():
+    series = Series(raw_capacity=4)
+    base = 1_700_000_000 - 1_700_000_000 % BUCKET_SECONDS
+    for i, value in enumerate([4.0, 3.0, 5.0]):
+        series.add(base + i * 60, value)
+    series.add(base + BUCKET_SECONDS + 10, 2.0)
+
+    hourly = series.hourly()
+    assert hourly[0] == (base, 4.0, 3.0, 5.0, 3)
+    assert hourly[1] == (base + BUCKET_SECONDS, 2.0, 2.0, 2.0, 1)
+    assert series.latest == (base + BUCKET_SECONDS + 10, 2.0)
+
+
+@pytest.mark.asyncio
+async def test_store_drains_queue_in_background():
+    store = TelemetryStore(queue_size=100)
+    store.start()
+    store.submit(parse_log_payload(FIRMWARE_LOG, "dev1"))
+    for _ in range(20):
+        if store.series:
+            break
+        await asyncio.sleep(0.01)
+    result = store.query(device="dev1", metric="battery_voltage")
+    assert result["dev1"]["battery_voltage"]["latest"] == [1_700_000_000, pytest.approx(4.12)]
+    await store.stop()
+
+
+def test_store_drops_oldest_when_full():
+    store = TelemetryStore(queue_size=2)
+    store.submit(parse_log_payload({"battery_voltage": 1, "wifi_rssi_level": 2, "refresh_rate": 3}, "d"))
+    assert store.dropped == 1
+    assert store.flush() == 2
+    assert set(store.query()["d"]) == {"rssi", "refresh_rate"}
+
+
+def test_store_evicts_least_recently_seen_device():
+    store = TelemetryStore(max_devices=2)
+    for device in ("a", "b", "a", "c"):
+        store.submit(parse_log_payload({"battery_voltage": 4.0}, device))
+    store.flush()
+    assert list(store.query()) == ["a", "c"]  # b reported least recently
+    assert store.evicted_devices == 1
@@ -0,0 +1,77 @@
+# tests/test_text_render.py
+from __future__ import annotations
+import pytest
+from PIL import Image
+from trmnl.text_render import get_font, render_text_image, wrap_line
+
+
+def test_wrap_line_respects_width():
+    metrics = get_font(16)
+    text = "the quick brown fox jumps over the lazy dog " * 10
+    lines = wrap_line(text, metrics, 300)
+    assert len(lines) > 1
+    assert all(metrics.width(line) <= 300 for line in lines)
+    assert " ".join(lines).split() == text.split()
+
+
+def test_wrap_line_splits_overlong_word():
+    metrics = get_font(16)
+    lines = wrap_line("x" * 200, metrics, 100)
+    assert "".join(lines) == "x" * 200
+    assert all(metrics.width(line) <= 100 for line in lines)
+
+
+def test_wrap_line_places_glyphs_wider_than_the_line():
+    assert wrap_line("WWW", get_font(16), 5) == ["W", "W", "W"]
+
+
+def test_glyph_advances_are_cached():
+    metrics = get_font(18)
+    metrics.width("hello")
+    assert set("helo") <= set(metrics._advances)
+
+
+def test_render_text_image_is_1bit_800x480():
+    image = render_text_image("TITLE by Someone", "line one\nline two\n\nline four")
+    assert image.mode == "1"
+    assert image.size == (800, 480)
+    # something was drawn, and the layout is centered (margins stay white)
+    assert image.getbbox() is not None
+    inverted = Image.eval(image.convert("L"), lambda v: 255 - v)
+    left, top, right, bottom = inverted.getbbox()
+    assert top > 24 and bottom < 480 - 24
+    assert abs((800 - right) - left) < 40
+
+
+def test_render_text_image_drops_overflowing_lines():
+    body = "\n".join(f"line {i}" for i in range(200))
+    image = render_text_image(None, body)
+    assert image.size == (800, 480)
+
+
+@pytest.mark.asyncio
+async def test_poem_engine_text_backend(tmp_path):
+    from trmnl.engines.poems.engine import PoemEngine
+    from trmnl.generate import RenderCache
+
+    engine = PoemEngine(backend="text", cache=RenderCache(tmp_path))
+    path = await engine._generate_poem_image("Ozymandias", "I met a traveller", "Shelley")
+
+    assert path.parent == tmp_path
+    with Image.open(path) as img:
+        assert img.mode == "1"
+        assert img.size == (800, 480)
+
+
+def test_poem_engine_rejects_unknown_backend():
+    from trmnl.engines.poems.engine import PoemEngine
+
+    with pytest.raises(ValueError, match="backend"):
+        PoemEngine(backend="svg")
+
+
+def test_poem_engine_rejects_unknown_dither():
+    from trmnl.engines.poems.engine import PoemEngine
+
+    with pytest.raises(ValueError, match="dither"):
+        PoemEngine(dither="foo")